@@ -7,7 +7,7 @@ from flask import jsonify, request
 from flask_jwt_extended import unset_refresh_cookies
 
 from config import Config
-from utils import logger, status
+from utils import logger, span_recorder, status
 
 
 def register_handlers(app):
@@ -39,6 +39,16 @@ def register_handlers(app):
                 request.cookies = new_cookies
                 logger.backend_logger.warning("fix corrupted refresh token cookie")
 
+    @app.after_request
+    def add_server_timing(response):
+        """Expose the stage breakdown of the request when the client opts in"""
+        if request.headers.get(span_recorder.DEBUG_HEADER):
+            recorder = span_recorder.get_recorder()
+            if recorder:
+                response.headers["Server-Timing"] = recorder.server_timing()
+
+        return response
+
     # JWT Error Handlers
     from .extensions import jwt
 
@@ -72,6 +72,11 @@ class Config:
     PROTOCOL_AGENT_REGION = getenv("PROTOCOL_AGENT_REGION", "us-east-1")
     PROTOCOL_AGENT_MAX_TURNS = int(getenv("PROTOCOL_AGENT_MAX_TURNS", "8"))
 
+    # seconds tenant memory (features, maps) is reused across requests; 0 disables
+    MEMORY_CACHE_TTL = int(getenv("MEMORY_CACHE_TTL", "0"))
+    # seconds token refresh reuses user state and integration status; 0 disables
+    AUTH_CACHE_TTL = int(getenv("AUTH_CACHE_TTL", "0"))
+
 
     FEATURE_CONCILIATION_ALGORITHM = getenv("FEATURE_CONCILIATION_ALGORITHM", "FUZZY")
     # enable only after the onboarding/training app version is released
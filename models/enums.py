@@ -219,6 +219,9 @@ class AppFeatureFlagEnum(Enum):
     REDIS_CACHE = "redisCache"
     REDIS_CACHE_EXAMS = "redisCacheExams"
     REDIS_CACHE_EXAMS_HYBRID = "redisCacheExamsHybrid"
+    CONCURRENT_PRESCRIPTION_VIEW = "concurrentPrescriptionView"
+    PRIORITIZATION_INDEX = "prioritizationIndex"
+    PRIORITIZATION_INDEX_WRITE = "prioritizationIndexWrite"
 
 
 class FrequencyEnum(Enum):
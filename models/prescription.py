@@ -68,6 +68,25 @@ class PrescriptionAudit(db.Model):
     createdBy = db.Column("created_by", db.BigInteger, nullable=False)
 
 
+class PrescriptionPriority(db.Model):
+    """Prioritization index: prescription keys and scores in typed columns"""
+
+    __tablename__ = "prescricao_prioridade"
+
+    id = db.Column("fkprescricao", db.BigInteger, primary_key=True)
+    idHospital = db.Column("fkhospital", db.BigInteger, nullable=True)
+    idDepartment = db.Column("fksetor", db.BigInteger, nullable=True)
+    idSegment = db.Column("idsegmento", db.BigInteger, nullable=True)
+    date = db.Column("dtprescricao", db.DateTime, nullable=False)
+    agg = db.Column("agregada", db.Boolean, nullable=True)
+    concilia = db.Column("concilia", db.String(1), nullable=True)
+    globalScore = db.Column("score_global", db.Integer, nullable=True)
+    alertLevel = db.Column("nivel_alerta", db.String, nullable=True)
+    diff = db.Column("diff", db.Integer, nullable=True)
+    interventions = db.Column("intervencoes", db.Integer, nullable=True)
+    update = db.Column("update_at", db.DateTime, nullable=True)
+
+
 class PrescriptionClinicalNote(db.Model):
     __tablename__ = "prescricao_evolucao"
 
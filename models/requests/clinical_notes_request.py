@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class GenerateSoapRequest(BaseModel):
@@ -8,3 +8,11 @@ class GenerateSoapRequest(BaseModel):
 
     id: int
     prompt_key: Optional[str] = None
+
+
+class AnnotationsRefreshCacheRequest(BaseModel):
+    """Dialysis and allergies cache refresh request model (integration bursts)"""
+
+    admissionNumberList: list[int] = Field(min_length=1, max_length=1000)
+    dialysis: bool = True
+    allergies: bool = True
@@ -1,7 +1,7 @@
 """Request model: exams"""
 
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ExamCreateRequest(BaseModel):
@@ -33,3 +33,9 @@ class ExamDeleteRequest(BaseModel):
 
     admissionNumber: int
     idExam: int
+
+
+class ExamRefreshCacheRequest(BaseModel):
+    """Exams cache refresh request model (integration bursts)"""
+
+    idPatientList: list[int] = Field(min_length=1, max_length=1000)
@@ -17,3 +17,4 @@ class PatientListRequest(BaseModel):
     dischargeDateStart: Optional[datetime] = None
     dischargeDateEnd: Optional[datetime] = None
     tags: Optional[list[str]] = None
+    cursor: Optional[str] = None
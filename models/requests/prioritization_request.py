@@ -49,3 +49,4 @@ class PrioritizationRequest(BaseModel):
     bed_list: Optional[list[str]] = None
     specialty_list: Optional[list[str]] = None
     responsible_physician_list: Optional[list[str]] = None
+    cursor: Optional[str] = None
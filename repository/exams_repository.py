@@ -3,7 +3,8 @@
 from datetime import date, timedelta
 
 from boto3.dynamodb.conditions import Key
-from sqlalchemy import asc, desc, func
+from sqlalchemy import String, asc, cast, desc, func, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from config import Config
 from models.appendix import GlobalExam
@@ -25,6 +26,40 @@ def get_exams_by_patient(idPatient: int, days: int):
     )
 
 
+def get_latest_exams_by_patient(id_patient: int, days: int, with_previous: bool):
+    """Get the latest exam (and the one before it) of each type in a single pass
+
+    Rows come ordered by type and rank: rank 1 holds the latest date of the type and
+    rank 2 the date right before it (dense_rank, so exams sharing the latest date
+    never count as previous).
+    """
+    rank = (
+        func.dense_rank()
+        .over(partition_by=Exams.typeExam, order_by=desc(Exams.date))
+        .label("rank")
+    )
+
+    ranked_exams = (
+        db.session.query(
+            Exams.typeExam.label("typeExam"),
+            Exams.value.label("value"),
+            Exams.unit.label("unit"),
+            Exams.date.label("date"),
+            rank,
+        )
+        .filter(Exams.idPatient == id_patient)
+        .filter(Exams.date >= (date.today() - timedelta(days=days)))
+        .subquery()
+    )
+
+    return (
+        db.session.query(ranked_exams)
+        .filter(ranked_exams.c.rank <= (2 if with_previous else 1))
+        .order_by(ranked_exams.c.typeExam, ranked_exams.c.rank)
+        .all()
+    )
+
+
 def get_exams_by_patient_from_dynamodb(schema: str, id_patient: int):
     """Get exams by patient from DynamoDB"""
 
@@ -96,6 +131,27 @@ def get_exams_reference(id_segment: int):
     return results
 
 
+def get_exams_reference_version(id_segment: int):
+    """Version stamp of the segment exams reference (changes on every edit)
+
+    Exam reordering does not touch update_at, so the order is part of the stamp.
+    """
+    exams_order = func.md5(
+        func.string_agg(
+            SegmentExam.typeExam
+            + ":"
+            + func.coalesce(cast(SegmentExam.order, String), ""),
+            aggregate_order_by(literal_column("','"), SegmentExam.typeExam),
+        )
+    )
+
+    return tuple(
+        db.session.query(func.count(), func.max(SegmentExam.update), exams_order)
+        .filter(SegmentExam.idSegment == id_segment)
+        .one()
+    )
+
+
 def get_global_exams():
     """Get active global exams"""
     return (
@@ -15,6 +15,7 @@ from models.appendix import (
 )
 from models.main import Drug, DrugAttributes, Outlier, Substance, User, db
 from models.prescription import Prescription, PrescriptionDrug
+from utils import prescription_item
 
 
 def _get_period_filter(query, model, agg_date, is_pmc, is_cpoe, ignore_segments=None):
@@ -236,7 +237,7 @@ def find_drugs_by_prescription(
             if idSegment != None:
                 q = q.filter(Prescription.idSegment == idSegment)
 
-    return q.order_by(asc(Drug.name)).all()
+    return prescription_item.to_items(q.order_by(asc(Drug.name)).all())
 
 
 def _get_prev_notes(admissionNumber):
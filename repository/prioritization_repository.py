@@ -8,10 +8,10 @@ from exception.validation_error import ValidationError
 from models.appendix import Department
 from models.enums import PatientConciliationStatusEnum, PrescriptionReviewTypeEnum
 from models.main import db
-from models.prescription import Patient, Prescription
+from models.prescription import Patient, Prescription, PrescriptionPriority
 from models.requests.prioritization_request import PrioritizationRequest
 from models.segment import Segment
-from utils import status
+from utils import cursorutils, status
 
 ICD_GROUPS = {
     "ONCO": [f"C{i:02}" for i in range(98)] + [f"D{i}" for i in range(37, 49)],
@@ -23,6 +23,9 @@ ICD_GROUPS = {
 }
 
 
+PRIORITIZATION_LIMIT = 500
+
+
 def _icd_filter(column, codes):
     """Build a SQLAlchemy filter for a list of ICD codes.
 
@@ -39,12 +42,38 @@ def _icd_filter(column, codes):
     return or_(*conditions)
 
 
-def _build_base_query(request: PrioritizationRequest):
+_INDEXED_FEATURES = {
+    "globalScore": PrescriptionPriority.globalScore,
+    "diff": PrescriptionPriority.diff,
+    "interventions": PrescriptionPriority.interventions,
+}
+
+
+def _get_sort_columns(priority_index: bool) -> list:
+    """Sort (and cursor) columns of the list: score, date and id, descending"""
+    indexed = PrescriptionPriority if priority_index else Prescription
+
+    return [_feature_score("globalScore", priority_index), indexed.date, indexed.id]
+
+
+def _feature_score(name: str, priority_index: bool):
+    """Integer feature, from the prioritization index typed column when enabled"""
+    if priority_index:
+        return _INDEXED_FEATURES[name]
+
+    return Prescription.features[name].astext.cast(Integer)
+
+
+def _build_base_query(request: PrioritizationRequest, priority_index: bool = False):
     """Build the filtered query without SELECT columns, ORDER BY, or LIMIT.
 
     Returns a base SQLAlchemy query on the Prescription/Patient/Department/Segment
     join with all WHERE filters applied. Callers add their own column projection,
     ordering, and limiting on top via with_entities() / order_by() / limit().
+
+    With priority_index, the query is driven by the prioritization index
+    (prescricao_prioridade): segment, department, date and score filters use its
+    typed columns instead of the prescription json features.
     """
     q = (
         db.session.query(Prescription)
@@ -59,10 +88,16 @@ def _build_base_query(request: PrioritizationRequest):
         .outerjoin(Segment, Prescription.idSegment == Segment.id)
     )
 
+    if priority_index:
+        q = q.join(PrescriptionPriority, PrescriptionPriority.id == Prescription.id)
+        indexed = PrescriptionPriority
+    else:
+        indexed = Prescription
+
     currentDepartment = request.currentDepartment and (len(request.idDept) > 0)
 
     if request.idSegment is not None:
-        q = q.filter(Prescription.idSegment == request.idSegment)
+        q = q.filter(indexed.idSegment == request.idSegment)
 
     if len(request.idSegmentList) > 0:
         # refactor
@@ -72,14 +107,14 @@ def _build_base_query(request: PrioritizationRequest):
                 segments.append(s)
 
         if len(segments) > 0:
-            q = q.filter(Prescription.idSegment.in_(segments))
+            q = q.filter(indexed.idSegment.in_(segments))
     else:
-        q = q.filter(Prescription.idSegment != None)
+        q = q.filter(indexed.idSegment != None)
 
     if len(request.idDept) > 0:
         idDept = list(map(int, request.idDept))
         if currentDepartment or request.concilia:
-            q = q.filter(Prescription.idDepartment.in_(idDept))
+            q = q.filter(indexed.idDepartment.in_(idDept))
         else:
             q = q.filter(postgresql.array(idDept).overlap(Prescription.aggDeps))
 
@@ -251,12 +286,17 @@ def _build_base_query(request: PrioritizationRequest):
 
     if request.diff is not None:
         if request.diff:
-            q = q.filter(Prescription.features["diff"].astext.cast(Integer) > 0)
+            q = q.filter(_feature_score("diff", priority_index) > 0)
         else:
-            q = q.filter(Prescription.features["diff"].astext.cast(Integer) == 0)
+            q = q.filter(_feature_score("diff", priority_index) == 0)
 
     if request.alert_level is not None:
-        q = q.filter(Prescription.features["alertLevel"].astext == request.alert_level)
+        if priority_index:
+            q = q.filter(PrescriptionPriority.alertLevel == request.alert_level)
+        else:
+            q = q.filter(
+                Prescription.features["alertLevel"].astext == request.alert_level
+            )
 
     if request.has_conciliation is not None:
         if request.has_conciliation:
@@ -276,24 +316,18 @@ def _build_base_query(request: PrioritizationRequest):
 
     if request.pending_interventions is not None:
         if request.pending_interventions:
-            q = q.filter(
-                Prescription.features["interventions"].astext.cast(Integer) > 0
-            )
+            q = q.filter(_feature_score("interventions", priority_index) > 0)
         else:
-            q = q.filter(
-                Prescription.features["interventions"].astext.cast(Integer) == 0
-            )
+            q = q.filter(_feature_score("interventions", priority_index) == 0)
 
     if request.global_score_min is not None:
         q = q.filter(
-            (Prescription.features["globalScore"].astext.cast(Integer))
-            >= request.global_score_min
+            _feature_score("globalScore", priority_index) >= request.global_score_min
         )
 
     if request.global_score_max is not None:
         q = q.filter(
-            (Prescription.features["globalScore"].astext.cast(Integer))
-            <= request.global_score_max
+            _feature_score("globalScore", priority_index) <= request.global_score_max
         )
 
     if request.age_min is not None:
@@ -385,8 +419,8 @@ def _build_base_query(request: PrioritizationRequest):
             status.HTTP_400_BAD_REQUEST,
         )
 
-    q = q.filter(Prescription.date >= start)
-    q = q.filter(Prescription.date <= end)
+    q = q.filter(indexed.date >= start)
+    q = q.filter(indexed.date <= end)
 
     return q
 
@@ -405,31 +439,45 @@ def sample_prescription_ids(request: PrioritizationRequest, limit: int) -> list[
     return [r[0] for r in results]
 
 
-def get_prioritization_list(request: PrioritizationRequest, run_count: bool = True):
+def get_prioritization_list(
+    request: PrioritizationRequest, run_count: bool = True, priority_index=False
+):
     """List prescriptions for prioritization with an optional total count.
 
-    Returns a tuple (results, total_records) where results is capped at 500 rows
-    ordered by globalScore descending. total_records is len(results) when run_count=False.
+    Returns a tuple (results, total_records) where results is a page of up to
+    PRIORITIZATION_LIMIT rows ordered by globalScore, date and id descending,
+    starting after request.cursor. total_records is len(results) when
+    run_count=False.
+    With priority_index, the list is read from the prioritization index, ordered by
+    its typed score column.
     """
-    base_q = _build_base_query(request)
+    base_q = _build_base_query(request, priority_index=priority_index)
+    sort_columns = _get_sort_columns(priority_index)
 
     # SET LOCAL lasts until the request transaction ends; keeps this query below
     # the 30s API Gateway limit and stops abandoned queries from loading the db
     db.session.execute(text("SET LOCAL statement_timeout = '25s'"))
 
+    page_q = base_q
+    if request.cursor:
+        page_q = page_q.filter(
+            cursorutils.after_cursor(
+                sort_columns,
+                cursorutils.decode_cursor(request.cursor, size=len(sort_columns)),
+            )
+        )
+
     results = (
-        base_q.with_entities(
+        page_q.with_entities(
             Prescription,
             Patient,
             Department.name.label("department"),
-            (Prescription.features["globalScore"].astext.cast(Integer)).label(
-                "globalScore"
-            ),
+            _feature_score("globalScore", priority_index).label("globalScore"),
             # the service truncates to 300 chars; fetch 301 to detect overflow
             func.left(Patient.observation, 301).label("observation"),
         )
-        .order_by(desc("globalScore"))
-        .limit(500)
+        .order_by(*[desc(c) for c in sort_columns])
+        .limit(PRIORITIZATION_LIMIT)
         .all()
     )
 
@@ -440,3 +488,58 @@ def get_prioritization_list(request: PrioritizationRequest, run_count: bool = Tr
     )
 
     return results, total_records
+
+
+def estimate_prioritization_count(
+    request: PrioritizationRequest, priority_index=False
+) -> int:
+    """Planner estimate of the prescriptions matching the request filters
+
+    Runs EXPLAIN only: the query is planned, not executed.
+    """
+    connection = db.session.connection()
+    # driver sql skips the tenant schema translation (dbSession.setSchema): render it
+    schema_translate_map = connection.get_execution_options().get(
+        "schema_translate_map"
+    )
+    statement = (
+        _build_base_query(request, priority_index=priority_index)
+        .with_entities(Prescription.id)
+        .statement.compile(
+            dialect=connection.dialect,
+            schema_translate_map=schema_translate_map,
+            render_schema_translate=schema_translate_map is not None,
+            compile_kwargs={"render_postcompile": True},
+        )
+    )
+
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", statement.params
+    ).scalar()
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def upsert_prescription_priority(prescription: Prescription):
+    """Insert or update the prioritization index row of a prescription"""
+    features = prescription.features or {}
+    values = {
+        "fkhospital": prescription.idHospital,
+        "fksetor": prescription.idDepartment,
+        "idsegmento": prescription.idSegment,
+        "dtprescricao": prescription.date,
+        "agregada": prescription.agg,
+        "concilia": prescription.concilia,
+        "score_global": features.get("globalScore"),
+        "nivel_alerta": features.get("alertLevel"),
+        "diff": features.get("diff"),
+        "intervencoes": features.get("interventions"),
+        "update_at": datetime.today(),
+    }
+
+    stmt = postgresql.insert(PrescriptionPriority.__table__).values(
+        fkprescricao=prescription.id, **values
+    )
+    stmt = stmt.on_conflict_do_update(index_elements=["fkprescricao"], set_=values)
+
+    db.session.execute(stmt)
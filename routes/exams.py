@@ -7,6 +7,7 @@ from models.requests.exam_request import (
     ExamCreateMultipleRequest,
     ExamCreateRequest,
     ExamDeleteRequest,
+    ExamRefreshCacheRequest,
 )
 from services import exams_service
 
@@ -44,6 +45,17 @@ def delete_exam():
     )
 
 
+@app_exams.route("/exams/refresh-cache", methods=["POST"])
+@api_endpoint()
+def refresh_exams_cache():
+    """Refreshes the exams cache of a list of patients"""
+    request_data = ExamRefreshCacheRequest(**request.get_json())
+
+    exams_service.refresh_exams_cache_list(id_patient_list=request_data.idPatientList)
+
+    return len(request_data.idPatientList)
+
+
 @app_exams.route("/exams/types/list", methods=["GET"])
 @api_endpoint()
 def list_exam_types():
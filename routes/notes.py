@@ -1,7 +1,10 @@
 from flask import Blueprint, request
 from markupsafe import escape as escape_html
 
-from models.requests.clinical_notes_request import GenerateSoapRequest
+from models.requests.clinical_notes_request import (
+    AnnotationsRefreshCacheRequest,
+    GenerateSoapRequest,
+)
 from services import clinical_notes_service, soap_service
 from decorators.api_endpoint_decorator import api_endpoint
 
@@ -60,6 +63,21 @@ def remove_annotation():
     return True
 
 
+@app_note.route("/notes/refresh-cache", methods=["POST"])
+@api_endpoint()
+def refresh_annotations_cache():
+    """Refreshes the dialysis and allergies cache of a list of admissions"""
+    request_data = AnnotationsRefreshCacheRequest(**request.get_json())
+
+    clinical_notes_service.refresh_annotations_cache_list(
+        admission_number_list=request_data.admissionNumberList,
+        dialysis=request_data.dialysis,
+        allergies=request_data.allergies,
+    )
+
+    return len(request_data.admissionNumberList)
+
+
 @app_note.route("/notes/get-user-last", methods=["GET"])
 @api_endpoint()
 def get_user_last():
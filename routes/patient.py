@@ -38,6 +38,7 @@ def list_patients():
             attendedBy=request.args.getlist("attendedBy[]") or None,
             dischargeDateStart=request.args.get("dischargeDateStart"),
             dischargeDateEnd=request.args.get("dischargeDateEnd"),
+            cursor=request.args.get("cursor"),
         )
     )
 
@@ -118,6 +118,7 @@ def get_prescriptions():
         specialty_list=request.args.getlist("specialtyList[]") or None,
         responsible_physician_list=request.args.getlist("responsiblePhysicianList[]")
         or None,
+        cursor=request.args.get("cursor", None),
     )
 
     return prioritization_service.get_prioritization_list(prioritization_request)
@@ -1,9 +1,14 @@
 """Service to manage and retrieve integration status information for the admin interface."""
 
+from config import Config
 from models.main import db
 from models.appendix import SchemaConfig, Frequency
 from exception.validation_error import ValidationError
 from utils import status
+from utils.process_cache import TTLCache
+
+# integration status checked on every token refresh (see Config.AUTH_CACHE_TTL)
+_integration_status = TTLCache(ttl=Config.AUTH_CACHE_TTL)
 
 
 def get_integration_status(schema):
@@ -21,5 +26,13 @@ def get_integration_status(schema):
     return config.status
 
 
+def get_cached_integration_status(schema):
+    """Integration status reused across requests for AUTH_CACHE_TTL seconds"""
+    if not Config.AUTH_CACHE_TTL:
+        return get_integration_status(schema)
+
+    return _integration_status.get(schema, lambda: get_integration_status(schema))
+
+
 def _get_pending_frequencies():
     return db.session.query(Frequency).filter(Frequency.dailyFrequency == None).count()
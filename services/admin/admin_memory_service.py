@@ -10,6 +10,7 @@ from models.appendix import Memory
 from models.enums import FeatureEnum, MemoryEnum
 from models.main import User, db
 from models.prescription import Prescription, PrescriptionDrug
+from services import memory_service
 from utils import status
 
 KIND_ADMIN = [
@@ -137,4 +138,6 @@ def update_memory(
     db.session.add(memory_item)
     db.session.flush()
 
+    memory_service.invalidate_memory(kind=kind)
+
     return key
@@ -324,7 +324,8 @@ def _test_protocol(protocol: dict):
         cn_stats=cn_stats,
     )
     try:
-        alert_protocol.get_protocol_alerts(protocol=protocol)
+        # every variable must be evaluated to detect invalid configs
+        alert_protocol.evaluate_with_trace(protocol=protocol)
     except Exception as e:
         raise ValidationError(
             f"Gatilho possui formato inválido: {e!s}",
@@ -1,14 +1,25 @@
 """Service to analyze interactions between drugs in a prescription."""
 
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import List
 
 from sqlalchemy import text
 
-from models.enums import DrugAlertLevelEnum, DrugTypeEnum, FrequencyEnum
-from models.main import Allergy, Drug, DrugAttributes, Substance, db
+from models.enums import DrugAlertLevelEnum, FrequencyEnum
+from models.main import Allergy, Drug, Substance, db
 from models.prescription import PrescriptionDrug
-from utils import dateutils, examutils, prescriptionutils, stringutils
+from utils import (
+    dateutils,
+    examutils,
+    prescription_item,
+    prescriptionutils,
+    stringutils,
+)
+from utils.prescription_item import PrescriptionItem
+from utils.process_cache import VersionedCache
+
+# public.relacao only changes when curators edit it: keep it warm in the process
+_relation_catalog = VersionedCache(check_interval=60)
 
 
 # analyze interactions between drugs.
@@ -23,127 +34,38 @@ def find_relations(drug_list, id_patient: int, is_cpoe: bool):
 
     filtered_list = _filter_drug_list(drug_list=drug_list)
     allergies = _get_allergies(id_patient=id_patient)
-    overlap_drugs = []
 
-    for item in filtered_list:
-        prescription_drug: PrescriptionDrug = item[0]
-        drug: Drug = item[1]
-        prescription_date = item[13]
-        prescription_expire_date = item[10]
+    items = [
+        _get_interaction_item(item=item, is_cpoe=is_cpoe) for item in filtered_list
+    ]
 
-        if prescription_expire_date is None:
-            if prescription_date.date() >= datetime.now().date():
-                prescription_expire_date = prescription_date + timedelta(hours=24)
-            else:
-                prescription_expire_date = datetime.today()
-
-        for compare_item in filtered_list:
-            cp_prescription_drug: PrescriptionDrug = compare_item[0]
-            cp_drug: Drug = compare_item[1]
-            cp_prescription_date = compare_item[13]
-            cp_prescription_expire_date = compare_item[10]
-
-            if cp_prescription_expire_date is None:
-                if cp_prescription_date.date() >= datetime.now().date():
-                    cp_prescription_expire_date = cp_prescription_date + timedelta(
-                        hours=24
-                    )
-                else:
-                    cp_prescription_expire_date = datetime.today()
+    if not _has_overlap(items=items, is_cpoe=is_cpoe) and not (items and allergies):
+        return {"alerts": {}, "list": {}, "stats": {}}
 
-            if prescription_drug.id == cp_prescription_drug.id:
-                continue
+    active_relations = _get_active_relations(
+        sctids_from={i["node"]["sctid"] for i in items},
+        sctids_to={i["node"]["sctid"] for i in items} | {a["sctid"] for a in allergies},
+    )
+    related_pairs = {f"{r['sctida']}-{r['sctidb']}" for r in active_relations.values()}
 
-            if is_cpoe:
-                # period overlap
-                if not (
-                    (prescription_date.date() <= cp_prescription_expire_date.date())
-                    and (cp_prescription_date.date() <= prescription_expire_date.date())
-                ):
-                    continue
-            else:
-                # same expire date
-                if not (
-                    prescription_expire_date.date()
-                    == cp_prescription_expire_date.date()
-                ):
-                    continue
+    # only pairs with a known relation are materialized
+    overlap_drugs = []
+    items_by_sctid = _index_by_sctid(items=items)
+    for item in items:
+        drug_from = item["node"]
+        candidates = []
+        for sctid, sctid_items in items_by_sctid.items():
+            if f"{drug_from['sctid']}-{sctid}" in related_pairs:
+                candidates += _find_overlapping(
+                    item=item, sctid_items=sctid_items, is_cpoe=is_cpoe
+                )
 
-            overlap_drugs.append(
-                {
-                    "from": {
-                        "id": str(prescription_drug.id),
-                        "drug": drug.name,
-                        "sctid": drug.sctid,
-                        "intravenous": (
-                            prescription_drug.intravenous
-                            if prescription_drug.intravenous != None
-                            else False
-                        ),
-                        "group": _get_solution_group_key(
-                            pd=prescription_drug, is_cpoe=is_cpoe
-                        ),
-                        "prescriptionDate": prescription_date.isoformat(),
-                        "expireDate": prescription_expire_date.isoformat(),
-                        "frequency": prescription_drug.frequency,
-                        "rx": False,
-                        "interval": prescription_drug.interval,
-                    },
-                    "to": {
-                        "id": str(cp_prescription_drug.id),
-                        "drug": cp_drug.name,
-                        "sctid": cp_drug.sctid,
-                        "intravenous": (
-                            cp_prescription_drug.intravenous
-                            if cp_prescription_drug.intravenous != None
-                            else False
-                        ),
-                        "group": _get_solution_group_key(
-                            pd=cp_prescription_drug, is_cpoe=is_cpoe
-                        ),
-                        "prescriptionDate": cp_prescription_date.isoformat(),
-                        "expireDate": cp_prescription_expire_date.isoformat(),
-                        "frequency": cp_prescription_drug.frequency,
-                        "rx": False,
-                        "interval": cp_prescription_drug.interval,
-                    },
-                }
-            )
+        for index in sorted(candidates):
+            overlap_drugs.append({"from": drug_from, "to": items[index]["node"]})
 
         for a in allergies:
-            overlap_drugs.append(
-                {
-                    "from": {
-                        "id": str(prescription_drug.id),
-                        "drug": drug.name,
-                        "sctid": drug.sctid,
-                        "intravenous": (
-                            prescription_drug.intravenous
-                            if prescription_drug.intravenous != None
-                            else False
-                        ),
-                        "group": _get_solution_group_key(
-                            pd=prescription_drug, is_cpoe=is_cpoe
-                        ),
-                        "expireDate": prescription_expire_date.isoformat(),
-                        "frequency": prescription_drug.frequency,
-                        "rx": True,
-                        "interval": prescription_drug.interval,
-                    },
-                    "to": a,
-                }
-            )
-
-    if len(overlap_drugs) == 0:
-        return {"alerts": {}, "list": {}, "stats": {}}
-
-    uniq_overlap_keys = []
-    for d in overlap_drugs:
-        key = f"""({d["from"]["sctid"]},{d["to"]["sctid"]})"""
-        if key not in uniq_overlap_keys:
-            uniq_overlap_keys.append(key)
-
-    active_relations = _get_active_relations(uniq_overlap_keys)
+            if f"{drug_from['sctid']}-{a['sctid']}" in related_pairs:
+                overlap_drugs.append({"from": item["rx_node"], "to": a})
 
     alerts = {}
     stats = {}
@@ -280,6 +202,133 @@ def find_relations(drug_list, id_patient: int, is_cpoe: bool):
     return {"alerts": alerts, "stats": stats}
 
 
+def _get_interaction_item(item: PrescriptionItem, is_cpoe: bool) -> dict:
+    """Build the comparison data of a prescription item once"""
+    prescription_drug: PrescriptionDrug = item.prescription_drug
+    drug: Drug = item.drug
+    prescription_date = item.prescription_date
+    prescription_expire_date = item.prescription_expire
+
+    if prescription_expire_date is None:
+        if prescription_date.date() >= datetime.now().date():
+            prescription_expire_date = prescription_date + timedelta(hours=24)
+        else:
+            prescription_expire_date = datetime.today()
+
+    intravenous = (
+        prescription_drug.intravenous
+        if prescription_drug.intravenous != None
+        else False
+    )
+    group = _get_solution_group_key(pd=prescription_drug, is_cpoe=is_cpoe)
+
+    return {
+        "id": prescription_drug.id,
+        "start": prescription_date.date(),
+        "end": prescription_expire_date.date(),
+        "node": {
+            "id": str(prescription_drug.id),
+            "drug": drug.name,
+            "sctid": drug.sctid,
+            "intravenous": intravenous,
+            "group": group,
+            "prescriptionDate": prescription_date.isoformat(),
+            "expireDate": prescription_expire_date.isoformat(),
+            "frequency": prescription_drug.frequency,
+            "rx": False,
+            "interval": prescription_drug.interval,
+        },
+        "rx_node": {
+            "id": str(prescription_drug.id),
+            "drug": drug.name,
+            "sctid": drug.sctid,
+            "intravenous": intravenous,
+            "group": group,
+            "expireDate": prescription_expire_date.isoformat(),
+            "frequency": prescription_drug.frequency,
+            "rx": True,
+            "interval": prescription_drug.interval,
+        },
+    }
+
+
+def _overlaps(item: dict, compare_item: dict, is_cpoe: bool) -> bool:
+    if item["id"] == compare_item["id"]:
+        return False
+
+    if is_cpoe:
+        # period overlap
+        return (
+            item["start"] <= compare_item["end"]
+            and compare_item["start"] <= item["end"]
+        )
+
+    # same expire date
+    return item["end"] == compare_item["end"]
+
+
+def _index_by_sctid(items: list[dict]) -> dict:
+    """Item positions grouped by sctid, sorted by start date (cpoe) and by expire date"""
+    index = {}
+    for position, item in enumerate(items):
+        index.setdefault(str(item["node"]["sctid"]), []).append(position)
+
+    return {
+        sctid: {
+            "items": items,
+            "by_start": sorted(positions, key=lambda p: items[p]["start"]),
+            "starts": sorted(items[p]["start"] for p in positions),
+            "by_end": _group_by(positions, key=lambda p: items[p]["end"]),
+        }
+        for sctid, positions in index.items()
+    }
+
+
+def _group_by(positions: list[int], key) -> dict:
+    groups = {}
+    for p in positions:
+        groups.setdefault(key(p), []).append(p)
+
+    return groups
+
+
+def _find_overlapping(item: dict, sctid_items: dict, is_cpoe: bool) -> list[int]:
+    """Positions of the items of one substance that overlap the given item"""
+    items = sctid_items["items"]
+
+    if is_cpoe:
+        # candidates must start before the item ends
+        last = bisect_right(sctid_items["starts"], item["end"])
+        candidates = sctid_items["by_start"][:last]
+    else:
+        candidates = sctid_items["by_end"].get(item["end"], [])
+
+    return [p for p in candidates if _overlaps(item, items[p], is_cpoe=is_cpoe)]
+
+
+def _has_overlap(items: list[dict], is_cpoe: bool) -> bool:
+    """Check if at least one pair of items overlaps (sweep by start date)"""
+    if not is_cpoe:
+        ends = {}
+        for item in items:
+            ends.setdefault(item["end"], set()).add(item["id"])
+            if len(ends[item["end"]]) > 1:
+                return True
+
+        return False
+
+    ordered = sorted(items, key=lambda i: i["start"])
+    for position, item in enumerate(ordered):
+        for compare_item in ordered[position + 1 :]:
+            if compare_item["start"] > item["end"]:
+                break
+
+            if _overlaps(item, compare_item, is_cpoe=True):
+                return True
+
+    return False
+
+
 def _has_interval_intersection(interval1: str, interval2: str) -> bool:
     """check if there is an intersection between intervals"""
     if not interval1 or not interval2:
@@ -303,38 +352,9 @@ def _has_interval_intersection(interval1: str, interval2: str) -> bool:
     return False
 
 
-def _filter_drug_list(drug_list):
-    filtered_list = []
-    valid_sources = [
-        DrugTypeEnum.DRUG.value,
-        DrugTypeEnum.SOLUTION.value,
-        DrugTypeEnum.PROCEDURE.value,
-    ]
-
-    for item in drug_list:
-        prescription_drug: PrescriptionDrug = item[0]
-        drug_attributes: DrugAttributes = item[6]
-        drug: Drug = item[1]
-
-        if prescription_drug.source not in valid_sources:
-            continue
-
-        if prescription_drug.suspendedDate != None:
-            continue
-
-        if drug == None or drug.sctid == None:
-            continue
-
-        if (
-            drug_attributes != None
-            and drug_attributes.whiteList
-            and not prescription_drug.source == DrugTypeEnum.SOLUTION.value
-        ):
-            continue
-
-        filtered_list.append(item)
-
-    return filtered_list
+def _filter_drug_list(drug_list) -> list[PrescriptionItem]:
+    """Active drugs, solutions and procedures with a substance (see PrescriptionItem)"""
+    return prescription_item.to_items(drug_list).interaction_items
 
 
 def _get_solution_group_key(pd: PrescriptionDrug, is_cpoe: bool):
@@ -379,12 +399,55 @@ def _get_allergies(id_patient: int):
     return results
 
 
-def _get_active_relations(uniq_overlap_keys: List[str]):
+def _get_active_relations(sctids_from: set, sctids_to: set):
+    """Active relations between the given substances (from the process catalog)"""
+    catalog = _relation_catalog.get(
+        key="relations",
+        load=_load_relation_catalog,
+        version=_get_relation_catalog_version,
+    )
+    sctids_to = {int(sctid) for sctid in sctids_to}
+    active_relations = {}
+
+    for sctida in sctids_from:
+        for sctidb, relations in catalog.get(int(sctida), {}).items():
+            if sctidb not in sctids_to:
+                continue
+
+            for kind, relation_text, level in relations:
+                key = f"{sctida}-{sctidb}-{kind}"
+                active_relations[key] = {
+                    "sctida": int(sctida),
+                    "sctidb": sctidb,
+                    "kind": kind,
+                    "text": relation_text,
+                    "level": level,
+                }
+
+    return active_relations
+
+
+def _get_relation_catalog_version():
+    """Cheap stamp that changes whenever a relation is edited, (de)activated or removed"""
+    return tuple(
+        db.session.execute(
+            text(
+                """
+                select
+                    count(*) filter (where r.ativo = true),
+                    max(r.update_at)
+                from
+                    public.relacao r
+                """
+            )
+        ).one()
+    )
+
+
+def _load_relation_catalog() -> dict:
+    """Active relations indexed by sctida -> sctidb -> ((kind, text, level), ...)"""
     query = text(
-        f"""
-        with cruzamento as (
-            select * from (values {",".join(uniq_overlap_keys)}) AS t (sctida, sctidb)
-        )
+        """
         select
             r.sctida,
             r.sctidb,
@@ -393,21 +456,16 @@ def _get_active_relations(uniq_overlap_keys: List[str]):
             r.nivel as "level"
         from
             public.relacao r
-            inner join cruzamento c on (r.sctida = c.sctida and r.sctidb = c.sctidb)
         where
-	        r.ativo = true
+            r.ativo = true
     """
     )
-    active_relations = {}
 
+    catalog = {}
     for item in db.session.execute(query).all():
-        key = f"{item.sctida}-{item.sctidb}-{item.kind}"
-        active_relations[key] = {
-            "sctida": item.sctida,
-            "sctidb": item.sctidb,
-            "kind": item.kind,
-            "text": item.text,
-            "level": item.level,
-        }
+        partners = catalog.setdefault(item.sctida, {})
+        partners[item.sctidb] = partners.get(item.sctidb, ()) + (
+            (item.kind, item.text, item.level),
+        )
 
-    return active_relations
+    return catalog
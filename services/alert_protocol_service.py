@@ -9,6 +9,7 @@ from models.prescription import Patient, Prescription
 from repository import protocol_repository
 from services import segment_service
 from utils.alert_protocol import AlertProtocol, ProtocolExtraInfo
+from utils.alert_protocol_compiler import compile_protocol, get_index_key
 
 
 @has_permission(Permission.READ_PRESCRIPTION)
@@ -46,10 +47,21 @@ def find_protocols(
         drug_list=drug_list, prescription=prescription
     )
 
+    always_evaluated, protocols_by_key = _index_protocols(protocols)
+
     # protocols must be applied inside each date group
     for expire_date, drugs in drugs_by_expire_date.items():
         results[expire_date] = []
 
+        candidates = _get_candidate_protocols(
+            protocols=protocols,
+            always_evaluated=always_evaluated,
+            protocols_by_key=protocols_by_key,
+            drugs=drugs,
+        )
+        if not candidates:
+            continue
+
         alert_protocol = AlertProtocol(
             drugs=drugs,
             exams=exams,
@@ -59,8 +71,10 @@ def find_protocols(
             protocol_extra_info=protocol_extra_info,
         )
 
-        for protocol in protocols:
-            alert = alert_protocol.get_protocol_alerts(protocol=protocol.config)
+        for protocol in candidates:
+            alert = alert_protocol.get_protocol_alerts(
+                protocol=protocol.config, cache_key=_get_cache_key(protocol)
+            )
             if alert:
                 alert["id"] = protocol.id
                 if protocol.protocol_type == ProtocolTypeEnum.PRESCRIPTION_ITEM.value:
@@ -97,3 +111,59 @@ def split_drugs_by_date(drug_list: dict, prescription: Prescription):
             expire_dates[group_key] = [item]
 
     return expire_dates
+
+
+def _get_cache_key(protocol):
+    # edits always set updated_at, inserts only created_at
+    version = protocol.updated_at or protocol.created_at
+    if version is None:
+        return None
+
+    return (protocol.id, version)
+
+
+def _index_protocols(protocols) -> tuple[set, dict]:
+    """Splits protocols into always evaluated and indexed by the substance, class
+    or idDrug values they need to fire"""
+    always_evaluated = set()
+    protocols_by_key = {}
+
+    for protocol in protocols:
+        try:
+            compiled = compile_protocol(
+                protocol=protocol.config, cache_key=_get_cache_key(protocol)
+            )
+        except Exception:
+            # invalid configs are evaluated (and raise) as before
+            always_evaluated.add(protocol.id)
+            continue
+
+        if compiled.required_keys is None:
+            always_evaluated.add(protocol.id)
+            continue
+
+        for key in compiled.required_keys:
+            protocols_by_key.setdefault(key, set()).add(protocol.id)
+
+    return always_evaluated, protocols_by_key
+
+
+def _get_candidate_protocols(
+    protocols, always_evaluated: set, protocols_by_key: dict, drugs: list
+) -> list:
+    """Protocols that can fire for the drug group (keeps the original order)"""
+    candidate_ids = set(always_evaluated)
+
+    for item in drugs:
+        prescription_drug = item.prescription_drug
+        substance = item.substance
+
+        keys = [get_index_key("idDrug", prescription_drug.idDrug)]
+        if substance:
+            keys.append(get_index_key("substance", substance.id))
+            keys.append(get_index_key("class", substance.idclass))
+
+        for key in keys:
+            candidate_ids.update(protocols_by_key.get(key, ()))
+
+    return [p for p in protocols if p.id in candidate_ids]
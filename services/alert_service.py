@@ -1,13 +1,19 @@
 """Service: module for drug alerts"""
 
-import re
 from typing import List, Union
 
 from models.appendix import Frequency
-from models.enums import DrugAlertLevelEnum, DrugAlertTypeEnum, DrugTypeEnum
+from models.enums import DrugAlertLevelEnum, DrugAlertTypeEnum
 from models.main import Drug, DrugAttributes
 from models.prescription import PrescriptionDrug
-from utils import numberutils, prescriptionutils, stringutils
+from utils import (
+    alert_texts,
+    numberutils,
+    prescription_item,
+    prescriptionutils,
+    stringutils,
+)
+from utils.prescription_item import PrescriptionItem
 
 
 def find_alerts(
@@ -25,7 +31,10 @@ def find_alerts(
     Find alerts for a list of drugs
     :param drug_list: list of drugs"""
     filtered_list = _filter_drug_list(drug_list=drug_list)
-    dose_total = _get_dose_total(drug_list=filtered_list, exams=exams)
+    columns = _DrugColumns(drug_list=filtered_list)
+    dose_total = _get_dose_total(
+        drug_list=filtered_list, exams=exams, dose_conv_list=columns.dose_conv
+    )
     alerts = {}
     stats = _get_empty_stats()
 
@@ -33,9 +42,6 @@ def find_alerts(
         if a != None:
             key = a["idPrescriptionDrug"]
             stats[a["type"]] += 1
-            a["text"] = re.sub(" {2,}", "", a["text"])
-            a["text"] = re.sub("\n", "", a["text"])
-
             a["handling"] = a["type"] in handling_types
 
             if key not in alerts:
@@ -43,162 +49,347 @@ def find_alerts(
             else:
                 alerts[key].append(a)
 
-    for item in filtered_list:
-        prescription_drug: PrescriptionDrug = item[0]
-        drug: Drug = item[1]
-        measure_unit_convert_factor = (
-            item.measure_unit_convert_factor
-            if item.measure_unit_convert_factor != None
-            else 1
-        )
-        drug_attributes: DrugAttributes = item[6]
-        prescription_expire_date = item[10]
-        frequency = item[3]
+    # threshold checks for all items at once: (check, render) in the alert order,
+    # render is called only for the items the check flags
+    checks = _get_alert_checks(
+        columns=columns,
+        exams=exams,
+        dialysis=dialisys,
+        pregnant=pregnant,
+        lactating=lactating,
+        protocols=protocols,
+        dose_total=dose_total,
+    )
+    renders = {
+        DrugAlertTypeEnum.PROTOCOL: lambda i: _alert_protocol(
+            prescription_drug=columns.prescription_drugs[i], protocols=protocols
+        ),
+        DrugAlertTypeEnum.KIDNEY: lambda i: _alert_kidney(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+            dialysis=dialisys,
+        ),
+        DrugAlertTypeEnum.LIVER: lambda i: _alert_liver(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+        ),
+        DrugAlertTypeEnum.PLATELETS: lambda i: _alert_platelets(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+        ),
+        DrugAlertTypeEnum.ELDERLY: lambda i: _alert_elderly(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+        ),
+        DrugAlertTypeEnum.TUBE: lambda i: _alert_tube(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+        ),
+        DrugAlertTypeEnum.ALLERGY: lambda i: _alert_allergy(
+            prescription_drug=columns.prescription_drugs[i]
+        ),
+        DrugAlertTypeEnum.MAX_TIME: lambda i: _alert_max_time(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            is_cpoe=is_cpoe,
+            cpoe_period=filtered_list[i].period_cpoe,
+        ),
+        DrugAlertTypeEnum.MAX_DOSE: lambda i: _alert_max_dose(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+            measure_unit_convert_factor=columns.convert_factors[i],
+        ),
+        DrugAlertTypeEnum.MAX_DOSE_PLUS: lambda i: _alert_max_dose_total(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            exams=exams,
+            prescription_expire_date=filtered_list[i].prescription_expire,
+            dose_total=dose_total,
+        ),
+        DrugAlertTypeEnum.IRA: lambda i: _alert_ira(
+            prescription_drug=columns.prescription_drugs[i],
+            drug=filtered_list[i].drug,
+            exams=exams,
+            prescription_expire_date=filtered_list[i].prescription_expire,
+            dose_total=dose_total,
+            dialysis=dialisys,
+            cn_data=cn_data,
+        ),
+        DrugAlertTypeEnum.PREGNANT: lambda i: _alert_pregnant(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            pregnant=pregnant,
+        ),
+        DrugAlertTypeEnum.LACTATING: lambda i: _alert_lactating(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            lactating=lactating,
+        ),
+        DrugAlertTypeEnum.FASTING: lambda i: _alert_fasting(
+            prescription_drug=columns.prescription_drugs[i],
+            drug_attributes=columns.drug_attributes[i],
+            frequency=filtered_list[i].frequency,
+            schedules_fasting=schedules_fasting,
+        ),
+    }
+    for i, item in enumerate(filtered_list):
         handling_types = item.substance_handling_types
-        cpoe_period = item[12]
 
-        if protocols:
-            add_alert(
-                _alert_protocol(
-                    prescription_drug=prescription_drug, protocols=protocols
+        for alert_type, flags in checks:
+            if flags[i]:
+                add_alert(
+                    renders[alert_type](i),
+                    handling_types=(
+                        []
+                        if alert_type == DrugAlertTypeEnum.PROTOCOL
+                        else handling_types
+                    ),
                 )
+
+    return {"alerts": alerts, "stats": stats}
+
+
+class _DrugColumns:
+    """Attributes of the filtered drug list, one list per attribute (same order)"""
+
+    __slots__ = (
+        "drug_list",
+        "prescription_drugs",
+        "drug_attributes",
+        "convert_factors",
+        "dose_conv",
+        "dose_keys",
+    )
+
+    def __init__(self, drug_list):
+        self.drug_list = drug_list
+        self.prescription_drugs = [item.prescription_drug for item in drug_list]
+        self.drug_attributes = [item.drug_attributes for item in drug_list]
+        self.convert_factors = [item.convert_factor for item in drug_list]
+        self.dose_conv = [
+            _get_dose_conv(
+                prescription_drug=pd,
+                drug_attributes=da,
+                measure_unit_convert_factor=factor,
             )
+            for pd, da, factor in zip(
+                self.prescription_drugs, self.drug_attributes, self.convert_factors
+            )
+        ]
+        # drug and expire day: the key of the summed doses (see _get_dose_total)
+        self.dose_keys = [
+            str(item.prescription_drug.idDrug) + "_" + str(item.expire_day)
+            for item in drug_list
+        ]
 
-        # kidney alert
-        add_alert(
-            _alert_kidney(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-                dialysis=dialisys,
-            ),
-            handling_types=handling_types,
-        )
 
-        # liver alert
-        add_alert(
-            _alert_liver(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-            ),
-            handling_types=handling_types,
-        )
+def _get_alert_checks(
+    columns: _DrugColumns,
+    exams: dict,
+    dialysis: str,
+    pregnant: bool,
+    lactating: bool,
+    protocols: Union[List[dict], None],
+    dose_total: dict,
+):
+    """Flag, for each alert type, the items that might fire it
 
-        # platelets
-        add_alert(
-            _alert_platelets(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-            ),
-            handling_types=handling_types,
+    Patient values (exams, dialysis, pregnancy) are resolved once and compared with
+    the item columns. A flag is a necessary condition of its _alert_* function,
+    which still renders (and confirms) the alert.
+    """
+    prescription_drugs = columns.prescription_drugs
+    drug_attributes = columns.drug_attributes
+    checks = []
+
+    if protocols:
+        related_items = set()
+        for p in protocols:
+            related_items.update(p.get("related_items", []))
+
+        checks.append(
+            (
+                DrugAlertTypeEnum.PROTOCOL,
+                [pd.id in related_items for pd in prescription_drugs],
+            )
         )
 
-        # elderly
-        add_alert(
-            _alert_elderly(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-            ),
-            handling_types=handling_types,
+    kidney_limit = None
+    liver_limit = None
+    platelets_limit = None
+    is_elderly = False
+    if exams:
+        if dialysis in ["c", "x", "v", "p"] or "age" not in exams:
+            # always flagged (without age, the _alert_* function decides)
+            kidney_limit = float("-inf")
+        elif exams["age"] > 17:
+            kidney_limit = _get_ckd_value(exams=exams) or None
+        else:
+            kidney_values = [
+                exams[k]["value"] for k in ["swrtz2", "swrtz1"] if k in exams
+            ]
+            kidney_limit = min([v for v in kidney_values if v], default=None)
+
+        liver_limit = max(
+            float(exams[k]["value"]) if k in exams and exams[k]["value"] else 0
+            for k in ["tgp", "tgo"]
         )
-
-        # tube
-        add_alert(
-            _alert_tube(
-                prescription_drug=prescription_drug, drug_attributes=drug_attributes
-            ),
-            handling_types=handling_types,
+        if "plqt" in exams and exams["plqt"]["value"]:
+            platelets_limit = exams["plqt"]["value"]
+        is_elderly = "age" not in exams or exams["age"] > 60
+
+    checks.append(
+        (
+            DrugAlertTypeEnum.KIDNEY,
+            [
+                bool(da and da.kidney)
+                and kidney_limit is not None
+                and da.kidney > kidney_limit
+                for da in drug_attributes
+            ],
         )
-
-        # allergy
-        add_alert(
-            _alert_allergy(prescription_drug=prescription_drug),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.LIVER,
+            [
+                bool(da and da.liver)
+                and liver_limit is not None
+                and liver_limit > da.liver
+                for da in drug_attributes
+            ],
         )
-
-        # maximum treatment period
-        add_alert(
-            _alert_max_time(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                is_cpoe=is_cpoe,
-                cpoe_period=cpoe_period,
-            ),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.PLATELETS,
+            [
+                bool(da and da.platelets)
+                and platelets_limit is not None
+                and da.platelets > platelets_limit
+                for da in drug_attributes
+            ],
         )
-
-        # max dose
-        add_alert(
-            _alert_max_dose(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-                measure_unit_convert_factor=measure_unit_convert_factor,
-            ),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.ELDERLY,
+            [is_elderly and bool(da and da.elderly) for da in drug_attributes],
         )
-
-        # max dose total
-        add_alert(
-            _alert_max_dose_total(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                exams=exams,
-                prescription_expire_date=prescription_expire_date,
-                dose_total=dose_total,
-            ),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.TUBE,
+            [
+                bool(da and da.tube and pd.tube)
+                for pd, da in zip(prescription_drugs, drug_attributes)
+            ],
         )
-
-        # IRA
-        add_alert(
-            _alert_ira(
-                prescription_drug=prescription_drug,
-                drug=drug,
-                exams=exams,
-                prescription_expire_date=prescription_expire_date,
-                dose_total=dose_total,
-                dialysis=dialisys,
-                cn_data=cn_data,
-            ),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.ALLERGY,
+            [pd.allergy == "S" for pd in prescription_drugs],
         )
-
-        # pregnant
-        add_alert(
-            _alert_pregnant(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                pregnant=pregnant,
-            ),
-            handling_types=handling_types,
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.MAX_TIME,
+            [bool(da and da.maxTime) for da in drug_attributes],
         )
+    )
 
-        # lactating
-        add_alert(
-            _alert_lactating(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                lactating=lactating,
-            ),
-            handling_types=handling_types,
+    by_weight = [
+        bool(da and da.maxDose and da.useWeight and pd.dose)
+        for pd, da in zip(prescription_drugs, drug_attributes)
+    ]
+    weight = 1
+    if any(by_weight):
+        # only read when some item doses by kg (as in _alert_max_dose)
+        weight = numberutils.none2zero(exams["weight"])
+        weight = weight if weight > 0 else 1
+    checks.append(
+        (
+            DrugAlertTypeEnum.MAX_DOSE,
+            [
+                bool(da and da.maxDose)
+                and da.maxDose
+                < (round(dose_conv / float(weight), 2) if kg else dose_conv)
+                for da, dose_conv, kg in zip(
+                    drug_attributes, columns.dose_conv, by_weight
+                )
+            ],
         )
+    )
 
-        # fasting
-        add_alert(
-            _alert_fasting(
-                prescription_drug=prescription_drug,
-                drug_attributes=drug_attributes,
-                frequency=frequency,
-                schedules_fasting=schedules_fasting,
-            ),
-            handling_types=handling_types,
+    checks.append(
+        (
+            DrugAlertTypeEnum.MAX_DOSE_PLUS,
+            [
+                bool(da and da.maxDose)
+                and _get_summed_dose(
+                    dose_total=dose_total,
+                    key=f"{dose_key}kg" if da.useWeight and pd.dose else dose_key,
+                )
+                > da.maxDose
+                for pd, da, dose_key in zip(
+                    prescription_drugs, drug_attributes, columns.dose_keys
+                )
+            ],
         )
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.IRA,
+            [
+                bool(item.drug and "vanco" in item.drug.name.lower())
+                for item in columns.drug_list
+            ],
+        )
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.PREGNANT,
+            [
+                bool(pregnant and da != None and da.pregnant in ["D", "X"])
+                for da in drug_attributes
+            ],
+        )
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.LACTATING,
+            [
+                bool(lactating and da != None and da.lactating in ["2", "3"])
+                for da in drug_attributes
+            ],
+        )
+    )
+    checks.append(
+        (
+            DrugAlertTypeEnum.FASTING,
+            [
+                bool(da and da.fasting and item.frequency)
+                for item, da in zip(columns.drug_list, drug_attributes)
+            ],
+        )
+    )
+
+    return checks
 
-    return {"alerts": alerts, "stats": stats}
+
+def _get_summed_dose(dose_total: dict, key: str):
+    """Summed dose of the key when more than one item was summed, otherwise 0"""
+    total = dose_total.get(key)
+    if total is None or total["count"] <= 1:
+        return 0
+
+    return numberutils.none2zero(total["value"])
 
 
 def _get_empty_stats():
@@ -252,23 +443,26 @@ def _get_dose_conv(
     )
 
 
-def _get_dose_total(drug_list, exams: dict):
+def _get_dose_total(drug_list, exams: dict, dose_conv_list: list = None):
     dose_total = {}
-    for item in drug_list:
+    for index, item in enumerate(drug_list):
         prescription_drug: PrescriptionDrug = item[0]
         drug_attributes: DrugAttributes = item[6]
         prescription_expire_date = item[10]
         expireDay = prescription_expire_date.day if prescription_expire_date else 0
-        measure_unit_convert_factor = (
-            item.measure_unit_convert_factor
-            if item.measure_unit_convert_factor != None
-            else 1
-        )
-        pd_dose_conv = _get_dose_conv(
-            prescription_drug=prescription_drug,
-            drug_attributes=drug_attributes,
-            measure_unit_convert_factor=measure_unit_convert_factor,
-        )
+        if dose_conv_list is not None:
+            pd_dose_conv = dose_conv_list[index]
+        else:
+            measure_unit_convert_factor = (
+                item.measure_unit_convert_factor
+                if item.measure_unit_convert_factor != None
+                else 1
+            )
+            pd_dose_conv = _get_dose_conv(
+                prescription_drug=prescription_drug,
+                drug_attributes=drug_attributes,
+                measure_unit_convert_factor=measure_unit_convert_factor,
+            )
 
         if prescription_drug.frequency in [66]:
             # do not sum some types of frequency
@@ -336,11 +530,7 @@ def _alert_ira(
             maxira = 0.6219
 
             if ira > maxira and dialysis is None and dialysis_ia_count == 0:
-                alert["text"] = """
-                    Risco de desenvolvimento de Insuficiência Renal Aguda (IRA), já que o resultado do cálculo
-                    [dose diária de VANCOMICINA/TFG/peso] é superior a 0,6219. Caso o paciente esteja em diálise,
-                    desconsiderar. <a href="https://revista.ghc.com.br/index.php/cadernosdeensinoepesquisa/issue/view/3" target="_blank">Referência: CaEPS</a>
-                """
+                alert["text"] = alert_texts.render(DrugAlertTypeEnum.IRA, "vancomycin")
 
                 return alert
 
@@ -375,26 +565,29 @@ def _alert_max_dose(
 
         if drug_attributes.maxDose and drug_attributes.maxDose < doseWeight:
             if numberutils.none2zero(exams["weight"]) == 0:
-                alert["text"] = (
-                    "A dose máxima registrada é por kg, mas o peso do paciente não está disponível. Favor preencher manualmente o peso."
+                alert["text"] = alert_texts.render(
+                    DrugAlertTypeEnum.MAX_DOSE, "missing_weight"
                 )
             else:
-                alert["text"] = f"""
-                    Dose diária prescrita ({stringutils.strFormatBR(doseWeight)} {str(drug_attributes.idMeasureUnit)}/Kg)
-                     maior que a dose de alerta
-                    ({stringutils.strFormatBR(drug_attributes.maxDose)} {str(drug_attributes.idMeasureUnit)}/Kg)
-                     usualmente recomendada (considerada a dose diária independente da indicação).
-                """
+                alert["text"] = alert_texts.render(
+                    DrugAlertTypeEnum.MAX_DOSE,
+                    "dose_weight",
+                    dose=stringutils.strFormatBR(doseWeight),
+                    max_dose=stringutils.strFormatBR(drug_attributes.maxDose),
+                    unit=drug_attributes.idMeasureUnit,
+                )
 
             return alert
 
     else:
         if drug_attributes.maxDose and drug_attributes.maxDose < pd_dose_conv:
-            alert["text"] = f"""
-                Dose diária prescrita ({str(pd_dose_conv)} {str(drug_attributes.idMeasureUnit)})
-                 maior que a dose de alerta ({str(drug_attributes.maxDose)} {str(drug_attributes.idMeasureUnit)})
-                 usualmente recomendada (considerada a dose diária independente da indicação).
-            """
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.MAX_DOSE,
+                "dose",
+                dose=pd_dose_conv,
+                max_dose=drug_attributes.maxDose,
+                unit=drug_attributes.idMeasureUnit,
+            )
 
             return alert
 
@@ -434,17 +627,17 @@ def _alert_max_dose_total(
             < numberutils.none2zero(dose_total[idDrugAggWeight]["value"])
         ):
             if numberutils.none2zero(exams["weight"]) == 0:
-                alert["text"] = (
-                    "A dose máxima registrada é por kg, mas o peso do paciente não está disponível. Favor preencher manualmente o peso."
+                alert["text"] = alert_texts.render(
+                    DrugAlertTypeEnum.MAX_DOSE_PLUS, "missing_weight"
                 )
             else:
-                alert["text"] = f"""
-                    Dose diária prescrita SOMADA (
-                    {str(dose_total[idDrugAggWeight]["value"])} {str(drug_attributes.idMeasureUnit)}/Kg) maior
-                    que a dose de alerta (
-                    {str(drug_attributes.maxDose)} {str(drug_attributes.idMeasureUnit)}/Kg)
-                    usualmente recomendada (Frequência "AGORA" não é considerada no cálculo)."
-                """
+                alert["text"] = alert_texts.render(
+                    DrugAlertTypeEnum.MAX_DOSE_PLUS,
+                    "dose_weight",
+                    dose=dose_total[idDrugAggWeight]["value"],
+                    max_dose=drug_attributes.maxDose,
+                    unit=drug_attributes.idMeasureUnit,
+                )
 
             return alert
 
@@ -456,12 +649,13 @@ def _alert_max_dose_total(
             and drug_attributes.maxDose
             < numberutils.none2zero(dose_total[idDrugAgg]["value"])
         ):
-            alert["text"] = f"""
-                Dose diária prescrita SOMADA (
-                {str(dose_total[idDrugAgg]["value"])} {str(drug_attributes.idMeasureUnit)}) maior que a
-                dose de alerta ({str(drug_attributes.maxDose)} {str(drug_attributes.idMeasureUnit)})
-                usualmente recomendada (Frequência "AGORA" não é considerada no cálculo).
-            """
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.MAX_DOSE_PLUS,
+                "dose",
+                dose=dose_total[idDrugAgg]["value"],
+                max_dose=drug_attributes.maxDose,
+                unit=drug_attributes.idMeasureUnit,
+            )
 
             return alert
 
@@ -492,10 +686,12 @@ def _alert_max_time(
         and total_period
         and total_period > drug_attributes.maxTime
     ):
-        alert["text"] = f"""
-          Tempo de tratamento atual ({int(total_period)} dias) maior que o tempo máximo de tratamento (
-          {str(drug_attributes.maxTime)} dias) usualmente recomendado.
-        """
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.MAX_TIME,
+            "max_time",
+            period=int(total_period),
+            max_time=drug_attributes.maxTime,
+        )
 
         return alert
 
@@ -515,8 +711,10 @@ def _alert_pregnant(
 
     if pregnant and drug_attributes != None:
         if drug_attributes.pregnant == "D" or drug_attributes.pregnant == "X":
-            alert["text"] = (
-                f"Paciente gestante com medicamento classificado como {drug_attributes.pregnant} prescrito. Avaliar manutenção deste medicamento com a equipe médica."
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.PREGNANT,
+                "pregnant",
+                classification=drug_attributes.pregnant,
             )
             alert["level"] = (
                 DrugAlertLevelEnum.HIGH.value
@@ -543,18 +741,12 @@ def _alert_lactating(
     )
 
     if lactating and drug_attributes != None and drug_attributes.lactating == "3":
-        alert[
-            "text"
-        ] = """Paciente amamentando com medicamento classificado como Alto risco prescrito.
-            Avaliar manutenção deste medicamento com a equipe médica ou cessação da amamentação."""
+        alert["text"] = alert_texts.render(DrugAlertTypeEnum.LACTATING, "high_risk")
 
         return alert
 
     if lactating and drug_attributes != None and drug_attributes.lactating == "2":
-        alert[
-            "text"
-        ] = """Paciente amamentando com medicamento classificado como Médio Risco prescrito.
-            Avaliar manutenção deste medicamento com a equipe médica ou cessação da amamentação."""
+        alert["text"] = alert_texts.render(DrugAlertTypeEnum.LACTATING, "medium_risk")
         alert["level"] = DrugAlertLevelEnum.LOW.value
 
         return alert
@@ -572,7 +764,7 @@ def _alert_allergy(prescription_drug: PrescriptionDrug):
     )
 
     if prescription_drug.allergy == "S":
-        alert["text"] = "Paciente alérgico a este medicamento."
+        alert["text"] = alert_texts.render(DrugAlertTypeEnum.ALLERGY, "allergy")
 
         return alert
 
@@ -589,8 +781,10 @@ def _alert_tube(prescription_drug: PrescriptionDrug, drug_attributes: DrugAttrib
     )
 
     if drug_attributes and drug_attributes.tube and prescription_drug.tube:
-        alert["text"] = (
-            f"""Medicamento contraindicado via sonda ({stringutils.strNone(prescription_drug.route)})"""
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.TUBE,
+            "tube",
+            route=stringutils.strNone(prescription_drug.route),
         )
 
         return alert
@@ -613,9 +807,7 @@ def _alert_elderly(
     )
 
     if drug_attributes.elderly and exams["age"] > 60:
-        alert["text"] = """
-            Medicamento potencialmente inapropriado para idosos, independente das comorbidades do paciente.
-        """
+        alert["text"] = alert_texts.render(DrugAlertTypeEnum.ELDERLY, "elderly")
 
         return alert
 
@@ -651,9 +843,7 @@ def _alert_fasting(
         ):
             return None
 
-        alert["text"] = """
-            O medicamento deve ser administrado em jejum, verificar horários de administração.
-        """
+        alert["text"] = alert_texts.render(DrugAlertTypeEnum.FASTING, "fasting")
 
         return alert
 
@@ -682,10 +872,12 @@ def _alert_platelets(
         and exams["plqt"]["value"]
         and drug_attributes.platelets > exams["plqt"]["value"]
     ):
-        alert["text"] = f"""
-            Medicamento contraindicado para paciente com plaquetas ({str(exams["plqt"]["value"])} plaquetas/µL)
-            abaixo de {str(drug_attributes.platelets)} plaquetas/µL.
-        """
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.PLATELETS,
+            "platelets",
+            value=exams["plqt"]["value"],
+            platelets=drug_attributes.platelets,
+        )
 
         return alert
 
@@ -720,10 +912,12 @@ def _alert_liver(
         exam_name = "TGP" if tgp > tgo else "TGO"
         exam_value = tgp if tgp > tgo else tgo
 
-        alert["text"] = f"""
-            Avaliar se o medicamento já está com o ajuste adequado conforme a função hepática ou suspenso no caso de contraindicação, já que o paciente apresenta transaminase alterada. <br/>
-            ({exam_name} {stringutils.strFormatBR(exam_value)} U/L).
-        """
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.LIVER,
+            "transaminase",
+            exam_name=exam_name,
+            exam_value=stringutils.strFormatBR(exam_value),
+        )
 
         return alert
 
@@ -751,37 +945,39 @@ def _alert_kidney(
     )
 
     if dialysis == "c":
-        alert["text"] = (
-            "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o paciente está em diálise contínua."
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.KIDNEY, "dialysis_continuous"
         )
 
         return alert
 
     if dialysis == "x":
-        alert["text"] = (
-            "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o paciente está em diálise estendida, também conhecida como SLED."
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.KIDNEY, "dialysis_extended"
         )
         return alert
 
     if dialysis == "v":
-        alert["text"] = (
-            "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o paciente está em diálise intermitente."
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.KIDNEY, "dialysis_intermittent"
         )
         return alert
 
     if dialysis == "p":
-        alert["text"] = (
-            "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o paciente está em diálise peritoneal."
+        alert["text"] = alert_texts.render(
+            DrugAlertTypeEnum.KIDNEY, "dialysis_peritoneal"
         )
         return alert
 
     if exams["age"] > 17:
         ckd_value = _get_ckd_value(exams=exams)
         if ckd_value and drug_attributes.kidney > ckd_value:
-            alert["text"] = f"""
-                Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente (
-                {str(ckd_value)} mL/min) está abaixo de {str(drug_attributes.kidney)} mL/min.
-            """
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.KIDNEY,
+                "ckd",
+                ckd=ckd_value,
+                kidney=drug_attributes.kidney,
+            )
             return alert
 
         # avaliando necessidade deste alerta
@@ -796,11 +992,12 @@ def _alert_kidney(
             and exams["swrtz2"]["value"]
             and drug_attributes.kidney > exams["swrtz2"]["value"]
         ):
-            alert["text"] = f"""
-                Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente
-                ({str(exams["swrtz2"]["value"])} mL/min/1.73m²) está abaixo de
-                {str(drug_attributes.kidney)} mL/min. (Schwartz 2)
-            """
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.KIDNEY,
+                "schwartz2",
+                value=exams["swrtz2"]["value"],
+                kidney=drug_attributes.kidney,
+            )
             return alert
 
         if (
@@ -808,36 +1005,20 @@ def _alert_kidney(
             and exams["swrtz1"]["value"]
             and drug_attributes.kidney > exams["swrtz1"]["value"]
         ):
-            alert["text"] = f"""
-                Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente
-                ({str(exams["swrtz1"]["value"])} mL/min/1.73m²) está abaixo de {str(drug_attributes.kidney)}
-                mL/min. (Schwartz 1)
-            """
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.KIDNEY,
+                "schwartz1",
+                value=exams["swrtz1"]["value"],
+                kidney=drug_attributes.kidney,
+            )
             return alert
 
     return None
 
 
-def _filter_drug_list(drug_list):
-    filtered_list = []
-    valid_sources = [
-        DrugTypeEnum.DRUG.value,
-        DrugTypeEnum.SOLUTION.value,
-        DrugTypeEnum.PROCEDURE.value,
-    ]
-
-    for item in drug_list:
-        prescription_drug: PrescriptionDrug = item[0]
-
-        if prescription_drug.source not in valid_sources:
-            continue
-
-        if prescription_drug.suspendedDate is not None:
-            continue
-
-        filtered_list.append(item)
-
-    return filtered_list
+def _filter_drug_list(drug_list) -> list[PrescriptionItem]:
+    """Active drugs, solutions and procedures"""
+    return prescription_item.to_items(drug_list).alert_items
 
 
 def _get_ckd_value(exams: dict):
@@ -862,7 +1043,11 @@ def _alert_protocol(prescription_drug: PrescriptionDrug, protocols: List[dict]):
     for p in protocols:
         related_items = p.get("related_items", [])
         if prescription_drug.id in related_items:
-            alert["text"] = stringutils.text_to_html(p.get("message", ""))
+            alert["text"] = alert_texts.render(
+                DrugAlertTypeEnum.PROTOCOL,
+                "message",
+                message=stringutils.text_to_html(p.get("message", "")),
+            )
             alert["level"] = p.get("level", "low")
 
             return alert
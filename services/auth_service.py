@@ -13,7 +13,7 @@ from flask_jwt_extended import (
 )
 from flask_sqlalchemy.session import Session
 from markupsafe import escape as escape_html
-from sqlalchemy import asc, text
+from sqlalchemy import asc, event
 from sqlalchemy.orm import make_transient
 
 from config import Config
@@ -37,9 +37,17 @@ from repository import (
     user_repository,
 )
 from security.role import Role
-from services import memory_service, training_service, user_service
+from services import memory_service, schema_service, training_service, user_service
 from services.admin import admin_integration_status_service
 from utils import logger, status
+from utils.process_cache import TTLCache
+
+REFRESH_CACHE_SIZE = 10000
+
+# user state checked on every token refresh (see Config.AUTH_CACHE_TTL)
+_refresh_users = TTLCache(ttl=Config.AUTH_CACHE_TTL, max_size=REFRESH_CACHE_SIZE)
+# users to invalidate when the session commits (session.info key)
+_PENDING_REFRESH_USERS = "pending_refresh_users"
 
 _MANAGER_ROLES = {
     Role.USER_MANAGER.value,
@@ -688,27 +696,26 @@ def refresh_token(current_user, current_claims):
             status.HTTP_401_UNAUTHORIZED,
         )
 
-    user = db.session.query(User).filter(User.id == current_user).first()
-    if user is None:
+    user_state = _get_refresh_user_state(current_user)
+    if user_state is None:
         raise ValidationError(
             "Usuário inválido",
             "errors.unauthorizedUser",
             status.HTTP_401_UNAUTHORIZED,
         )
 
-    if not user.active:
+    active, permissions = user_state
+    if not active:
         raise ValidationError(
             "Usuário inativo",
             "errors.businessRules",
             status.HTTP_401_UNAUTHORIZED,
         )
 
-    integration_status = admin_integration_status_service.get_integration_status(
+    integration_status = admin_integration_status_service.get_cached_integration_status(
         current_claims["schema"]
     )
 
-    permissions = Role.get_permissions_from_user(user=user)
-
     if (
         integration_status == IntegrationStatusEnum.CANCELED.value
         and Permission.MAINTAINER not in permissions
@@ -726,22 +733,49 @@ def refresh_token(current_user, current_claims):
     return {"access_token": access_token}
 
 
-def _set_schema(schema):
-    db_session = Session(db)
-    result = db_session.execute(
-        text("SELECT schema_name FROM information_schema.schemata")
-    )
+def _get_refresh_user_state(id_user):
+    """(active, permissions) of the user, reused for AUTH_CACHE_TTL seconds"""
+
+    def _load():
+        user = db.session.query(User).filter(User.id == id_user).first()
+        if user is None:
+            return None
+
+        return user.active, Role.get_permissions_from_user(user=user)
+
+    if not Config.AUTH_CACHE_TTL:
+        return _load()
 
-    schema_exists = False
-    for r in result:
-        if r[0] == schema:
-            schema_exists = True
+    return _refresh_users.get(str(id_user), _load)
 
-    if not schema_exists:
+
+def invalidate_refresh_user(id_user):
+    """Forget the cached state of a user (deactivation, role changes)
+
+    Applied when the current transaction commits: a refresh before that would
+    cache the previous state again. The cache is per process: other workers see
+    the change after AUTH_CACHE_TTL.
+    """
+    db.session.info.setdefault(_PENDING_REFRESH_USERS, set()).add(str(id_user))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_refresh_users(session):
+    for id_user in session.info.pop(_PENDING_REFRESH_USERS, ()):
+        _refresh_users.invalidate(id_user)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_refresh_users(session, previous_transaction):
+    # savepoint rollbacks keep the outer transaction (and its invalidations)
+    if not session.in_transaction():
+        session.info.pop(_PENDING_REFRESH_USERS, None)
+
+
+def _set_schema(schema):
+    if not schema_service.schema_exists(schema):
         raise ValidationError(
             "Schema Inexistente", "errors.invalidSchema", status.HTTP_400_BAD_REQUEST
         )
 
-    db_session.close()
-
     dbSession.setSchema(schema)
@@ -3,11 +3,13 @@ import logging
 import time
 from contextlib import contextmanager
 
+from flask import g, has_request_context
 from redis.exceptions import RedisError
 
 from config import Config
 from models.enums import NoHarmENV
 from models.main import redis_client
+from utils import span_recorder
 
 
 def _log_failure(operation: str, key: str, error: Exception):
@@ -30,9 +32,86 @@ def tolerate_failure(operation: str, key: str):
         _log_failure(operation=operation, key=key, error=error)
 
 
+def pipeline():
+    """Transactional pipeline: the queued writes are sent and applied at once"""
+    return redis_client.pipeline(transaction=True)
+
+
+def replace_hash(pipe, key: str, mapping: dict):
+    """Queue a rewrite of the whole hash (values are serialized to json)"""
+    pipe.delete(key)
+    if mapping:
+        pipe.hset(
+            key, mapping={field: json.dumps(value) for field, value in mapping.items()}
+        )
+
+
+def replace_sorted_set(
+    pipe,
+    key: str,
+    members: list[tuple[dict, int]],
+    expire_in: int,
+    max_score_to_remove: int = None,
+):
+    """Queue a rewrite of the whole sorted set from (member, score) pairs
+
+    Members are serialized to json. Scores up to max_score_to_remove are trimmed after the rewrite.
+    """
+    pipe.delete(key)
+    if not members:
+        return
+
+    pipe.zadd(key, {json.dumps(member): score for member, score in members})
+    if max_score_to_remove is not None:
+        pipe.zremrangebyscore(key, min=0, max=max_score_to_remove)
+    pipe.expire(key, expire_in)
+
+
+def prefetch(commands: list[tuple]):
+    """Fetch many keys in a single pipelined round-trip for the current request.
+
+    Each command is ("get_by_key", key), ("get_range", key, days_ago) or
+    ("get_hgetall", key). Replies are kept on g and consumed by the matching
+    get_by_key/get_range/get_hgetall call, which then skips its own round-trip.
+    When the pipeline fails, every prefetched read resolves to None (as a failed
+    single read would) instead of retrying an unreachable server.
+    """
+    if Config.ENV == NoHarmENV.TEST.value or not commands or not has_request_context():
+        return
+
+    now = time.time()
+    span_recorder.count_redis()
+
+    replies = None
+    with tolerate_failure(operation="prefetch", key=commands[0][1]):
+        pipe = redis_client.json().pipeline(transaction=False)
+        for command in commands:
+            operation, key = command[0], command[1]
+            if operation == "get_by_key":
+                pipe.get(key)
+            elif operation == "get_range":
+                pipe.zrangebyscore(key, min=_range_start(now, command[2]), max=now)
+            elif operation == "get_hgetall":
+                pipe.hgetall(key)
+            else:
+                raise ValueError(f"operation not supported: {operation}")
+
+        replies = pipe.execute()
+
+    prefetched = g.setdefault("redis_prefetch", {})
+    for index, command in enumerate(commands):
+        prefetched[command] = replies[index] if replies is not None else _FAILED
+
+
 def get_by_key(key: str):
     if Config.ENV == NoHarmENV.TEST.value:
         return None
+
+    reply = _pop_prefetched(("get_by_key", key))
+    if reply is not _MISSING:
+        return None if reply is _FAILED else reply
+
+    span_recorder.count_redis()
     try:
         return redis_client.json().get(key)
     except RedisError as error:
@@ -43,15 +122,23 @@ def get_by_key(key: str):
 def get_range(key: str, days_ago: int):
     if Config.ENV == NoHarmENV.TEST.value:
         return None
-    now = time.time()
-    min_date = now - (days_ago * 24 * 60 * 60)
 
-    try:
-        cache_data = redis_client.zrangebyscore(key, min=min_date, max=now)
-    except RedisError as error:
-        _log_failure(operation="get_range", key=key, error=error)
+    cache_data = _pop_prefetched(("get_range", key, days_ago))
+    if cache_data is _FAILED:
         return None
 
+    if cache_data is _MISSING:
+        now = time.time()
+
+        span_recorder.count_redis()
+        try:
+            cache_data = redis_client.zrangebyscore(
+                key, min=_range_start(now, days_ago), max=now
+            )
+        except RedisError as error:
+            _log_failure(operation="get_range", key=key, error=error)
+            return None
+
     if cache_data:
         result = []
         for i in cache_data:
@@ -65,14 +152,37 @@ def get_range(key: str, days_ago: int):
 def get_hgetall(key: str):
     if Config.ENV == NoHarmENV.TEST.value:
         return None
-    try:
-        cache_data = redis_client.hgetall(key)
-    except RedisError as error:
-        _log_failure(operation="get_hgetall", key=key, error=error)
+
+    cache_data = _pop_prefetched(("get_hgetall", key))
+    if cache_data is _FAILED:
         return None
 
+    if cache_data is _MISSING:
+        span_recorder.count_redis()
+        try:
+            cache_data = redis_client.hgetall(key)
+        except RedisError as error:
+            _log_failure(operation="get_hgetall", key=key, error=error)
+            return None
+
     data = {}
     for data_key, data_object in cache_data.items():
         data[data_key] = json.loads(data_object)
 
     return data
+
+
+# markers for prefetched replies: not prefetched / pipeline failed
+_MISSING = object()
+_FAILED = object()
+
+
+def _pop_prefetched(command: tuple):
+    if not has_request_context():
+        return _MISSING
+
+    return g.get("redis_prefetch", {}).pop(command, _MISSING)
+
+
+def _range_start(now: float, days_ago: int) -> float:
+    return now - (days_ago * 24 * 60 * 60)
@@ -1,4 +1,3 @@
-import json
 import time
 from datetime import datetime, timedelta
 from typing import Union
@@ -536,51 +535,84 @@ def refresh_clinical_notes_stats_cache(admission_number: int, user_context: User
 
 @has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
 def refresh_dialysis_cache(admission_number: int, user_context: User):
-    dialysis = clinical_notes_repository.get_dialysis_cache(
-        admission_number=admission_number
+    refresh_annotations_cache_list(
+        admission_number_list=[admission_number],
+        user_context=user_context,
+        allergies=False,
     )
-    key = f"{user_context.schema}:{admission_number}:dialise"
+
+
+@has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
+def refresh_allergies_cache(admission_number: int, user_context: User):
+    refresh_annotations_cache_list(
+        admission_number_list=[admission_number],
+        user_context=user_context,
+        dialysis=False,
+    )
+
+
+@has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
+def refresh_annotations_cache_list(
+    admission_number_list: list[int],
+    user_context: User,
+    dialysis: bool = True,
+    allergies: bool = True,
+):
+    """Rewrite the dialysis and allergies cache of many admissions in one round-trip"""
+    if not admission_number_list:
+        return
+
     now = int(time.time())
     ten_days_ago = now - (10 * 24 * 60 * 60)
+    pipe = cache_service.pipeline()
+
+    for admission_number in dict.fromkeys(admission_number_list):
+        if dialysis:
+            cache_service.replace_sorted_set(
+                pipe,
+                key=f"{user_context.schema}:{admission_number}:dialise",
+                members=_get_annotation_cache_members(
+                    notes=clinical_notes_repository.get_dialysis_cache(
+                        admission_number=admission_number
+                    ),
+                    annotation="dialise",
+                ),
+                expire_in=(10 * 24 * 60 * 60),  # 10 days
+                max_score_to_remove=ten_days_ago,
+            )
 
-    with cache_service.tolerate_failure(operation="refresh_dialysis_cache", key=key):
-        redis_client.delete(key)
+        if allergies:
+            cache_service.replace_sorted_set(
+                pipe,
+                key=f"{user_context.schema}:{admission_number}:alergia",
+                members=_get_annotation_cache_members(
+                    notes=clinical_notes_repository.get_allergies_cache(
+                        admission_number=admission_number
+                    ),
+                    annotation="allergiesComposed",
+                ),
+                expire_in=(120 * 24 * 60 * 60),  # 120 days
+            )
 
-        for d in dialysis:
-            if d.annotations:
-                data = {
-                    "dtevolucao": d.date.replace(microsecond=0).isoformat(),
-                    "fkevolucao": d.id,
-                    "lista": d.annotations.get("dialise", []),
-                }
-                data_json = json.dumps(data)
-                timestamp = int(
-                    time.mktime(time.strptime(data["dtevolucao"], "%Y-%m-%dT%H:%M:%S"))
-                )
-                redis_client.zadd(key, {data_json: timestamp})
-                redis_client.zremrangebyscore(key, min=0, max=ten_days_ago)
-                redis_client.expire(key, (10 * 24 * 60 * 60))  # 10 days
+    with cache_service.tolerate_failure(
+        operation="refresh_annotations_cache",
+        key=f"{user_context.schema}:{admission_number_list[0]}",
+    ):
+        pipe.execute()
 
 
-@has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
-def refresh_allergies_cache(admission_number: int, user_context: User):
-    allergies = clinical_notes_repository.get_allergies_cache(
-        admission_number=admission_number
-    )
-    key = f"{user_context.schema}:{admission_number}:alergia"
-    with cache_service.tolerate_failure(operation="refresh_allergies_cache", key=key):
-        redis_client.delete(key)
-
-        for a in allergies:
-            if a.annotations:
-                data = {
-                    "dtevolucao": a.date.replace(microsecond=0).isoformat(),
-                    "fkevolucao": a.id,
-                    "lista": a.annotations.get("allergiesComposed", []),
-                }
-                data_json = json.dumps(data)
-                timestamp = int(
-                    time.mktime(time.strptime(data["dtevolucao"], "%Y-%m-%dT%H:%M:%S"))
-                )
-                redis_client.zadd(key, {data_json: timestamp})
-                redis_client.expire(key, (120 * 24 * 60 * 60))  # 120 days
+def _get_annotation_cache_members(notes: list, annotation: str):
+    members = []
+    for n in notes:
+        if n.annotations:
+            data = {
+                "dtevolucao": n.date.replace(microsecond=0).isoformat(),
+                "fkevolucao": n.id,
+                "lista": n.annotations.get(annotation, []),
+            }
+            timestamp = int(
+                time.mktime(time.strptime(data["dtevolucao"], "%Y-%m-%dT%H:%M:%S"))
+            )
+            members.append((data, timestamp))
+
+    return members
@@ -25,9 +25,8 @@ from models.main import (
 )
 from models.prescription import Prescription, PrescriptionDrug
 from models.requests.admin.admin_drug_request import AdminDrugListRequest
-from models.segment import Segment
 from repository import drugs_repository, outlier_repository
-from services import data_authorization_service, memory_service
+from services import data_authorization_service, memory_service, segment_service
 from services.admin import admin_drug_service
 from utils import numberutils, prescriptionutils, status
 
@@ -480,7 +479,7 @@ def copy_substance_default_attributes(
     reference = db.session.query(Substance).filter(Substance.id == sctid).first()
 
     if reference != None:
-        segments = db.session.query(Segment).all()
+        segments = segment_service.get_all_segment_metadata().values()
 
         for s in segments:
             add = False
@@ -540,7 +539,7 @@ def create_attributes_from_reference(id_drug, id_segment, user):
         )
 
     reference = db.session.query(Substance).filter(Substance.id == drug.sctid).first()
-    segment = db.session.query(Segment).filter(Segment.id == id_segment).first()
+    segment = segment_service.get_segment_metadata(id_segment)
 
     if da == None:
         da = DrugAttributes()
@@ -574,7 +573,9 @@ def create_attributes_from_reference(id_drug, id_segment, user):
 
 
 def _fill_drug_attributes_from_ref(
-    reference: Substance, drug_attributes: DrugAttributes, segment: Segment
+    reference: Substance,
+    drug_attributes: DrugAttributes,
+    segment: segment_service.SegmentMetadata,
 ):
     def has_tag(tag: str):
         return True if reference.tags and tag in reference.tags else False
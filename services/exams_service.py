@@ -1,14 +1,13 @@
 """Service: exams related operations"""
 
-import json
 from datetime import date, datetime, timedelta
 
 from dateutil import parser
-from sqlalchemy import and_, desc
+from sqlalchemy import desc
 
 from decorators.has_permission_decorator import Permission, has_permission
 from exception.validation_error import ValidationError
-from models.main import User, db, redis_client
+from models.main import User, db
 from models.notes import ClinicalNotes
 from models.prescription import Patient
 from models.requests.exam_request import (
@@ -19,7 +18,16 @@ from models.requests.exam_request import (
 from models.segment import Exams
 from repository import exams_repository
 from services import cache_service, patient_service
-from utils import dateutils, examutils, logger, numberutils, status, stringutils
+from utils import (
+    dateutils,
+    examutils,
+    logger,
+    numberutils,
+    sessionutils,
+    status,
+    stringutils,
+)
+from utils.process_cache import VersionedCache
 
 
 class DynamoExam:
@@ -46,6 +54,91 @@ class DynamoExam:
             pass
 
 
+class ExamRef:
+    """Read-only copy of a SegmentExam (same attributes used by examutils.formatExam)"""
+
+    __slots__ = ("typeExam", "name", "initials", "min", "max", "ref", "tp_exam_ref")
+
+    def __init__(self, segment_exam):
+        self.typeExam = segment_exam.typeExam
+        self.name = segment_exam.name
+        self.initials = segment_exam.initials
+        self.min = segment_exam.min
+        self.max = segment_exam.max
+        self.ref = segment_exam.ref
+        self.tp_exam_ref = segment_exam.tp_exam_ref
+
+
+class ExamReference:
+    """Exams reference of a segment, precomputed for the patient exam card"""
+
+    __slots__ = ("refs", "empty_exams", "creatinine_types", "extra_keys")
+
+    # exams also reported apart, by initials
+    EXTRA_KEYS = {"tgo": "tgo", "tgp": "tgp", "plaquetas": "plqt"}
+
+    def __init__(self, refs: dict):
+        # lower exam type -> ExamRef (plus "cr" for the creatinine exam)
+        self.refs = refs
+        self.empty_exams = {}
+        self.creatinine_types = set()
+        self.extra_keys = {}
+
+        for exam_type, ref in refs.items():
+            initials = ref.initials.lower().strip()
+            is_creatinine = initials == "creatinina"
+
+            if is_creatinine:
+                self.creatinine_types.add(exam_type)
+            if initials in self.EXTRA_KEYS:
+                self.extra_keys[exam_type] = self.EXTRA_KEYS[initials]
+
+            self.empty_exams["cr" if is_creatinine else exam_type.lower()] = {
+                "value": None,
+                "alert": False,
+                "ref": None,
+                "name": ref.name,
+                "unit": None,
+                "delta": None,
+                "date": None,
+                "min": ref.min,
+                "max": ref.max,
+                "initials": ref.initials,
+                "tp_exam_ref": ref.tp_exam_ref,
+            }
+
+
+# segment exams are edited in the admin and read by every prescription;
+# this is the only process cache of them (segment metadata keeps none)
+_exam_reference_cache = VersionedCache(check_interval=60)
+
+
+def get_exam_reference(id_segment: int) -> ExamReference:
+    """Cached exams reference of a segment (process wide, per schema)"""
+    schema = sessionutils.get_current_schema()
+
+    def _load():
+        return ExamReference(
+            refs={
+                exam_type: ExamRef(segment_exam)
+                for exam_type, segment_exam in exams_repository.get_exams_reference(
+                    id_segment=id_segment
+                ).items()
+            }
+        )
+
+    if not schema:
+        return _load()
+
+    return _exam_reference_cache.get(
+        (schema, id_segment),
+        load=_load,
+        version=lambda: exams_repository.get_exams_reference_version(
+            id_segment=id_segment
+        ),
+    )
+
+
 @has_permission(Permission.WRITE_PRESCRIPTION)
 def delete_exam(request_data: ExamDeleteRequest, user_context: User):
     """Delete manually inserted exam"""
@@ -208,7 +301,7 @@ def get_exams_by_admission(admission_number: int, id_segment: int, user_context:
             patient.height = patient_previous_data.height
 
     # get exams configuration to this segment
-    segExam = exams_repository.get_exams_reference(id_segment=id_segment)
+    segExam = get_exam_reference(id_segment=id_segment).refs
 
     dynamodbexams = exams_repository.get_exams_by_patient_from_dynamodb(
         schema=user_context.schema, id_patient=patient.idPatient
@@ -457,45 +550,40 @@ def _history_calc(typeExam, examsList, patient, segExam):
     return results
 
 
-def _get_exams_previous_results(id_patient: int):
-    examLatest = (
-        db.session.query(Exams.typeExam.label("typeExam"), Exams.date.label("date"))
-        .select_from(Exams)
-        .distinct(Exams.typeExam)
-        .filter(Exams.idPatient == id_patient)
-        .filter(Exams.date >= (date.today() - timedelta(days=90)))
-        .order_by(Exams.typeExam, Exams.date.desc())
-        .subquery()
-    )
+def _get_latest_exams(id_patient: int, with_previous: bool):
+    """Latest exam of each type in the last 5 days and the previous value of its type
 
-    el = db.aliased(examLatest)
-
-    resultsPrev = (
-        Exams.query.distinct(Exams.typeExam)
-        .join(el, and_(Exams.typeExam == el.c.typeExam, Exams.date < el.c.date))
-        .filter(Exams.idPatient == id_patient)
-        .filter(Exams.date >= (date.today() - timedelta(days=90)))
-        .order_by(Exams.typeExam, Exams.date.desc())
+    Previous values come from the 90 days window.
+    """
+    min_date = datetime.combine(date.today() - timedelta(days=5), datetime.min.time())
+    results = exams_repository.get_latest_exams_by_patient(
+        id_patient=id_patient,
+        days=90 if with_previous else 5,
+        with_previous=with_previous,
     )
 
+    latest_exams = {}
     previous_exams = {}
+    for e in results:
+        if e.rank == 1:
+            if e.date >= min_date:
+                latest_exams.setdefault(e.typeExam, e)
+        elif e.typeExam not in previous_exams:
+            previous_exams[e.typeExam] = e.value
+
+    # types are matched case insensitively, as the values in cache
+    previous_by_lower_type = {
+        exam_type.lower(): value for exam_type, value in previous_exams.items()
+    }
 
-    for e in resultsPrev:
-        previous_exams[e.typeExam.lower()] = e.value
-
-    return previous_exams
+    return [
+        (e, previous_by_lower_type.get(exam_type.lower(), None))
+        for exam_type, e in latest_exams.items()
+    ]
 
 
 def _get_exams_current_results_hybrid(id_patient: int, schema: str):
-    MIN_DATE = date.today() - timedelta(days=5)
-
-    results = (
-        Exams.query.distinct(Exams.typeExam)
-        .filter(Exams.idPatient == id_patient)
-        .filter(Exams.date >= MIN_DATE)
-        .order_by(Exams.typeExam, Exams.date.desc())
-        .all()
-    )
+    results = _get_latest_exams(id_patient=id_patient, with_previous=False)
 
     cache_key = f"{schema}:{id_patient}:exames"
     cache_result = cache_service.get_hgetall(key=cache_key)
@@ -506,7 +594,7 @@ def _get_exams_current_results_hybrid(id_patient: int, schema: str):
             cache_exams[exam_type.lower()] = exam_object
 
     exams = {}
-    for e in results:
+    for e, _ in results:
         prev_value = cache_exams.get(e.typeExam.lower())
 
         if not prev_value:
@@ -540,25 +628,15 @@ def _get_exams_current_results(
 
             return exams
 
-    previous_exams = {}
-    if add_previous_exams:
-        previous_exams = _get_exams_previous_results(id_patient=id_patient)
-
-    results = (
-        Exams.query.distinct(Exams.typeExam)
-        .filter(Exams.idPatient == id_patient)
-        .filter(Exams.date >= MIN_DATE)
-        .order_by(Exams.typeExam, Exams.date.desc())
-        .all()
-    )
+    results = _get_latest_exams(id_patient=id_patient, with_previous=add_previous_exams)
 
     exams = {}
-    for e in results:
+    for e, previous_value in results:
         exams[e.typeExam.lower() if lower_key else e.typeExam] = {
             "value": e.value,
             "unit": e.unit,
             "date": e.date.isoformat(),
-            "prev": previous_exams.get(e.typeExam.lower(), None),
+            "prev": previous_value,
         }
 
     return exams
@@ -593,33 +671,13 @@ def find_latest_exams(
             schema=schema,
         )
 
-    segExam = exams_repository.get_exams_reference(id_segment=idSegment)
-    age = dateutils.data2age(
-        patient.birthdate.isoformat() if patient.birthdate else date.today().isoformat()
-    )
+    exam_reference = get_exam_reference(id_segment=idSegment)
+    segExam = exam_reference.refs
+    age = dateutils.date2age(patient.birthdate) if patient.birthdate else 0
     effective_weight = weight if weight is not None else patient.weight
     effective_height = height if height is not None else patient.height
 
-    exams = {}
-    for e in segExam:
-        examEmpty = {
-            "value": None,
-            "alert": False,
-            "ref": None,
-            "name": None,
-            "unit": None,
-            "delta": None,
-        }
-        examEmpty["date"] = None
-        examEmpty["min"] = segExam[e].min
-        examEmpty["max"] = segExam[e].max
-        examEmpty["name"] = segExam[e].name
-        examEmpty["initials"] = segExam[e].initials
-        examEmpty["tp_exam_ref"] = segExam[e].tp_exam_ref
-        if segExam[e].initials.lower().strip() == "creatinina":
-            exams["cr"] = examEmpty
-        else:
-            exams[e.lower()] = examEmpty
+    exams = {key: dict(empty) for key, empty in exam_reference.empty_exams.items()}
 
     custom_exams = [
         "mdrd",
@@ -632,51 +690,25 @@ def find_latest_exams(
     examsExtra = {}
     for exam_type, exam_object in current_exams.items():
         if exam_type not in custom_exams:
-            exams[exam_type] = examutils.formatExam(
-                value=exam_object.get("value", None),
-                typeExam=exam_type,
-                unit=exam_object.get("unit", None),
-                date=exam_object.get("date", None),
-                segExam=segExam,
-                prevValue=exam_object.get("prev", None),
-            )
+            exams[exam_type] = _format_exam(exam_type, exam_object, segExam)
+
+        if exam_type in exam_reference.creatinine_types and "cr" in exams:
+            existing_date = exams["cr"].get("date")
+            new_date = exam_object.get("date")
+            if (
+                exams["cr"]["value"] is None
+                or (
+                    new_date is not None
+                    and existing_date is not None
+                    and new_date > existing_date
+                )
+            ):
+                exams["cr"] = _format_exam(exam_type, exam_object, segExam)
 
-        if exam_type in segExam:
-            if segExam[exam_type].initials.lower().strip() == "creatinina" and "cr" in exams:
-                existing_date = exams["cr"].get("date")
-                new_date = exam_object.get("date")
-                if (
-                    exams["cr"]["value"] is None
-                    or (
-                        new_date is not None
-                        and existing_date is not None
-                        and new_date > existing_date
-                    )
-                ):
-                    exams["cr"] = examutils.formatExam(
-                        value=exam_object.get("value", None),
-                        typeExam=exam_type,
-                        unit=exam_object.get("unit", None),
-                        date=exam_object.get("date", None),
-                        segExam=segExam,
-                        prevValue=exam_object.get("prev", None),
-                    )
-
-            extra_config = [
-                {"exam_key": "tgo", "extra_key": "tgo"},
-                {"exam_key": "tgp", "extra_key": "tgp"},
-                {"exam_key": "plaquetas", "extra_key": "plqt"},
-            ]
-            for ec in extra_config:
-                if segExam[exam_type].initials.lower().strip() == ec.get("exam_key"):
-                    examsExtra[ec.get("extra_key")] = examutils.formatExam(
-                        value=exam_object.get("value", None),
-                        typeExam=exam_type,
-                        unit=exam_object.get("unit", None),
-                        date=exam_object.get("date", None),
-                        segExam=segExam,
-                        prevValue=exam_object.get("prev", None),
-                    )
+        if exam_type in exam_reference.extra_keys:
+            examsExtra[exam_reference.extra_keys[exam_type]] = _format_exam(
+                exam_type, exam_object, segExam
+            )
 
     if "cr" in exams:
         if age > 17:
@@ -731,6 +763,17 @@ def find_latest_exams(
     return dict(exams, **examsExtra)
 
 
+def _format_exam(exam_type: str, exam_object: dict, seg_exam: dict):
+    return examutils.formatExam(
+        value=exam_object.get("value", None),
+        typeExam=exam_type,
+        unit=exam_object.get("unit", None),
+        date=exam_object.get("date", None),
+        segExam=seg_exam,
+        prevValue=exam_object.get("prev", None),
+    )
+
+
 def _add_creatinina_calcs(
     exam,
     exam_item: dict,
@@ -832,18 +875,35 @@ def _fill_custom_exams(exam_type: str, custom_exam: dict, seg_exam: dict):
 @has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
 def refresh_exams_cache(id_patient: int, user_context: User):
     """get current exams and save in cache"""
-    exams = _get_exams_current_results(
-        id_patient=id_patient,
-        add_previous_exams=True,
-        cache=False,
-        schema=user_context.schema,
-        lower_key=False,
-    )
+    refresh_exams_cache_list(id_patient_list=[id_patient], user_context=user_context)
+
+
+@has_permission(Permission.WRITE_PRESCRIPTION, Permission.MAINTAINER)
+def refresh_exams_cache_list(id_patient_list: list[int], user_context: User):
+    """get current exams of many patients and save in cache (single redis round-trip)"""
+    if not id_patient_list:
+        return
+
+    pipe = cache_service.pipeline()
+
+    for id_patient in dict.fromkeys(id_patient_list):
+        exams = _get_exams_current_results(
+            id_patient=id_patient,
+            add_previous_exams=True,
+            cache=False,
+            schema=user_context.schema,
+            lower_key=False,
+        )
+
+        cache_service.replace_hash(
+            pipe, key=f"{user_context.schema}:{id_patient}:exames", mapping=exams
+        )
 
-    key = f"{user_context.schema}:{id_patient}:exames"
-    with cache_service.tolerate_failure(operation="refresh_exams_cache", key=key):
-        for type_exam, exam in exams.items():
-            redis_client.hset(key, type_exam, json.dumps(exam))
+    with cache_service.tolerate_failure(
+        operation="refresh_exams_cache",
+        key=f"{user_context.schema}:{id_patient_list[0]}:exames",
+    ):
+        pipe.execute()
 
 
 @has_permission(Permission.READ_PRESCRIPTION)
@@ -1,7 +1,7 @@
 from flask import g
 
 from config import Config
-from models.appendix import GlobalMemory, Memory
+from models.appendix import GlobalMemory
 from models.enums import (
     AppFeatureFlagEnum,
     FeatureEnum,
@@ -10,25 +10,20 @@ from models.enums import (
     NoHarmENV,
 )
 from models.main import db
+from services import memory_service
 
 
 def has_feature(user_feature: FeatureEnum):
     """
     Tenant features
     """
-    features = g.get("features", [])
-
-    if not features:
-        features_memory = (
-            db.session.query(Memory)
-            .filter(Memory.kind == MemoryEnum.FEATURES.value)
-            .first()
+    if "features" not in g:
+        # shares the request memory memo (loaded with the other hot memory kinds)
+        g.features = memory_service.get_memory_values([MemoryEnum.FEATURES.value]).get(
+            MemoryEnum.FEATURES.value, []
         )
-        if features_memory:
-            features = features_memory.value
-            g.features = features
 
-    return user_feature.value in features
+    return user_feature.value in g.features
 
 
 def has_user_feature(user_feature: FeatureEnum):
@@ -47,17 +42,13 @@ def has_feature_flag(flag: AppFeatureFlagEnum):
     """
     System features
     """
-    feature_flags = g.get("feature_flags", {})
-
-    if not feature_flags:
+    if "feature_flags" not in g:
         memory = (
             db.session.query(GlobalMemory)
             .filter(GlobalMemory.kind == GlobalMemoryEnum.FEATURE_FLAGS.value)
             .first()
         )
 
-        if memory != None:
-            feature_flags = memory.value
-            g.feature_flags = feature_flags
+        g.feature_flags = memory.value if memory != None else {}
 
-    return feature_flags.get(flag.value, False)
+    return g.feature_flags.get(flag.value, False)
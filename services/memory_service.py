@@ -2,17 +2,32 @@
 
 from datetime import datetime
 
+from flask import g, has_request_context
 from flask_jwt_extended import get_jwt_identity
 
+from config import Config
 from decorators.has_permission_decorator import Permission, has_permission
 from exception.validation_error import ValidationError
 from models.appendix import Memory
 from models.enums import MemoryEnum
 from models.main import User, db
-from utils import dateutils, status
+from utils import dateutils, sessionutils, status
+from utils.process_cache import TTLCache
 
 EDITABLE_KINDS = ["tpl-care-plan"]
 
+# kinds read by most requests (prescription view, prescalc): loaded together
+PRELOADED_KINDS = [
+    MemoryEnum.FEATURES.value,
+    MemoryEnum.MAP_SCHEDULES_FASTING.value,
+    MemoryEnum.PRESMED_FORM.value,
+    MemoryEnum.ADMISSION_REPORTS.value,
+    MemoryEnum.ADMISSION_REPORTS_INTERNAL.value,
+    MemoryEnum.MAP_ROUTES.value,
+]
+
+_tenant_memory = TTLCache(ttl=Config.MEMORY_CACHE_TTL)
+
 
 @has_permission(Permission.READ_BASIC_FEATURES)
 def get_memory_by_kind(kind: str):
@@ -84,25 +99,19 @@ def has_feature(feature: str):
     if feature in user_features:
         return True
 
-    features = db.session.query(Memory).filter(Memory.kind == "features").first()
-
-    if features is None:
-        return False
-
-    if feature not in features.value:
-        return False
-
-    return True
+    return has_feature_nouser(feature)
 
 
 def has_feature_nouser(feature):
     """Check if a feature is enabled globally (no user context required)."""
-    features = db.session.query(Memory).filter(Memory.kind == "features").first()
+    features = get_memory_values([MemoryEnum.FEATURES.value]).get(
+        MemoryEnum.FEATURES.value
+    )
 
     if features is None:
         return False
 
-    if feature not in features.value:
+    if feature not in features:
         return False
 
     return True
@@ -115,13 +124,65 @@ def get_memory(key):
 
 def get_by_kind(kinds) -> dict:
     """Get memory values indexed by kind for a list of kind keys."""
-    memory_itens = {}
+    return get_memory_values(kinds)
+
+
+def get_memory_values(kinds: list[str]) -> dict:
+    """Get memory values indexed by kind (missing kinds are left out).
+
+    Values are memoized for the request: the first lookup loads PRELOADED_KINDS
+    along with the requested kinds in one query, later lookups only query kinds
+    not seen yet. With MEMORY_CACHE_TTL set, preloaded kinds are also reused
+    across requests of the same schema.
+    """
+    if not has_request_context():
+        values = _query_memory_values(kinds)
+        return {k: v for k, v in values.items() if v is not None}
+
+    memo = g.setdefault("memory_values", {})
+
+    if not memo:
+        schema = sessionutils.get_current_schema()
+        if Config.MEMORY_CACHE_TTL and schema:
+            memo.update(
+                _tenant_memory.get(
+                    schema, lambda: _query_memory_values(PRELOADED_KINDS)
+                )
+            )
+        else:
+            memo.update(
+                _query_memory_values(list(dict.fromkeys(PRELOADED_KINDS + kinds)))
+            )
+
+    missing = [k for k in kinds if k not in memo]
+    if missing:
+        memo.update(_query_memory_values(missing))
+
+    return {k: memo[k] for k in kinds if memo[k] is not None}
+
+
+def invalidate_memory(kind: str):
+    """Forget a memoized kind after it changes"""
+    schema = sessionutils.get_current_schema()
+    if schema:
+        _tenant_memory.invalidate(schema)
+
+    if has_request_context():
+        g.get("memory_values", {}).pop(kind, None)
+
+        if kind == MemoryEnum.FEATURES.value:
+            # feature_service keeps its own copy
+            g.pop("features", None)
+
+
+def _query_memory_values(kinds: list[str]) -> dict:
+    values = dict.fromkeys(kinds)
     records = db.session.query(Memory).filter(Memory.kind.in_(kinds)).all()
 
     for r in records:
-        memory_itens[r.kind] = r.value
+        values[r.kind] = r.value
 
-    return memory_itens
+    return values
 
 
 @has_permission(Permission.WRITE_CUSTOM_FORMS)
@@ -181,6 +242,8 @@ def save_memory(id, kind, value, user_context: User):
         db.session.add(mem)
         db.session.flush()
 
+    invalidate_memory(kind=mem.kind)
+
     return mem
 
 
@@ -217,6 +280,8 @@ def save_unique_memory(kind, value, user_context: User):
         db.session.add(mem)
         db.session.flush()
 
+    invalidate_memory(kind=mem.kind)
+
     return mem
 
 
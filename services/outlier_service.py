@@ -25,6 +25,7 @@ from services.admin import admin_drug_service, admin_integration_status_service
 from utils import aws, logger, status
 
 FOLD_SIZE = 10
+SCORE_COPY_CHUNK_SIZE = 10000
 
 
 @has_permission(Permission.WRITE_DRUG_SCORE)
@@ -105,10 +106,9 @@ def generate(
             status.HTTP_401_UNAUTHORIZED,
         )
 
-    csv_buffer = _get_csv_buffer(
+    csv_string = _get_csv_buffer(
         id_segment=id_segment, schema=user_context.schema, id_drug=id_drug, fold=fold
-    )
-    csv_string = csv_buffer.getvalue()
+    ).getvalue()
 
     if csv_string.count("\n") < 2:
         # list has only a header line, abort score generation
@@ -147,62 +147,102 @@ def generate(
 
     start_date = datetime.now()
 
-    updates = []
-    drugs_list = list(scores.keys())
+    score_index = _get_score_index(scores)
     outliers = (
-        Outlier.query.filter(Outlier.idSegment == id_segment)
-        .filter(Outlier.idDrug.in_(drugs_list))
-        .all()
+        db.session.query(Outlier.id, Outlier.idDrug, Outlier.dose, Outlier.frequency)
+        .filter(Outlier.idSegment == id_segment)
+        .filter(Outlier.idDrug.in_([int(id) for id in scores.keys()]))
+        .yield_per(SCORE_COPY_CHUNK_SIZE)
     )
 
-    def _get_drug_score(id_drug: int, dose: float, frequency: int):
-        drug_scores = scores[str(id_drug)]
+    updates = _get_score_updates(outliers=outliers, score_index=score_index)
 
-        return next(
-            sc
-            for sc in drug_scores
-            if sc["dose"] == dose and round(sc["frequency"], 2) == round(frequency, 2)
-        )
+    if _update_scores(updates=updates, schema=user_context.schema, user=user_context):
+        _log_perf(start_date, "UPDATE SCORES")
+
+
+def _score_key(id_drug, dose, frequency):
+    return (int(id_drug), dose, round(frequency, 2))
 
-    for o in outliers:
-        no = _get_drug_score(id_drug=o.idDrug, dose=o.dose, frequency=o.frequency)
-
-        if len(no) > 0:
-            updates.append(
-                _to_update_row(
-                    {
-                        "id": o.id,
-                        "score": no["score"],
-                        "countNum": int(no["count"]),
-                    },
-                    user_context,
-                )
-            )
 
-    if len(updates) > 0:
-        update_stmt = f"""
-            with scores as (
-                select * from (values {",".join(updates)}) AS t (idoutlier, score, countnum, update_at, update_by)
+def _get_score_index(scores: dict) -> dict:
+    """Scores returned by the score function, by (drug, dose, frequency)"""
+    score_index = {}
+    for id_drug, drug_scores in scores.items():
+        for sc in drug_scores:
+            # the first score wins when the same key is repeated
+            score_index.setdefault(
+                _score_key(id_drug, sc["dose"], sc["frequency"]),
+                (sc["score"], int(sc["count"])),
             )
-            update {user_context.schema}.outlier o
+
+    return score_index
+
+
+def _get_score_updates(outliers, score_index: dict):
+    """(idoutlier, (score, count)) of the outliers that got a score"""
+    for o in outliers:
+        score = score_index.get(_score_key(o.idDrug, o.dose, o.frequency))
+
+        if score is not None:
+            yield o.id, score
+
+
+def _update_scores(updates, schema: str, user: User) -> bool:
+    """Copy (idoutlier, (score, count)) rows to a temp table and update outliers"""
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS outlier_score (
+            idoutlier bigint, escore integer, contagem integer
+        ) ON COMMIT DROP
+        """
+    )
+    cursor.execute("TRUNCATE outlier_score")
+
+    total = 0
+    chunk = []
+    for id_outlier, (score, count) in updates:
+        chunk.append(f"{id_outlier},{'' if score is None else score},{count}\n")
+
+        if len(chunk) == SCORE_COPY_CHUNK_SIZE:
+            total += _copy_scores(cursor, chunk)
+            chunk = []
+
+    total += _copy_scores(cursor, chunk)
+
+    if total == 0:
+        return False
+
+    db.session.execute(
+        text(
+            f"""
+            update {schema}.outlier o
             set
-                contagem = s.countnum,
-                escore = s.score,
-                update_at = s.update_at,
-                update_by = s.update_by
+                contagem = s.contagem,
+                escore = s.escore,
+                update_at = :updateAt,
+                update_by = :updateBy
             from
-                scores s
+                outlier_score s
             where
                 s.idoutlier = o.idoutlier
-        """
+            """
+        ),
+        {"updateAt": datetime.today(), "updateBy": user.id},
+    )
 
-        db.session.execute(text(update_stmt))
+    return True
 
-        _log_perf(start_date, "UPDATE SCORES")
 
+def _copy_scores(cursor, rows: list) -> int:
+    if len(rows) > 0:
+        cursor.copy_expert(
+            "COPY outlier_score (idoutlier, escore, contagem) FROM STDIN WITH CSV",
+            io.StringIO("".join(rows)),
+        )
 
-def _to_update_row(update: dict, user: User):
-    return f"""({update["id"]}, {update["score"]}, {update["countNum"]}, '{datetime.today().isoformat()}'::timestamp, {user.id})"""
+    return len(rows)
 
 
 def refresh_outliers(id_segment, user, id_drug=None):
@@ -274,8 +314,9 @@ def _get_csv_buffer(id_segment, schema, id_drug=None, fold=None):
 
     outputquery = "COPY ({0}) TO STDOUT WITH CSV HEADER".format(query)
 
-    conn = db.engine.raw_connection()
-    cursor = conn.cursor()
+    # session connection: sees the outliers refreshed in this transaction and is
+    # returned to the pool with the session
+    cursor = db.session.connection().connection.cursor()
     copy_query = cursor.mogrify(outputquery, tuple(params))
 
     csv_buffer = io.StringIO()
@@ -22,9 +22,11 @@ from models.requests.patient_request import PatientListRequest
 from repository import patient_repository
 from services import memory_service, name_service
 from services.admin import admin_tag_service
-from utils import dateutils, status
+from utils import cursorutils, dateutils, status
 from utils.dateutils import to_iso
 
+PATIENT_LIST_LIMIT = 1500
+
 
 def _format_patients(patients):
     """Serialize (Patient, Prescription, appointment_date) tuples."""
@@ -40,6 +42,7 @@ def _format_patients(patients):
             "observation": p[0].observation,
             "tags": p[0].tags,
             "refDate": p[2].isoformat() if p[2] else None,
+            "cursor": cursorutils.encode_cursor([p[2], p[1].id]),
         }
         for p in patients
     ]
@@ -78,10 +81,19 @@ def get_patients(request_data: PatientListRequest):
             .filter(Pmax.idHospital == Patient.idHospital)
             .filter(Pmax.agg == True),
         )
-        .order_by(desc("appointment"))
+        .order_by(desc("appointment"), desc(Prescription.id))
         .options(undefer(Patient.observation))
     )
 
+    if request_data.cursor:
+        sort_columns = [sq_appointment, Prescription.id]
+        query = query.filter(
+            cursorutils.after_cursor(
+                sort_columns,
+                cursorutils.decode_cursor(request_data.cursor, size=len(sort_columns)),
+            )
+        )
+
     if request_data.idSegment:
         query = query.filter(Prescription.idSegment == request_data.idSegment)
 
@@ -135,7 +147,7 @@ def get_patients(request_data: PatientListRequest):
             cast(request_data.tags, ARRAY(db.String)).overlap(Patient.tags)
         )
 
-    return _format_patients(query.limit(1500).all())
+    return _format_patients(query.limit(PATIENT_LIST_LIMIT).all())
 
 
 def get_patient_allergies(id_patient):
@@ -3,12 +3,12 @@
 import json
 from datetime import date, datetime, timedelta
 
-from flask_sqlalchemy.session import Session
 from sqlalchemy import desc, text
 
 from decorators.has_permission_decorator import Permission, has_permission
 from exception.validation_error import ValidationError
 from models.enums import (
+    AppFeatureFlagEnum,
     DrugTypeEnum,
     FeatureEnum,
     PatientConciliationStatusEnum,
@@ -21,13 +21,18 @@ from models.prescription import (
     Prescription,
     PrescriptionAudit,
 )
-from repository import prescalc_repository, prescription_repository
+from repository import (
+    prescalc_repository,
+    prescription_repository,
+    prioritization_repository,
+)
 from services import (
     feature_service,
     memory_service,
     prescription_check_service,
     prescription_drug_service,
     prescription_view_service,
+    schema_service,
     segment_service,
 )
 from utils import logger, prescriptionutils, status
@@ -35,11 +40,14 @@ from utils import logger, prescriptionutils, status
 
 @has_permission(Permission.READ_STATIC)
 def create_agg_prescription_by_prescription(
-    schema, id_prescription, user_context: User, force=False
+    schema, id_prescription, user_context: User, force=False, check_schema=True
 ):
     """Creates a new prescription-day based on an individual prescription"""
 
-    _set_schema(schema)
+    if check_schema:
+        _set_schema(schema)
+    else:
+        dbSession.setSchema(schema)
 
     p = (
         db.session.query(Prescription)
@@ -116,6 +124,7 @@ def create_agg_prescription_by_prescription(
     p.features = prescriptionutils.getFeatures(prescription_data)
     p.aggDrugs = p.features["drugIDs"]
     p.aggDeps = [p.idDepartment]
+    _update_prioritization_index(prescription=p)
 
     if p.concilia != None:
         db.session.flush()
@@ -180,6 +189,7 @@ def create_agg_prescription_by_prescription(
     pAgg.features = features
     pAgg.aggDrugs = pAgg.features["drugIDs"]
     pAgg.aggDeps = pAgg.features["departmentList"]
+    _update_prioritization_index(prescription=pAgg)
 
     if p.concilia is None and (pAgg.status == "s" or p.status == "s"):
         prescalc_user = User()
@@ -268,6 +278,68 @@ def create_agg_prescription_by_prescription(
     _log_processed_date(id_prescription_array=[id_prescription], schema=schema)
 
 
+@has_permission(Permission.READ_STATIC)
+def create_agg_prescription_by_prescription_list(
+    schema, id_prescription_list: list[int], user_context: User, force=False
+):
+    """Creates prescription-days for many prescriptions of the same schema
+
+    The schema is checked once and the session (plus every request/process cache)
+    is shared by the batch. Each prescription is committed on its own, so the
+    admission advisory lock is released before the next one, as in single runs.
+    """
+
+    _set_schema(schema)
+
+    results = []
+    for id_prescription in dict.fromkeys(id_prescription_list):
+        try:
+            create_agg_prescription_by_prescription(
+                schema=schema,
+                id_prescription=id_prescription,
+                user_context=user_context,
+                force=force,
+                check_schema=False,
+            )
+            db.session.commit()
+
+            results.append({"id_prescription": id_prescription, "status": "success"})
+        except ValidationError as e:
+            db.session.rollback()
+
+            results.append(
+                {
+                    "id_prescription": id_prescription,
+                    "status": "error",
+                    "message": str(e),
+                }
+            )
+        except Exception as e:
+            db.session.rollback()
+
+            logger.backend_logger.error(
+                json.dumps(
+                    {
+                        "event": "backend_exception",
+                        "path": "prescription_agg_service.create_agg_prescription_by_prescription_list",
+                        "schema": schema,
+                        "id_prescription": id_prescription,
+                        "message": str(e),
+                    }
+                )
+            )
+
+            results.append(
+                {
+                    "id_prescription": id_prescription,
+                    "status": "error",
+                    "message": "Erro inesperado",
+                }
+            )
+
+    return results
+
+
 @has_permission(Permission.READ_STATIC)
 def create_agg_prescription_by_date(
     schema, admission_number, p_date, user_context: User
@@ -391,6 +463,7 @@ def create_agg_prescription_by_date(
     agg_p.aggDeps = agg_p.features["departmentList"]
     agg_p.update = datetime.today()
     db.session.flush()
+    _update_prioritization_index(prescription=agg_p)
 
     _log_processed_date(id_prescription_array=internal_prescription_ids, schema=schema)
     _automatic_check(prescription=agg_p, features=features, user_context=user_context)
@@ -399,6 +472,20 @@ def create_agg_prescription_by_date(
     )
 
 
+def _update_prioritization_index(prescription: Prescription):
+    """Keep the prioritization index in sync with the new prescription features
+
+    Writes have their own flag so they can start before the backfill; reads
+    (PRIORITIZATION_INDEX) are enabled after it, and keep the writes on.
+    """
+    if feature_service.has_feature_flag(
+        flag=AppFeatureFlagEnum.PRIORITIZATION_INDEX_WRITE
+    ) or feature_service.has_feature_flag(flag=AppFeatureFlagEnum.PRIORITIZATION_INDEX):
+        prioritization_repository.upsert_prescription_priority(
+            prescription=prescription
+        )
+
+
 def _log_processed_date(id_prescription_array, schema):
     query = text(
         f"""
@@ -428,23 +515,11 @@ def _log_processed_date(id_prescription_array, schema):
 
 
 def _set_schema(schema):
-    db_session = Session(db)
-    result = db_session.execute(
-        text("SELECT schema_name FROM information_schema.schemata")
-    )
-
-    schemaExists = False
-    for r in result:
-        if r[0] == schema:
-            schemaExists = True
-
-    if not schemaExists:
+    if not schema_service.schema_exists(schema):
         raise ValidationError(
             "Schema Inexistente", "errors.invalidSchema", status.HTTP_400_BAD_REQUEST
         )
 
-    db_session.close()
-
     dbSession.setSchema(schema)
 
 
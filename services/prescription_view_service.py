@@ -1,6 +1,7 @@
 """Service: dedicated to prescription view data"""
 
 from datetime import date, datetime
+from functools import partial
 
 from sqlalchemy import and_, desc, func
 from sqlalchemy.dialects.postgresql import INTERVAL
@@ -35,6 +36,7 @@ from services import (
     alert_interaction_service,
     alert_protocol_service,
     alert_service,
+    cache_service,
     clinical_notes_service,
     exams_service,
     feature_service,
@@ -44,7 +46,7 @@ from services import (
     prescription_service,
     segment_service,
 )
-from utils import dateutils, prescriptionutils, status
+from utils import concurrency, dateutils, prescriptionutils, span_recorder, status
 from utils.alert_protocol import ProtocolExtraInfo
 from utils.drug_list import DrugList
 from utils.tagutils import filter_nav_tags
@@ -69,86 +71,179 @@ def _internal_get_prescription(
     user_context: User,
     is_complete=False,
 ):
-    prescription, patient, department, segment, prescription_user, icd = (
-        _get_prescription_data(id_prescription=id_prescription)
-    )
+    with span_recorder.record(
+        "prescription_view",
+        id_prescription=id_prescription,
+        schema=user_context.schema if user_context else None,
+        is_complete=is_complete,
+    ) as recorder:
+        with recorder.span("prescription_data"):
+            prescription, patient, department, segment, prescription_user, icd = (
+                _get_prescription_data(id_prescription=id_prescription)
+            )
 
-    config_data = _get_configs(
-        prescription=prescription, patient=patient, is_complete=is_complete
-    )
+        with recorder.span("configs"):
+            config_data = _get_configs(
+                prescription=prescription, patient=patient, is_complete=is_complete
+            )
 
-    interventions = _get_interventions(
-        admission_number=prescription.admissionNumber,
-        config_data=config_data,
-        concilia=prescription.concilia,
-    )
+        with recorder.span("cache_prefetch"):
+            _prefetch_cache(
+                prescription=prescription,
+                patient=patient,
+                is_complete=is_complete,
+                user_context=user_context,
+            )
 
-    cn_data = _get_clinical_notes_stats(
-        prescription=prescription,
-        patient=patient,
-        config_data=config_data,
-        user_context=user_context,
-        is_complete=is_complete,
-    )
+        stages = _run_independent_stages(
+            recorder=recorder,
+            schema=user_context.schema,
+            stages={
+                "interventions": partial(
+                    _get_interventions,
+                    admission_number=prescription.admissionNumber,
+                    config_data=config_data,
+                    concilia=prescription.concilia,
+                ),
+                "clinical_notes_stats": partial(
+                    _get_clinical_notes_stats,
+                    prescription=prescription,
+                    patient=patient,
+                    config_data=config_data,
+                    user_context=user_context,
+                    is_complete=is_complete,
+                ),
+                "exams": partial(
+                    _get_exams,
+                    patient=patient,
+                    prescription=prescription,
+                    config_data=config_data,
+                    is_complete=is_complete,
+                    user_context=user_context,
+                ),
+                "last_dept": partial(
+                    _get_last_dept, prescription=prescription, is_complete=is_complete
+                ),
+            },
+        )
+        interventions = stages["interventions"]
+        cn_data = stages["clinical_notes_stats"]
+        exam_data = stages["exams"]
+        last_dept = stages["last_dept"]
+
+        with recorder.span("drug_list"):
+            drug_list = _get_drug_list(
+                prescription=prescription,
+                patient=patient,
+                config_data=config_data,
+                user_context=user_context,
+            )
 
-    exam_data = _get_exams(
-        patient=patient,
-        prescription=prescription,
-        config_data=config_data,
-        is_complete=is_complete,
-        user_context=user_context,
-    )
+        with recorder.span("alerts"):
+            alerts_data = _get_alerts(
+                prescription=prescription,
+                drug_list=drug_list,
+                patient=patient,
+                config_data=config_data,
+                exam_data=exam_data,
+                cn_data=cn_data,
+                user_context=user_context,
+                segment=segment,
+            )
 
-    last_dept = _get_last_dept(prescription=prescription, is_complete=is_complete)
+        with recorder.span("drug_data"):
+            drug_data = _get_drug_data(
+                drugs=drug_list,
+                prescription=prescription,
+                patient=patient,
+                interventions=interventions,
+                alerts_data=alerts_data,
+                exams_data=exam_data,
+                config_data=config_data,
+                is_complete=is_complete,
+                user_context=user_context,
+            )
 
-    drug_list = _get_drug_list(
-        prescription=prescription,
-        patient=patient,
-        config_data=config_data,
-        user_context=user_context,
-    )
+        with recorder.span("review_data"):
+            review_data = _get_review_data(
+                prescription=prescription, is_complete=is_complete
+            )
 
-    alerts_data = _get_alerts(
-        prescription=prescription,
-        drug_list=drug_list,
-        patient=patient,
-        config_data=config_data,
-        exam_data=exam_data,
-        cn_data=cn_data,
-        user_context=user_context,
-        segment=segment,
-    )
+        with recorder.span("format"):
+            return _format(
+                prescription=prescription,
+                patient=patient,
+                department=department,
+                segment=segment,
+                prescription_user=prescription_user,
+                config_data=config_data,
+                drug_data=drug_data,
+                interventions=interventions,
+                exams_data=exam_data,
+                last_dept=last_dept,
+                cn_data=cn_data,
+                review_data=review_data,
+                alerts_data=alerts_data,
+                icd=icd,
+            )
 
-    drug_data = _get_drug_data(
-        drugs=drug_list,
-        prescription=prescription,
-        patient=patient,
-        interventions=interventions,
-        alerts_data=alerts_data,
-        exams_data=exam_data,
-        config_data=config_data,
-        is_complete=is_complete,
-        user_context=user_context,
-    )
 
-    review_data = _get_review_data(prescription=prescription, is_complete=is_complete)
+def _run_independent_stages(
+    recorder: span_recorder.SpanRecorder, schema: str, stages: dict
+) -> dict:
+    """Run stages that only depend on prescription, patient and config_data.
 
-    return _format(
-        prescription=prescription,
-        patient=patient,
-        department=department,
-        segment=segment,
-        prescription_user=prescription_user,
-        config_data=config_data,
-        drug_data=drug_data,
-        interventions=interventions,
-        exams_data=exam_data,
-        last_dept=last_dept,
-        cn_data=cn_data,
-        review_data=review_data,
-        alerts_data=alerts_data,
-        icd=icd,
+    When the concurrentPrescriptionView flag is on they run in parallel, each one
+    with its own db session; otherwise they run one after another, in order.
+    """
+
+    def _in_span(name, stage):
+        with recorder.span(name):
+            return stage()
+
+    if feature_service.has_feature_flag(
+        flag=AppFeatureFlagEnum.CONCURRENT_PRESCRIPTION_VIEW
+    ):
+        return concurrency.run_concurrently(
+            tasks={
+                name: partial(_in_span, name, stage) for name, stage in stages.items()
+            },
+            schema=schema,
+        )
+
+    return {name: _in_span(name, stage) for name, stage in stages.items()}
+
+
+def _prefetch_cache(
+    prescription: Prescription, patient: Patient, is_complete: bool, user_context: User
+):
+    """Read every redis key the stages will need in a single round-trip.
+
+    Keys must match the ones built by clinical_notes_repository and exams_service.
+    """
+    commands = []
+
+    if feature_service.has_feature_flag(flag=AppFeatureFlagEnum.REDIS_CACHE):
+        key = f"{user_context.schema}:{prescription.admissionNumber}"
+        commands.append(("get_range", f"{key}:stats", 6))
+
+        if is_complete:
+            commands.append(("get_by_key", f"{key}:sinais"))
+            commands.append(("get_by_key", f"{key}:dados"))
+            commands.append(("get_range", f"{key}:alergia", 120))
+            commands.append(("get_range", f"{key}:dialise", 3))
+
+    exams_hybrid = is_complete and feature_service.has_feature_flag(
+        flag=AppFeatureFlagEnum.REDIS_CACHE_EXAMS_HYBRID
     )
+    if exams_hybrid or feature_service.has_feature_flag(
+        flag=AppFeatureFlagEnum.REDIS_CACHE_EXAMS
+    ):
+        commands.append(
+            ("get_hgetall", f"{user_context.schema}:{patient.idPatient}:exames")
+        )
+
+    cache_service.prefetch(commands)
 
 
 @timed()
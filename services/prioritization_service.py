@@ -1,14 +1,22 @@
 """Service: prescription prioritization operations"""
 
+import hashlib
+import json
+
 from decorators.has_permission_decorator import Permission, has_permission
-from models.enums import FeatureEnum
+from models.enums import AppFeatureFlagEnum, FeatureEnum
 from models.prescription import Patient
 from models.requests.prioritization_request import PrioritizationRequest
 from repository import prioritization_repository
 from services import feature_service, prescription_service
-from utils import numberutils, prescriptionutils
+from utils import cursorutils, numberutils, prescriptionutils, sessionutils
+from utils.process_cache import TTLCache
 from utils.tagutils import filter_nav_tags
 
+ESTIMATED_COUNT_TTL = 60
+
+_estimated_counts = TTLCache(ttl=ESTIMATED_COUNT_TTL, max_size=1000)
+
 
 def _get_first_administration_hour(intervals):
     """Extract the first administration hour (0-23) from a sorted intervals list, or None if unavailable/invalid"""
@@ -26,13 +34,59 @@ def _get_first_administration_hour(intervals):
     return hour
 
 
+def _get_filter_hash(request: PrioritizationRequest) -> str:
+    """Hash of the request filters, ignoring the order of list values"""
+    filters = {
+        key: sorted(value, key=str) if isinstance(value, list) else value
+        for key, value in request.model_dump(mode="json", exclude={"cursor"}).items()
+    }
+
+    return hashlib.sha256(
+        json.dumps(filters, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _get_total_records(
+    request: PrioritizationRequest, results: list, priority_index: bool
+) -> tuple[int, bool]:
+    """Total of the list and whether it is exact
+
+    A first page below the limit is the complete list, so its size is the exact
+    count. Other pages get the planner estimate, cached for a short time per schema
+    and filters, instead of a second scan to count them.
+    """
+    if (
+        not request.cursor
+        and len(results) < prioritization_repository.PRIORITIZATION_LIMIT
+    ):
+        return len(results), True
+
+    key = (
+        sessionutils.get_current_schema(),
+        priority_index,
+        _get_filter_hash(request),
+    )
+    estimate = _estimated_counts.get(
+        key,
+        lambda: prioritization_repository.estimate_prioritization_count(
+            request=request, priority_index=priority_index
+        ),
+    )
+
+    return max(estimate, len(results)), False
+
+
 @has_permission(Permission.READ_PRESCRIPTION)
 def get_prioritization_list(request: PrioritizationRequest):
     """List prescription prioritization results"""
-    prioritization_results, total_records = (
-        prioritization_repository.get_prioritization_list(
-            request=request, run_count=False
-        )
+    priority_index = feature_service.has_feature_flag(
+        flag=AppFeatureFlagEnum.PRIORITIZATION_INDEX
+    )
+    prioritization_results, _ = prioritization_repository.get_prioritization_list(
+        request=request, run_count=False, priority_index=priority_index
+    )
+    total_records, total_records_exact = _get_total_records(
+        request=request, results=prioritization_results, priority_index=priority_index
     )
 
     results = []
@@ -143,6 +197,10 @@ def get_prioritization_list(request: PrioritizationRequest):
                     "reviewType": p[0].reviewType,
                     "observation": observation,
                     "totalRecords": total_records,
+                    "totalRecordsExact": total_records_exact,
+                    "cursor": cursorutils.encode_cursor(
+                        [p.globalScore, p[0].date, p[0].id]
+                    ),
                     "agg": p[0].agg,
                     "prescriptionAggId": prescriptionutils.gen_agg_id(
                         admission_number=p[0].admissionNumber,
@@ -29,7 +29,7 @@ from services import clinical_notes_service
 from services.admin import admin_protocol_service
 from services.protocol_agent_tools import build_tools
 from utils import logger, status
-from utils.alert_protocol import SAFE_LOGICAL_EXPR_REGEX
+from utils.alert_protocol_compiler import SAFE_LOGICAL_EXPR_REGEX
 
 BEDROCK_READ_TIMEOUT = 20
 MAX_MESSAGE_LENGTH = 4000
@@ -11,9 +11,8 @@ from models.requests.protocol_request import (
     ProtocolDescriptionRequest,
     ProtocolListRequest,
 )
-from models.segment import Segment
 from repository import exams_repository, protocol_repository
-from services import memory_service
+from services import memory_service, segment_service
 from utils import status
 
 
@@ -196,12 +195,12 @@ def _build_variable_labels(variables: list[dict]) -> dict:
         labels["department"] = {str(r.id): r.name for r in rows}
 
     if ids.get("segment"):
-        rows = (
-            db.session.query(Segment)
-            .filter(Segment.id.in_(_numeric(ids["segment"])))
-            .all()
-        )
-        labels["segment"] = {str(r.id): r.description for r in rows}
+        segments = segment_service.get_all_segment_metadata()
+        labels["segment"] = {
+            str(i): segments[i].description
+            for i in _numeric(ids["segment"])
+            if i in segments
+        }
 
     if ids.get("route"):
         map_routes = memory_service.get_memory(MemoryEnum.MAP_ROUTES.value)
@@ -0,0 +1,40 @@
+"""Service: tenant schema registry"""
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+from models.main import db
+from utils.process_cache import TTLCache
+
+SCHEMA_TTL = 300
+
+_schemas = TTLCache(ttl=SCHEMA_TTL)
+
+
+def get_schemas() -> frozenset:
+    """Names of the existing database schemas (cached per process)"""
+    return _schemas.get("schemas", _load_schemas)
+
+
+def schema_exists(schema: str) -> bool:
+    """Check if the schema exists, reloading the registry on a miss (new tenants)"""
+    if not schema:
+        return False
+
+    if schema in get_schemas():
+        return True
+
+    return schema in _schemas.get("schemas", _load_schemas, refresh=True)
+
+
+def _load_schemas() -> frozenset:
+    # separate session: the check must not touch the caller transaction
+    db_session = Session(db)
+    try:
+        result = db_session.execute(
+            text("SELECT schema_name FROM information_schema.schemata")
+        )
+
+        return frozenset(r[0] for r in result)
+    finally:
+        db_session.close()
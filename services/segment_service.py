@@ -8,6 +8,8 @@ from models.appendix import SegmentDepartment, Department
 from models.enums import FeatureEnum
 from services import feature_service
 from decorators.has_permission_decorator import has_permission, Permission
+from utils import sessionutils
+from utils.process_cache import VersionedCache
 
 
 @has_permission(Permission.READ_BASIC_FEATURES)
@@ -51,13 +53,79 @@ def get_segment_departments():
     return departments
 
 
-def is_cpoe(id_segment: int):
-    """Check if segment is cpoe or not"""
+class SegmentMetadata:
+    """Read-only segment data shared by every request of a process"""
+
+    __slots__ = (
+        "id",
+        "description",
+        "status",
+        "type",
+        "cpoe",
+        "cpoe_outpatient_clinic",
+    )
+
+    def __init__(self, segment: Segment):
+        self.id = segment.id
+        self.description = segment.description
+        self.status = segment.status
+        self.type = segment.type
+        self.cpoe = segment.cpoe
+        self.cpoe_outpatient_clinic = segment.cpoe_outpatient_clinic
+
+
+# segments are maintained by the integration and almost never change
+_segment_cache = VersionedCache(check_interval=60)
 
+
+def get_segment_metadata(id_segment: int) -> SegmentMetadata | None:
+    """Cached segment data (cpoe flag, type)"""
     if not id_segment:
-        return False
+        return None
+
+    if not sessionutils.get_current_schema():
+        # no tenant to cache for: a single lookup
+        segment = db.session.get(Segment, id_segment)
+        return SegmentMetadata(segment=segment) if segment else None
+
+    return get_all_segment_metadata().get(id_segment, None)
+
+
+def get_all_segment_metadata() -> dict[int, SegmentMetadata]:
+    """Cached segment data of the current schema, by segment id"""
+    schema = sessionutils.get_current_schema()
+    if not schema:
+        return _load_segment_metadata()
+
+    return _segment_cache.get(
+        schema, load=_load_segment_metadata, version=_get_segment_version
+    )
+
+
+def _get_segment_version():
+    return tuple(
+        tuple(s)
+        for s in db.session.query(
+            Segment.id,
+            Segment.description,
+            Segment.status,
+            Segment.type,
+            Segment.cpoe,
+            Segment.cpoe_outpatient_clinic,
+        )
+        .order_by(Segment.id)
+        .all()
+    )
+
+
+def _load_segment_metadata() -> dict[int, SegmentMetadata]:
+    return {s.id: SegmentMetadata(segment=s) for s in db.session.query(Segment).all()}
+
+
+def is_cpoe(id_segment: int):
+    """Check if segment is cpoe or not"""
 
-    segment = db.session.query(Segment).filter(Segment.id == id_segment).first()
+    segment = get_segment_metadata(id_segment)
 
     if not segment:
         return False
@@ -78,8 +146,7 @@ def get_ignored_segments(is_cpoe_flag: bool):
     if ignore_non_cpoe_segments:
         # ignore non cpoe segments
         ignore_segments = []
-        segments = get_segments()
-        for s in segments:
+        for s in get_all_segment_metadata().values():
             if not s.cpoe:
                 ignore_segments.append(s.id)
 
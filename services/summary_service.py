@@ -1,7 +1,7 @@
 import json
+from datetime import timedelta
 
-from sqlalchemy import asc, between, desc, func, text
-from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy import func, text
 
 from decorators.has_permission_decorator import Permission, has_permission
 from decorators.timed_decorator import timed
@@ -136,156 +136,117 @@ def _get_summary_config(admission_number, mock):
     return result
 
 
+# summary annotations: result key -> (summary field, note date window)
+# windows are (reference note, days): days after the first note or before the last one
+_ANNOTATION_FIELDS = {
+    "reason": ("motivo", ("first", 4)),
+    "previousDrugs": ("medprevio", ("first", 1)),
+    "diagnosis": ("diagnostico", None),
+    "summary": ("resumo", ("last", 1)),
+    "dischargePlan": ("planoalta", ("last", 1)),
+    "procedures": ("procedimentos", None),
+    "exams": ("exames", None),
+    "dischargeCondition": ("condicaoalta", ("last", 1)),
+}
+
+ANNOTATIONS_FETCH_SIZE = 1000
+
+
 @timed()
 def _get_all_annotations(admission_number, field_suffix=""):
-    first = (
-        db.session.query(ClinicalNotes)
-        .filter(ClinicalNotes.admissionNumber == admission_number)
-        .order_by(asc(ClinicalNotes.date))
-        .first()
-    )
-    last = (
-        db.session.query(ClinicalNotes)
+    """Summary annotations of the admission notes, fetched in a single query"""
+    first_day = func.date(func.min(ClinicalNotes.date).over())
+    last_day = func.date(func.max(ClinicalNotes.date).over())
+
+    rows = (
+        db.session.query(
+            func.date(ClinicalNotes.date),
+            first_day,
+            last_day,
+            *[
+                ClinicalNotes.summary[field + field_suffix]
+                for field, _ in _ANNOTATION_FIELDS.values()
+            ],
+        )
         .filter(ClinicalNotes.admissionNumber == admission_number)
-        .order_by(desc(ClinicalNotes.date))
-        .first()
+        .order_by(ClinicalNotes.date)
+        .yield_per(ANNOTATIONS_FETCH_SIZE)
     )
 
-    if first == None:
-        empty = {"list": [], "value": ""}
+    return _get_annotations_result(_collect_annotations(rows))
 
-        reason = empty
-        previous_drugs = empty
-        diagnosis = empty
-        summary_annotation = empty
-        discharge_plan = empty
-        procedures = empty
-        exams = empty
-        discharge_condition = empty
-        clinical_summary = empty
-    else:
-        reason = _get_annotation(
-            admission_number=admission_number,
-            field="motivo" + field_suffix,
-            add=True,
-            interval="4 DAYS",
-            compare_date=first.date,
-        )
 
-        previous_drugs = _get_annotation(
-            admission_number=admission_number,
-            field="medprevio" + field_suffix,
-            add=True,
-            interval="1 DAY",
-            compare_date=first.date,
-        )
+def _collect_annotations(rows) -> dict | None:
+    """Unique values of each summary field within its date window (None without notes)"""
+    collected = None
 
-        diagnosis = _get_annotation(
-            admission_number=admission_number,
-            field="diagnostico" + field_suffix,
-            add=True,
-            interval=None,
-            compare_date=None,
-        )
+    for note_day, first_day, last_day, *values in rows:
+        if collected is None:
+            collected = {key: {} for key in _ANNOTATION_FIELDS}
 
-        summary_annotation = _get_annotation(
-            admission_number=admission_number,
-            field="resumo" + field_suffix,
-            add=False,
-            interval="1 DAY",
-            compare_date=last.date,
-        )
+        for (key, (_, window)), value in zip(_ANNOTATION_FIELDS.items(), values):
+            if not isinstance(value, list):
+                continue
 
-        discharge_plan = _get_annotation(
-            admission_number=admission_number,
-            field="planoalta" + field_suffix,
-            add=False,
-            interval="1 DAY",
-            compare_date=last.date,
-        )
+            if window is not None:
+                reference, days = window
+                if reference == "first":
+                    start, end = first_day, first_day + timedelta(days=days)
+                else:
+                    start, end = last_day - timedelta(days=days), last_day
 
-        procedures = _get_annotation(
-            admission_number=admission_number,
-            field="procedimentos" + field_suffix,
-            add=True,
-            interval=None,
-            compare_date=None,
-        )
+                if not start <= note_day <= end:
+                    continue
 
-        exams = _get_annotation(
-            admission_number=admission_number,
-            field="exames" + field_suffix,
-            add=True,
-            interval=None,
-            compare_date=None,
-        )
+            for item in value:
+                if item is not None:
+                    # jsonb_array_elements_text representation
+                    text_item = item if isinstance(item, str) else json.dumps(item)
+                    collected[key][text_item] = None
 
-        discharge_condition = _get_annotation(
-            admission_number=admission_number,
-            field="condicaoalta" + field_suffix,
-            add=False,
-            interval="1 DAY",
-            compare_date=last.date,
-        )
+    return collected
+
+
+def _get_annotations_result(collected: dict | None) -> dict:
+    if collected is None:
+        empty = {"list": [], "value": ""}
+
+        return {
+            "reason": empty,
+            "previousDrugs": empty,
+            "diagnosis": empty,
+            "clinicalSummary": empty,
+            "dischargePlan": empty,
+            "procedures": empty,
+            "exams": empty,
+            "dischargeCondition": empty,
+        }
+
+    annotations = {key: _get_annotation(values) for key, values in collected.items()}
+    reason = annotations["reason"]
+    procedures = annotations["procedures"]
+    summary_annotation = annotations.pop("summary")
 
-        clinical_summary = {}
-        clinical_summary["value"] = (
+    annotations["clinicalSummary"] = {
+        "value": (
             reason["value"]
             + ". "
             + procedures["value"]
             + ". "
             + summary_annotation["value"]
-        )[:1500]
-        clinical_summary["list"] = (
-            reason["list"] + procedures["list"] + summary_annotation["list"]
-        )
-
-    return {
-        "reason": reason,
-        "previousDrugs": previous_drugs,
-        "diagnosis": diagnosis,
-        "clinicalSummary": clinical_summary,
-        "dischargePlan": discharge_plan,
-        "procedures": procedures,
-        "exams": exams,
-        "dischargeCondition": discharge_condition,
+        )[:1500],
+        "list": reason["list"] + procedures["list"] + summary_annotation["list"],
     }
 
+    return annotations
 
-def _get_annotation(admission_number, field, add, interval, compare_date):
-    query = (
-        db.session.query(func.jsonb_array_elements_text(ClinicalNotes.summary[field]))
-        .select_from(ClinicalNotes)
-        .filter(ClinicalNotes.admissionNumber == admission_number)
-    )
-
-    if compare_date:
-        if add:
-            query = query.filter(
-                between(
-                    func.date(ClinicalNotes.date),
-                    func.date(compare_date),
-                    func.date(compare_date) + func.cast(interval, INTERVAL),
-                )
-            )
-        else:
-            query = query.filter(
-                between(
-                    func.date(ClinicalNotes.date),
-                    func.date(compare_date) - func.cast(interval, INTERVAL),
-                    func.date(compare_date),
-                )
-            )
-
-    results = query.order_by(ClinicalNotes.date).all()
 
-    uniqueList = set()
-    for i in results:
-        uniqueList.add(i[0])
+def _get_annotation(values):
+    uniqueList = list(values)
 
     return {
         "value": ". ".join(uniqueList)[:2000].replace("\\", "").replace('"', '\\"'),
-        "list": list(uniqueList),
+        "list": uniqueList,
     }
 
 
@@ -12,9 +12,9 @@ from models.appendix import MeasureUnit
 from models.enums import DefaultMeasureUnitEnum
 from models.main import DrugAttributes, User, db
 from models.requests.drug_request import DrugUnitConversionRequest
-from models.segment import Segment
 from repository import unit_conversion_repository
 from services import drug_service as main_drug_service
+from services import segment_service
 from services.admin import admin_drug_service
 from utils import aws, status
 
@@ -207,7 +207,7 @@ def save_conversions(
 
     # update all segments
     updated_segments = []
-    segments = db.session.query(Segment).all()
+    segments = segment_service.get_all_segment_metadata().values()
 
     for s in segments:
         updated_segments.append(s.description)
@@ -19,7 +19,7 @@ from models.enums import (
 from models.main import User, UserAuthorization, db
 from repository import user_attribute_repository, user_repository
 from security.role import Role
-from services import feature_service, memory_service, user_service
+from services import auth_service, feature_service, memory_service, user_service
 from utils import emailutils, status
 
 
@@ -317,6 +317,9 @@ def upsert_user(data: dict, user_context: User, user_permissions: list[Permissio
     db.session.add(updated_user)
     db.session.flush()
 
+    # deactivation and role changes must reach token refresh
+    auth_service.invalidate_refresh_user(updated_user.id)
+
     # authorizations
     _add_authorizations(
         id_segment_list=id_segment_list,
@@ -1,5 +1,6 @@
 """INTERNAL FUNCTIONS"""
 
+import json
 from datetime import datetime
 
 from services import (
@@ -46,6 +47,91 @@ def prescalc(event: dict, context: any):
     )
 
 
+def prescalc_batch(event: dict, context: any):
+    """
+    Prescalc batch: runs prescalc for many prescriptions in one invocation
+
+    Accepts {"prescriptions": [{"schema", "id_prescription", "force"}, ...]} or an
+    SQS batch whose message bodies are prescalc events. Prescriptions are grouped
+    by schema, so each group shares one static context, session and schema check.
+    """
+
+    items = _get_prescalc_batch_items(event)
+
+    groups = {}
+    for item in items:
+        groups.setdefault((item["schema"], item["force"]), []).append(item)
+
+    logger.backend_logger.warning(
+        "prescalc_batch: %s prescriptions | %s schemas", len(items), len(groups)
+    )
+
+    def _prescalc_batch_operation(user_context, schema, id_prescription_list, force):
+        return prescription_agg_service.create_agg_prescription_by_prescription_list(
+            schema=schema,
+            id_prescription_list=id_prescription_list,
+            force=force,
+            user_context=user_context,
+        )
+
+    results = []
+    failures = []
+    for (schema, force), group in groups.items():
+        params = {
+            "schema": schema,
+            "id_prescription_list": [item["id_prescription"] for item in group],
+            "force": force,
+        }
+
+        response = json.loads(
+            execute_with_static_context(
+                schema=schema, operation_func=_prescalc_batch_operation, params=params
+            )
+        )
+
+        if response["status"] == "success":
+            failed_ids = {
+                r["id_prescription"]
+                for r in response["data"]
+                if r["status"] != "success"
+            }
+        else:
+            failed_ids = set(params["id_prescription_list"])
+
+        failures.extend(
+            item["message_id"]
+            for item in group
+            if item["id_prescription"] in failed_ids and item["message_id"]
+        )
+        results.append({"schema": schema, "response": response})
+
+    if "Records" in event:
+        # SQS partial batch response: only failed messages are retried
+        return {"batchItemFailures": [{"itemIdentifier": m} for m in failures]}
+
+    return json.dumps(results)
+
+
+def _get_prescalc_batch_items(event: dict) -> list[dict]:
+    if "Records" in event:
+        events = [
+            (json.loads(record.get("body", "{}")), record.get("messageId"))
+            for record in event["Records"]
+        ]
+    else:
+        events = [(item, None) for item in event.get("prescriptions", [])]
+
+    return [
+        {
+            "schema": e.get("schema", None),
+            "id_prescription": e.get("id_prescription", None),
+            "force": e.get("force", False),
+            "message_id": message_id,
+        }
+        for e, message_id in events
+    ]
+
+
 def atendcalc(event: dict, context: any):
     # def atendcalc(schema: str, admission_number: int, str_date: str):
     """
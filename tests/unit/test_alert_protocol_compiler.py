@@ -0,0 +1,179 @@
+"""Test: compiled protocol triggers"""
+
+from unittest.mock import patch
+
+import pytest
+
+from models.prescription import Patient, Prescription
+from tests.utils import utils_test_prescription
+from utils import alert_protocol_compiler
+from utils.alert_protocol import AlertProtocol
+
+
+def _variable(name: str, value: str, message: dict = None):
+    variable = {
+        "name": name,
+        "field": "substance",
+        "operator": "IN",
+        "value": [value],
+    }
+    if message:
+        variable["message"] = message
+
+    return variable
+
+
+def _alert_protocol():
+    drug_list = [
+        utils_test_prescription.get_prescription_drug_mock_row(
+            id_prescription_drug=1, dose=10, drug_name="Drug A", sctid="111111"
+        ),
+    ]
+
+    return AlertProtocol(
+        drugs=drug_list,
+        exams={},
+        prescription=Prescription(),
+        patient=Patient(),
+        cn_stats={},
+    )
+
+
+def test_short_circuit_skips_variables():
+    """Protocolos: variáveis que não alteram o gatilho não são avaliadas"""
+    protocol = {
+        "variables": [
+            _variable("v1", "NOT_EXISTENT"),
+            _variable("v2", "111111"),
+        ],
+        "trigger": "{{v1}} and {{v2}}",
+        "result": {"message": "result"},
+    }
+    alert_protocol = _alert_protocol()
+
+    with patch.object(
+        alert_protocol, "_fill_variable", wraps=alert_protocol._fill_variable
+    ) as fill_variable:
+        assert alert_protocol.get_protocol_alerts(protocol=protocol) is None
+
+    assert fill_variable.call_count == 1
+
+
+def test_active_protocol_evaluates_every_variable():
+    """Protocolos: protocolo ativo mantém mensagens de todas as variáveis"""
+    protocol = {
+        "variables": [
+            _variable("v1", "111111"),
+            _variable("v2", "NOT_EXISTENT", message={"if": False, "then": "msg"}),
+        ],
+        "trigger": "{{v1}} or {{v2}}",
+        "result": {"message": "result"},
+    }
+
+    result = _alert_protocol().get_protocol_alerts(protocol=protocol)
+
+    assert result == {
+        "message": "result",
+        "variableMessages": ["msg"],
+        "related_items": [],
+    }
+
+
+def test_compiled_protocol_is_cached_by_key():
+    """Protocolos: gatilho compilado uma vez por (id, updated_at)"""
+    protocol = {
+        "variables": [_variable("v1", "111111")],
+        "trigger": "{{v1}}",
+        "result": {"message": "result"},
+    }
+    cache_key = ("test_compiled_protocol_is_cached_by_key", 1)
+
+    first = alert_protocol_compiler.compile_protocol(protocol, cache_key=cache_key)
+    second = alert_protocol_compiler.compile_protocol(protocol, cache_key=cache_key)
+
+    assert first is second
+    assert alert_protocol_compiler.compile_protocol(protocol) is not first
+
+
+@pytest.mark.parametrize(
+    "trigger",
+    [
+        "{{v1}} and __import__('os')",
+        "{{v1}} and {{v9}}",
+        "{{v1}} + 1",
+        "{{v1}} " + "and True " * 100,
+        "()",
+        "",
+    ],
+)
+def test_unsafe_trigger(trigger):
+    """Protocolos: gatilhos inválidos são rejeitados"""
+    protocol = {
+        "variables": [_variable("v1", "111111")],
+        "trigger": trigger,
+        "result": {"message": "result"},
+    }
+
+    with pytest.raises(ValueError):
+        _alert_protocol().get_protocol_alerts(protocol=protocol)
+
+
+def test_unsupported_field():
+    """Protocolos: campo não suportado"""
+    protocol = {
+        "variables": [{"name": "v1", "field": "invalid", "operator": "=", "value": 1}],
+        "trigger": "{{v1}}",
+        "result": {"message": "result"},
+    }
+
+    with pytest.raises(NotImplementedError):
+        _alert_protocol().get_protocol_alerts(protocol=protocol)
+
+
+def test_trace_evaluates_every_variable():
+    """Protocolos: trace continua avaliando todas as variáveis"""
+    protocol = {
+        "variables": [
+            _variable("v1", "NOT_EXISTENT"),
+            _variable("v2", "111111"),
+        ],
+        "trigger": "{{v1}} and {{v2}}",
+        "result": {"message": "result"},
+    }
+
+    trace = _alert_protocol().evaluate_with_trace(protocol=protocol)
+
+    assert trace["activated"] is False
+    assert trace["substituted_trigger"] == "False and True"
+    assert [v.name for v in trace["variables"]] == ["v1", "v2"]
+
+
+@pytest.mark.parametrize(
+    "trigger, required_keys",
+    [
+        ("{{v1}}", {("substance", "111111")}),
+        ("{{v1}} and {{v3}}", {("substance", "111111"), ("class", "J1")}),
+        ("{{v1}} or {{v3}}", {("substance", "111111"), ("class", "J1")}),
+        ("{{v1}} and {{v2}}", {("substance", "111111")}),
+        ("{{v1}} or {{v2}}", None),
+        ("not {{v1}}", None),
+        ("{{v2}}", None),
+    ],
+)
+def test_required_keys(trigger, required_keys):
+    """Protocolos: chaves necessárias para o protocolo disparar"""
+    protocol = {
+        "variables": [
+            _variable("v1", "111111"),
+            {"name": "v2", "field": "age", "operator": ">", "value": 18},
+            {"name": "v3", "field": "class", "operator": "IN", "value": ["J1"]},
+        ],
+        "trigger": trigger,
+        "result": {"message": "result"},
+    }
+
+    compiled = alert_protocol_compiler.compile_protocol(protocol)
+
+    assert compiled.required_keys == (
+        frozenset(required_keys) if required_keys is not None else None
+    )
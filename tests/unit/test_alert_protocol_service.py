@@ -68,6 +68,8 @@ def _protocol(id: int, protocol_type: ProtocolTypeEnum):
         id=id,
         protocol_type=protocol_type.value,
         config={"id": id},
+        created_at=None,
+        updated_at=None,
     )
 
 
@@ -91,7 +93,7 @@ class _FakeAlertProtocol:
         self.kwargs = kwargs
         _FakeAlertProtocol.instances.append(self)
 
-    def get_protocol_alerts(self, protocol: dict):
+    def get_protocol_alerts(self, protocol: dict, cache_key=None):
         alert = _FakeAlertProtocol.alerts_by_protocol.get(protocol.get("id"))
 
         # the real engine returns a fresh dict per call; copy so the service
@@ -427,3 +429,102 @@ class TestFindProtocolsResults:
 
         assert result == {"items": [], "summary": []}
         assert fake_engine.instances == []
+
+
+def _substance_protocol(id: int, sctid: str, trigger: str = "{{v1}}"):
+    """Build an active protocol that needs the given substance to fire."""
+    protocol = _protocol(id, ProtocolTypeEnum.PRESCRIPTION_ALL)
+    protocol.config = {
+        "id": id,
+        "variables": [
+            {"name": "v1", "field": "substance", "operator": "IN", "value": [sctid]},
+            {"name": "v2", "field": "age", "operator": ">", "value": 18},
+        ],
+        "trigger": trigger,
+        "result": {"message": "fired"},
+    }
+
+    return protocol
+
+
+class TestFindProtocolsPreFilter:
+    """alert_protocol_service.find_protocols — protocol pre-filtering
+
+    Protocols that need a substance, class or drug the group does not have can
+    never fire, so the engine is not even asked about them.
+    """
+
+    def test_protocol_without_matching_substance_is_not_evaluated(
+        self, fake_engine
+    ):
+        """A protocol requiring an absent substance never reaches the engine"""
+        result, _ = _run(
+            protocols=[_substance_protocol(1, sctid="999999")],
+            drug_list=[_drug(1)],
+            prescription=_prescription(agg=False),
+        )
+
+        assert fake_engine.instances == []
+        assert result["2024-03-10"] == []
+        assert result["summary"] == []
+
+    def test_protocol_with_matching_substance_is_evaluated(self, fake_engine):
+        """The substance of the first drug (111111) keeps the protocol"""
+        fake_engine.alerts_by_protocol = {1: {"message": "fired"}}
+
+        result, _ = _run(
+            protocols=[
+                _substance_protocol(1, sctid="111111"),
+                _substance_protocol(2, sctid="999999"),
+            ],
+            drug_list=[_drug(1)],
+            prescription=_prescription(agg=False),
+        )
+
+        assert len(fake_engine.instances) == 1
+        assert result["summary"] == [1]
+
+    def test_protocol_that_can_fire_without_the_substance_is_evaluated(
+        self, fake_engine
+    ):
+        """An "or" with another field keeps the protocol, whatever the substance"""
+        result, _ = _run(
+            protocols=[
+                _substance_protocol(1, sctid="999999", trigger="{{v1}} or {{v2}}")
+            ],
+            drug_list=[_drug(1)],
+            prescription=_prescription(agg=False),
+        )
+
+        assert len(fake_engine.instances) == 1
+
+
+class TestCacheKey:
+    """The compiled trigger cache is keyed by the protocol version."""
+
+    def test_never_edited_protocol_uses_created_at(self):
+        """Protocols only inserted (no updated_at) are cached by created_at"""
+        protocol = _protocol(1, ProtocolTypeEnum.PRESCRIPTION_ALL)
+        protocol.created_at = datetime(2024, 1, 1)
+
+        assert alert_protocol_service._get_cache_key(protocol) == (
+            1,
+            datetime(2024, 1, 1),
+        )
+
+    def test_edited_protocol_uses_updated_at(self):
+        """An edit changes the key"""
+        protocol = _protocol(1, ProtocolTypeEnum.PRESCRIPTION_ALL)
+        protocol.created_at = datetime(2024, 1, 1)
+        protocol.updated_at = datetime(2024, 2, 1)
+
+        assert alert_protocol_service._get_cache_key(protocol) == (
+            1,
+            datetime(2024, 2, 1),
+        )
+
+    def test_protocol_without_dates_is_not_cached(self):
+        """Without any date there is no key"""
+        protocol = _protocol(1, ProtocolTypeEnum.PRESCRIPTION_ALL)
+
+        assert alert_protocol_service._get_cache_key(protocol) is None
@@ -0,0 +1,97 @@
+"""Unit tests for utils.alert_texts (texts must match the legacy alert texts)."""
+
+import re
+
+import pytest
+
+from models.enums import DrugAlertTypeEnum
+from utils import alert_texts
+
+
+def _legacy_cleanup(text: str) -> str:
+    """Cleanup applied to every alert text before the registry"""
+    text = re.sub(" {2,}", "", text)
+    return re.sub("\n", "", text)
+
+
+@pytest.mark.parametrize(
+    "alert_type, name, params, expected",
+    [
+        (
+            DrugAlertTypeEnum.KIDNEY,
+            "dialysis_continuous",
+            {},
+            "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o paciente está em diálise contínua.",
+        ),
+        (
+            DrugAlertTypeEnum.KIDNEY,
+            "ckd",
+            {"ckd": 30.5, "kidney": 60},
+            "Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente (30.5 mL/min) está abaixo de 60 mL/min.",
+        ),
+        (
+            DrugAlertTypeEnum.KIDNEY,
+            "schwartz2",
+            {"value": 40, "kidney": 60},
+            "Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente(40 mL/min/1.73m²) está abaixo de60 mL/min. (Schwartz 2)",
+        ),
+        (
+            DrugAlertTypeEnum.PLATELETS,
+            "platelets",
+            {"value": 50000, "platelets": 100000},
+            "Medicamento contraindicado para paciente com plaquetas (50000 plaquetas/µL)abaixo de 100000 plaquetas/µL.",
+        ),
+        (
+            DrugAlertTypeEnum.MAX_TIME,
+            "max_time",
+            {"period": 20, "max_time": 14},
+            "Tempo de tratamento atual (20 dias) maior que o tempo máximo de tratamento (14 dias) usualmente recomendado.",
+        ),
+        (
+            DrugAlertTypeEnum.MAX_DOSE,
+            "dose_weight",
+            {"dose": "2,50", "max_dose": "2,00", "unit": "mg"},
+            "Dose diária prescrita (2,50 mg/Kg)maior que a dose de alerta(2,00 mg/Kg)usualmente recomendada (considerada a dose diária independente da indicação).",
+        ),
+        (
+            DrugAlertTypeEnum.MAX_DOSE_PLUS,
+            "dose",
+            {"dose": 200.0, "max_dose": 100.0, "unit": "mg"},
+            'Dose diária prescrita SOMADA (200.0 mg) maior que adose de alerta (100.0 mg)usualmente recomendada (Frequência "AGORA" não é considerada no cálculo).',
+        ),
+        (
+            DrugAlertTypeEnum.LACTATING,
+            "high_risk",
+            {},
+            "Paciente amamentando com medicamento classificado como Alto risco prescrito.Avaliar manutenção deste medicamento com a equipe médica ou cessação da amamentação.",
+        ),
+        (
+            DrugAlertTypeEnum.TUBE,
+            "tube",
+            {"route": "SONDA"},
+            "Medicamento contraindicado via sonda (SONDA)",
+        ),
+    ],
+)
+def test_render_matches_legacy_texts(alert_type, name, params, expected):
+    """Alertas: textos do registro iguais aos textos anteriores"""
+    assert alert_texts.render(alert_type, name, **params) == expected
+
+
+@pytest.mark.parametrize(
+    "alert_type, name",
+    [
+        (alert_type, name)
+        for alert_type, texts in alert_texts.ALERT_TEXTS.items()
+        for name in texts
+    ],
+)
+@pytest.mark.parametrize("value", ["10", " SONDA ", "a  b", "linha\nquebrada", ""])
+def test_render_equals_legacy_cleanup(alert_type, name, value):
+    """Alertas: template normalizado equivale à limpeza do texto completo"""
+    template = alert_texts.ALERT_TEXTS[alert_type][name]
+    params = {key: value for key in re.findall(r"\{(\w+)\}", template)}
+
+    assert alert_texts.render(alert_type, name, **params) == _legacy_cleanup(
+        template.format(**params)
+    )
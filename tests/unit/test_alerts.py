@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from unittest.mock import patch
+
 import pytest
 
 from models.appendix import Frequency
@@ -927,3 +929,88 @@ def test_fasting():
     assert alert1[0].get("level", None) == "medium"
 
     assert stats.get("fasting", 0) == 1
+
+
+def test_alert_text_only_rendered_for_flagged_items():
+    """Alertas: textos gerados apenas para os itens sinalizados pela verificação em lote"""
+    drugs = [
+        utils_test_prescription.get_prescription_drug_mock_row(
+            id_prescription_drug=i, dose=10, frequency=1, max_dose=5 if i == 3 else 1000
+        )
+        for i in range(1, 51)
+    ]
+
+    with patch.object(
+        alert_service, "_alert_max_dose", wraps=alert_service._alert_max_dose
+    ) as alert_max_dose:
+        alerts = alert_service.find_alerts(
+            drug_list=drugs,
+            exams={"age": 50, "weight": 80},
+            dialisys=None,
+            pregnant=None,
+            lactating=None,
+            schedules_fasting=None,
+            cn_data=None,
+            protocols=None,
+            is_cpoe=False,
+        )
+
+    assert alert_max_dose.call_count == 1
+    assert alerts["stats"]["maxDose"] == 1
+
+
+def test_alert_order_per_item():
+    """Alertas: ordem dos alertas de cada item é mantida"""
+    drugs = [
+        utils_test_prescription.get_prescription_drug_mock_row(
+            id_prescription_drug=1,
+            dose=10,
+            frequency=1,
+            max_dose=5,
+            kidney=90,
+            allergy="S",
+        )
+    ]
+
+    alerts = alert_service.find_alerts(
+        drug_list=drugs,
+        exams={"age": 50, "weight": 80, "ckd": {"value": 30}},
+        dialisys=None,
+        pregnant=None,
+        lactating=None,
+        schedules_fasting=None,
+        cn_data=None,
+        protocols=[{"related_items": [1], "message": "protocolo", "level": "high"}],
+        is_cpoe=False,
+    )
+
+    assert [a["type"] for a in alerts["alerts"]["1"]] == [
+        "protocol",
+        "kidney",
+        "allergy",
+        "maxDose",
+    ]
+    assert [a["handling"] for a in alerts["alerts"]["1"]] == [False] * 4
+
+
+def test_max_dose_without_weight_exam():
+    """Alertas: peso só é lido quando algum item tem dose por kg"""
+    drugs = [
+        utils_test_prescription.get_prescription_drug_mock_row(
+            id_prescription_drug=1, dose=10, frequency=66, max_dose=5
+        )
+    ]
+
+    alerts = alert_service.find_alerts(
+        drug_list=drugs,
+        exams={"age": 50},
+        dialisys=None,
+        pregnant=None,
+        lactating=None,
+        schedules_fasting=None,
+        cn_data=None,
+        protocols=None,
+        is_cpoe=False,
+    )
+
+    assert alerts["stats"]["maxDose"] == 1
@@ -1,5 +1,6 @@
 from typing import List
 
+from services import alert_interaction_service
 from services.alert_interaction_service import find_relations
 from tests.utils import utils_test_prescription
 
@@ -468,3 +469,65 @@ def test_find_relations_drug_interaction_kind_dm_freq_now(monkeypatch):
     assert results["stats"]["iy"] == 0
     assert results["stats"]["sl"] == 0
     assert results["stats"]["rx"] == 0
+
+
+def _mock_relation_catalog(monkeypatch, version_calls: list, load_calls: list):
+    catalog = {
+        211111: {
+            111111: (("it", "Drug A interacts with Drug B", "high"),),
+            311111: (("dt", "Drug A duplicates Drug C", None),),
+        }
+    }
+
+    def version():
+        version_calls.append(1)
+        return (2, None)
+
+    def load():
+        load_calls.append(1)
+        return catalog
+
+    monkeypatch.setattr(
+        "services.alert_interaction_service._relation_catalog",
+        alert_interaction_service.VersionedCache(check_interval=60),
+    )
+    monkeypatch.setattr(
+        "services.alert_interaction_service._get_relation_catalog_version", version
+    )
+    monkeypatch.setattr(
+        "services.alert_interaction_service._load_relation_catalog", load
+    )
+
+
+def test_get_active_relations_from_catalog(monkeypatch):
+    """Alertas interação: relações ativas vêm do catálogo em memória"""
+    version_calls, load_calls = [], []
+    _mock_relation_catalog(monkeypatch, version_calls, load_calls)
+
+    relations = alert_interaction_service._get_active_relations(
+        sctids_from={211111, 111111}, sctids_to={211111, 111111}
+    )
+
+    assert relations == {
+        "211111-111111-it": {
+            "sctida": 211111,
+            "sctidb": 111111,
+            "kind": "it",
+            "text": "Drug A interacts with Drug B",
+            "level": "high",
+        }
+    }
+
+
+def test_get_active_relations_catalog_is_loaded_once(monkeypatch):
+    """Alertas interação: o catálogo é carregado uma vez por processo"""
+    version_calls, load_calls = [], []
+    _mock_relation_catalog(monkeypatch, version_calls, load_calls)
+
+    for _ in range(5):
+        alert_interaction_service._get_active_relations(
+            sctids_from={211111}, sctids_to={311111}
+        )
+
+    assert len(load_calls) == 1
+    assert len(version_calls) == 1
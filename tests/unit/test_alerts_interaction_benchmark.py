@@ -0,0 +1,82 @@
+"""Benchmark: alert_interaction_service.find_relations on large prescriptions
+
+Items share a small set of substances (as CPOE admissions do) and only a few
+substance pairs have a known relation, so the work must scale with the related
+pairs, not with every overlapping pair.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import alert_interaction_service
+from tests.utils import utils_test_prescription
+
+SUBSTANCES = 20
+
+
+def _drug_list(size: int):
+    start = datetime.now() - timedelta(days=1)
+    drug_list = []
+    for i in range(size):
+        row = utils_test_prescription.get_prescription_drug_mock_row(
+            id_prescription_drug=i + 1,
+            dose=10,
+            drug_name=f"Drug {i}",
+            sctid=str(1000 + i % SUBSTANCES),
+            expire_date=start + timedelta(days=2),
+        )
+        drug_list.append(row._replace(prescription_date=start))
+
+    return drug_list
+
+
+def _active_relations(*args, **kwargs):
+    # relations between consecutive substances only
+    relations = {}
+    for i in range(0, SUBSTANCES, 2):
+        a, b = 1000 + i, 1000 + i + 1
+        relations[f"{a}-{b}-it"] = {
+            "sctida": str(a),
+            "sctidb": str(b),
+            "kind": "it",
+            "text": "interaction",
+            "level": "low",
+        }
+
+    return relations
+
+
+@pytest.mark.parametrize("size", [20, 80, 200])
+def test_find_relations_benchmark(monkeypatch, size):
+    """Benchmark interações: find_relations com 20/80/200 itens"""
+    calls = []
+
+    def _relations(*args, **kwargs):
+        calls.append(kwargs)
+        return _active_relations()
+
+    monkeypatch.setattr(alert_interaction_service, "_get_allergies", lambda **_: [])
+    monkeypatch.setattr(alert_interaction_service, "_get_active_relations", _relations)
+
+    drug_list = _drug_list(size)
+
+    start = time.perf_counter()
+    results = alert_interaction_service.find_relations(
+        drug_list, id_patient=1, is_cpoe=True
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"find_relations {size} items: {elapsed * 1000:.1f}ms")
+
+    # a single relation query with the distinct substances
+    assert len(calls) == 1
+    assert len(calls[0]["sctids_from"]) == min(size, SUBSTANCES)
+
+    # every item of a related substance gets an alert
+    assert len(results["alerts"]) == size
+    # cpoe counts each related substance pair once
+    assert results["stats"]["it"] == SUBSTANCES // 2
+
+    assert elapsed < 1
@@ -0,0 +1,115 @@
+"""Unit tests for the token refresh cache in services.auth_service."""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from exception.validation_error import ValidationError
+from mobile import app
+from models.enums import IntegrationStatusEnum
+from models.main import User
+from services import auth_service
+from services.admin import admin_integration_status_service
+
+CLAIMS = {"schema": "demo", "config": {}}
+
+
+def _user(active=True, roles=None):
+    user = User()
+    user.id = 1
+    user.active = active
+    user.config = {"roles": roles if roles is not None else ["PRESCRIPTION_ANALYST"]}
+
+    return user
+
+
+@contextmanager
+def _refresh_env(user, ttl=60, integration_status=IntegrationStatusEnum.PRODUCTION):
+    auth_service._refresh_users.invalidate()
+    admin_integration_status_service._integration_status.invalidate()
+
+    query = MagicMock()
+    query.return_value.filter.return_value.first.return_value = user
+
+    with (
+        app.app_context(),
+        patch.object(auth_service.db.session, "query", query),
+        patch.object(auth_service.Config, "AUTH_CACHE_TTL", ttl),
+        patch.object(auth_service._refresh_users, "ttl", ttl),
+        patch.object(admin_integration_status_service._integration_status, "ttl", ttl),
+        patch.object(
+            admin_integration_status_service,
+            "get_integration_status",
+            return_value=integration_status.value,
+        ) as get_status,
+        patch.object(auth_service, "create_access_token", return_value="token"),
+    ):
+        yield query, get_status
+
+    auth_service._refresh_users.invalidate()
+    admin_integration_status_service._integration_status.invalidate()
+
+
+def test_refresh_reuses_user_state_and_status():
+    """Refresh consecutivo não consulta o banco novamente"""
+    with _refresh_env(_user()) as (query, get_status):
+        for _ in range(3):
+            assert auth_service.refresh_token("1", CLAIMS) == {"access_token": "token"}
+
+    assert query.call_count == 1
+    assert get_status.call_count == 1
+
+
+def test_refresh_without_cache_ttl():
+    """Sem AUTH_CACHE_TTL cada refresh consulta o banco"""
+    with _refresh_env(_user(), ttl=0) as (query, get_status):
+        for _ in range(2):
+            auth_service.refresh_token("1", CLAIMS)
+
+    assert query.call_count == 2
+    assert get_status.call_count == 2
+
+
+def test_invalidate_refresh_user_reloads_the_user():
+    """Desativação do usuário invalida o cache do refresh"""
+    user = _user()
+
+    with _refresh_env(user) as (query, _):
+        auth_service.refresh_token("1", CLAIMS)
+
+        user.active = False
+        auth_service.invalidate_refresh_user(1)
+
+        # not committed yet: the cached state is kept
+        auth_service.refresh_token("1", CLAIMS)
+        assert query.call_count == 1
+
+        auth_service.db.session.commit()
+
+        with pytest.raises(ValidationError) as exc_info:
+            auth_service.refresh_token("1", CLAIMS)
+
+    assert str(exc_info.value) == "Usuário inativo"
+    assert query.call_count == 2
+
+
+def test_rollback_discards_the_invalidation():
+    """Rollback descarta a invalidação pendente"""
+    with _refresh_env(_user()) as (query, _):
+        auth_service.refresh_token("1", CLAIMS)
+        auth_service.db.session.begin()
+        auth_service.invalidate_refresh_user(1)
+        auth_service.db.session.rollback()
+        auth_service.db.session.commit()
+
+        auth_service.refresh_token("1", CLAIMS)
+
+    assert query.call_count == 1
+
+
+def test_canceled_integration_blocks_refresh():
+    """Integração cancelada bloqueia o refresh (status em cache)"""
+    with _refresh_env(_user(), integration_status=IntegrationStatusEnum.CANCELED):
+        with pytest.raises(ValidationError):
+            auth_service.refresh_token("1", CLAIMS)
@@ -1,12 +1,16 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
 from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 
+from mobile import app
 from models.enums import NoHarmENV
 from models.main import redis_cert_reqs
-from services import cache_service
+from services import cache_service, clinical_notes_service, exams_service
 
 
 @pytest.fixture
@@ -84,3 +88,155 @@ def test_tolerate_failure_stops_at_the_first_failed_command():
             raise RedisConnectionError("unreachable")
 
     assert calls == [0]
+
+
+_PREFETCH_COMMANDS = [
+    ("get_by_key", "schema:1:dados"),
+    ("get_range", "schema:1:dialise", 3),
+    ("get_hgetall", "schema:1:exames"),
+]
+
+
+def test_prefetch_reads_every_key_in_one_round_trip(outside_test_env, redis_mock):
+    """Prefetched replies are consumed by the reads without new redis calls"""
+    pipe = redis_mock.json.return_value.pipeline.return_value
+    pipe.execute.return_value = [
+        {"peso": 70},
+        ['{"dtevolucao": "2024-01-01"}'],
+        {"Cr": '{"value": 1}'},
+    ]
+
+    with app.test_request_context():
+        cache_service.prefetch(_PREFETCH_COMMANDS)
+
+        assert cache_service.get_by_key("schema:1:dados") == {"peso": 70}
+        assert cache_service.get_range(key="schema:1:dialise", days_ago=3) == [
+            {"dtevolucao": "2024-01-01"}
+        ]
+        assert cache_service.get_hgetall(key="schema:1:exames") == {"Cr": {"value": 1}}
+
+    pipe.execute.assert_called_once()
+    redis_mock.json.return_value.get.assert_not_called()
+    redis_mock.zrangebyscore.assert_not_called()
+    redis_mock.hgetall.assert_not_called()
+
+
+def test_prefetched_reply_is_consumed_once(outside_test_env, redis_mock):
+    """A second read of the same key goes back to redis"""
+    redis_mock.json.return_value.pipeline.return_value.execute.return_value = [
+        {"peso": 70}
+    ]
+    redis_mock.json.return_value.get.return_value = {"peso": 80}
+
+    with app.test_request_context():
+        cache_service.prefetch([("get_by_key", "schema:1:dados")])
+
+        assert cache_service.get_by_key("schema:1:dados") == {"peso": 70}
+        assert cache_service.get_by_key("schema:1:dados") == {"peso": 80}
+
+
+@pytest.mark.parametrize(
+    "error", [RedisConnectionError("unreachable"), RedisTimeoutError("too slow")]
+)
+def test_prefetch_failure_degrades_to_none(outside_test_env, redis_mock, error):
+    """A failed pipeline resolves the prefetched reads to None without retrying"""
+    pipe = redis_mock.json.return_value.pipeline.return_value
+    pipe.execute.side_effect = error
+
+    with app.test_request_context():
+        cache_service.prefetch(_PREFETCH_COMMANDS)
+
+        assert cache_service.get_by_key("schema:1:dados") is None
+        assert cache_service.get_range(key="schema:1:dialise", days_ago=3) is None
+        assert cache_service.get_hgetall(key="schema:1:exames") is None
+
+    redis_mock.json.return_value.get.assert_not_called()
+    redis_mock.zrangebyscore.assert_not_called()
+    redis_mock.hgetall.assert_not_called()
+
+
+def test_replace_hash_rewrites_the_whole_key():
+    """The hash is deleted and rewritten in a single hset"""
+    pipe = MagicMock()
+
+    cache_service.replace_hash(
+        pipe, key="schema:1:exames", mapping={"CR": {"value": 1}, "K": {"value": 4}}
+    )
+
+    pipe.delete.assert_called_once_with("schema:1:exames")
+    pipe.hset.assert_called_once_with(
+        "schema:1:exames", mapping={"CR": '{"value": 1}', "K": '{"value": 4}'}
+    )
+
+
+def test_replace_sorted_set_without_members_only_deletes():
+    """Empty data clears the key without sending an empty zadd"""
+    pipe = MagicMock()
+
+    cache_service.replace_sorted_set(
+        pipe, key="schema:1:alergia", members=[], expire_in=60
+    )
+
+    pipe.delete.assert_called_once_with("schema:1:alergia")
+    pipe.zadd.assert_not_called()
+    pipe.expire.assert_not_called()
+
+
+def test_refresh_exams_cache_list_uses_one_pipeline():
+    """Many patients are refreshed with a single transactional round-trip"""
+    exams = {1: {"CR": {"value": 1}}, 2: {}}
+
+    with (
+        patch.object(cache_service, "redis_client", MagicMock()) as redis_mock,
+        patch.object(
+            exams_service,
+            "_get_exams_current_results",
+            side_effect=lambda id_patient, **kwargs: exams[id_patient],
+        ),
+    ):
+        exams_service.refresh_exams_cache_list.__wrapped__(
+            id_patient_list=[1, 2, 1], user_context=MagicMock(schema="schema")
+        )
+
+    redis_mock.pipeline.assert_called_once_with(transaction=True)
+    pipe = redis_mock.pipeline.return_value
+    assert [c.args[0] for c in pipe.delete.call_args_list] == [
+        "schema:1:exames",
+        "schema:2:exames",
+    ]
+    pipe.hset.assert_called_once_with("schema:1:exames", mapping={"CR": '{"value": 1}'})
+    pipe.execute.assert_called_once()
+
+
+def test_refresh_annotations_cache_list_uses_one_pipeline():
+    """Dialysis and allergies of many admissions are written in one round-trip"""
+    note = SimpleNamespace(
+        id=10,
+        date=datetime(2024, 1, 1, 10, 0, 0, 123),
+        annotations={"dialise": ["hd"], "allergiesComposed": ["dipirona"]},
+    )
+    repository = clinical_notes_service.clinical_notes_repository
+
+    with (
+        patch.object(cache_service, "redis_client", MagicMock()) as redis_mock,
+        patch.object(repository, "get_dialysis_cache", return_value=[note]),
+        patch.object(repository, "get_allergies_cache", return_value=[note]),
+    ):
+        clinical_notes_service.refresh_annotations_cache_list.__wrapped__(
+            admission_number_list=[1, 2], user_context=MagicMock(schema="schema")
+        )
+
+    pipe = redis_mock.pipeline.return_value
+    assert [c.args[0] for c in pipe.zadd.call_args_list] == [
+        "schema:1:dialise",
+        "schema:1:alergia",
+        "schema:2:dialise",
+        "schema:2:alergia",
+    ]
+    assert json.loads(next(iter(pipe.zadd.call_args_list[1].args[1]))) == {
+        "dtevolucao": "2024-01-01T10:00:00",
+        "fkevolucao": 10,
+        "lista": ["dipirona"],
+    }
+    assert pipe.zremrangebyscore.call_count == 2
+    pipe.execute.assert_called_once()
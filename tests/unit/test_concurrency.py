@@ -0,0 +1,108 @@
+"""Unit tests for utils.concurrency and the prescription view stage fan-out."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from flask import g
+
+from mobile import app
+from models.enums import AppFeatureFlagEnum
+from services import prescription_view_service
+from utils import concurrency, span_recorder
+
+
+@pytest.fixture
+def set_schema_mock():
+    with patch.object(concurrency.dbSession, "setSchema") as mock:
+        yield mock
+
+
+def test_returns_results_by_key(set_schema_mock):
+    """Every task result is returned under its own key"""
+    with app.test_request_context():
+        result = concurrency.run_concurrently(
+            tasks={"a": lambda: 1, "b": lambda: 2}, schema="demo"
+        )
+
+    assert result == {"a": 1, "b": 2}
+
+
+def test_each_worker_gets_the_tenant_schema(set_schema_mock):
+    """The worker session is bound to the tenant schema before the task runs"""
+    with app.test_request_context():
+        concurrency.run_concurrently(
+            tasks={"a": lambda: 1, "b": lambda: 2}, schema="demo"
+        )
+
+    assert set_schema_mock.call_count == 2
+    set_schema_mock.assert_called_with("demo")
+
+
+def test_workers_see_the_request_globals(set_schema_mock):
+    """Feature caches and claims stored on g are visible inside the workers"""
+    with app.test_request_context():
+        g.feature_flags = {"redisCache": True}
+
+        result = concurrency.run_concurrently(
+            tasks={"flags": lambda: g.get("feature_flags")}, schema="demo"
+        )
+
+    assert result["flags"] == {"redisCache": True}
+
+
+def test_workers_run_outside_the_calling_thread(set_schema_mock):
+    """Tasks run on pool threads, so each one has its own scoped session"""
+    with app.test_request_context():
+        result = concurrency.run_concurrently(
+            tasks={"thread": threading.get_ident}, schema="demo"
+        )
+
+    assert result["thread"] != threading.get_ident()
+
+
+def test_task_errors_reach_the_caller(set_schema_mock):
+    """An exception raised by a task is re-raised in the calling thread"""
+
+    def _fail():
+        raise ValueError("boom")
+
+    with app.test_request_context():
+        with pytest.raises(ValueError):
+            concurrency.run_concurrently(tasks={"a": _fail}, schema="demo")
+
+
+def test_requires_request_context():
+    """Outside a request there is nothing to copy into the workers"""
+    with pytest.raises(RuntimeError):
+        concurrency.run_concurrently(tasks={"a": lambda: 1}, schema="demo")
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_independent_stages_have_the_same_result(set_schema_mock, concurrent):
+    """Serial and concurrent execution produce identical results and spans"""
+    stages = {
+        "interventions": lambda: [{"id": 1}],
+        "clinical_notes_stats": lambda: {"cn_count": 1},
+        "exams": lambda: {"alerts": 0},
+        "last_dept": lambda: None,
+    }
+
+    with app.test_request_context():
+        g.feature_flags = {
+            AppFeatureFlagEnum.CONCURRENT_PRESCRIPTION_VIEW.value: concurrent
+        }
+
+        with span_recorder.record("view") as recorder:
+            result = prescription_view_service._run_independent_stages(
+                recorder=recorder, schema="demo", stages=stages
+            )
+
+    assert result == {
+        "interventions": [{"id": 1}],
+        "clinical_notes_stats": {"cn_count": 1},
+        "exams": {"alerts": 0},
+        "last_dept": None,
+    }
+    assert sorted(s.name for s in recorder.spans) == sorted(stages.keys())
+    assert set_schema_mock.call_count == (4 if concurrent else 0)
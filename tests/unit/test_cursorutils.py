@@ -0,0 +1,79 @@
+"""Unit tests for utils.cursorutils."""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, Date, Integer, MetaData, Table, create_engine, select
+
+from exception.validation_error import ValidationError
+from utils import cursorutils
+
+
+def test_cursor_round_trip():
+    """Cursor keeps the type of the sort values"""
+    values = [10, datetime(2024, 1, 2, 10, 30), date(2024, 1, 3), None, 123]
+
+    cursor = cursorutils.encode_cursor(values)
+
+    assert cursorutils.decode_cursor(cursor, size=5) == values
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "invalid",
+        "%%%",
+        cursorutils.encode_cursor([1, 2]),
+        cursorutils.encode_cursor([1, [2], 3]),
+        cursorutils.encode_cursor([1, {"x": 1}, 3]),
+    ],
+)
+def test_invalid_cursor(cursor):
+    """Invalid cursors are rejected as a bad request"""
+    with pytest.raises(ValidationError):
+        cursorutils.decode_cursor(cursor, size=3)
+
+
+def test_after_cursor_pages_every_row_once():
+    """Pages follow the descending (nulls first) order without gaps or repeats"""
+    table = Table(
+        "rows",
+        MetaData(),
+        Column("score", Integer, nullable=True),
+        Column("day", Date, nullable=False),
+        Column("id", Integer, primary_key=True),
+    )
+    engine = create_engine("sqlite://")
+    table.metadata.create_all(engine)
+
+    generator = random.Random(7)
+    rows = [
+        {
+            "score": generator.choice([None, 1, 2, 3]),
+            "day": date(2024, 1, 1) + timedelta(days=generator.randint(0, 2)),
+            "id": id,
+        }
+        for id in range(200)
+    ]
+
+    def sort_key(row):
+        # descending, nulls first
+        return (row["score"] is None, row["score"] or 0, row["day"], row["id"])
+
+    ordered = sorted(rows, key=sort_key, reverse=True)
+    columns = [table.c.score, table.c.day, table.c.id]
+
+    with engine.connect() as connection:
+        connection.execute(table.insert(), rows)
+
+        for position, row in enumerate(ordered):
+            cursor = cursorutils.decode_cursor(
+                cursorutils.encode_cursor([row["score"], row["day"], row["id"]]),
+                size=3,
+            )
+            after = connection.execute(
+                select(table.c.id).where(cursorutils.after_cursor(columns, cursor))
+            )
+
+            assert {r[0] for r in after} == {r["id"] for r in ordered[position + 1 :]}
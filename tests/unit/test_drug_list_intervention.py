@@ -7,11 +7,52 @@ bare ``DrugList`` via ``__new__`` and set only the attributes each method reads,
 avoiding the heavy database/feature-flag work in ``DrugList.__init__``.
 """
 
+import random
 from datetime import datetime
 
 from utils.drug_list import DrugList
 
 
+class LegacyInterventionLookup:
+    """Linear-scan lookups DrugList used before indexing the interventions."""
+
+    def __init__(self, interventions, admission_number):
+        self.interventions = interventions
+        self.admission_number = admission_number
+
+    def getPrevIntervention(self, idDrug, idPrescription):
+        result = {}
+        for i in self.interventions:
+            if (
+                i["idDrug"] == idDrug
+                and i["status"] == "s"
+                and int(i["idPrescription"]) < idPrescription
+                and i["admissionNumber"] == self.admission_number
+            ):
+                if "id" in result.keys() and int(result["id"]) > int(i["id"]):
+                    continue
+                result = i
+        return result
+
+    def getExistIntervention(self, idDrug, idPrescription):
+        for i in self.interventions:
+            if (
+                i["idDrug"] == idDrug
+                and int(i["idPrescription"]) < idPrescription
+                and i["admissionNumber"] == self.admission_number
+            ):
+                return True
+
+        return False
+
+    def getIntervention(self, idPrescriptionDrug):
+        result = {}
+        for i in self.interventions:
+            if int(i["id"]) == idPrescriptionDrug:
+                result = i
+        return result
+
+
 def _make_drug_list(interventions=None, drug_results=None, admission_number=111):
     """Build a DrugList without running the DB-heavy constructor.
 
@@ -214,3 +255,59 @@ class TestScheduleToArray:
         assert len(result) == 10
         # The most recent day (15) is kept, the oldest (day 1) is dropped.
         assert result[0][0] == "2024-01-15T08:00:00"
+
+
+def _same(result, expected):
+    """The very same intervention record (or both empty)."""
+    return result is expected or result == expected == {}
+
+
+class TestInterventionIndex:
+    """Tests for the intervention index behind the DrugList lookups."""
+
+    @staticmethod
+    def _random_interventions(generator, size):
+        return [
+            _intervention(
+                str(generator.randint(1, size // 2)),
+                id_drug=str(generator.randint(1, 5)),
+                status=generator.choice(["s", "0", "a"]),
+                id_prescription=str(generator.randint(1, 20)),
+                admission_number=generator.choice([111, 222]),
+            )
+            for _ in range(size)
+        ]
+
+    def test_lookups_match_the_linear_scan(self):
+        """Indexed lookups return the same interventions as the linear scan."""
+        generator = random.Random(11)
+
+        for _ in range(50):
+            interventions = self._random_interventions(generator, 60)
+            drug_list = _make_drug_list(interventions=interventions)
+            legacy = LegacyInterventionLookup(interventions, admission_number=111)
+
+            for id_drug in ["1", "2", "3", "4", "5", "6"]:
+                for id_prescription in range(0, 22):
+                    assert _same(
+                        drug_list.getPrevIntervention(id_drug, id_prescription),
+                        legacy.getPrevIntervention(id_drug, id_prescription),
+                    )
+                    assert drug_list.getExistIntervention(
+                        id_drug, id_prescription
+                    ) == legacy.getExistIntervention(id_drug, id_prescription)
+
+            for id_intervention in range(0, 32):
+                assert _same(
+                    drug_list.getIntervention(id_intervention),
+                    legacy.getIntervention(id_intervention),
+                )
+
+    def test_new_interventions_list_is_reindexed(self):
+        """Replacing the interventions list rebuilds the index."""
+        drug_list = _make_drug_list(interventions=[_intervention(1)])
+        assert drug_list.getIntervention(1)["id"] == 1
+
+        drug_list.interventions = [_intervention(2)]
+        assert drug_list.getIntervention(1) == {}
+        assert drug_list.getIntervention(2)["id"] == 2
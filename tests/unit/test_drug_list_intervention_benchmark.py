@@ -0,0 +1,67 @@
+"""Benchmark: DrugList intervention lookups on long admissions
+
+_process_drugs looks up the interventions of every prescription drug, so the
+lookups must not scan the whole interventions list once per drug.
+
+Timings are noisy on shared runners: run with RUN_BENCHMARKS=1. Parity with the
+linear scan is covered by test_drug_list_intervention.py.
+"""
+
+import os
+import random
+import time
+
+import pytest
+
+from tests.unit.test_drug_list_intervention import (
+    LegacyInterventionLookup,
+    _intervention,
+    _make_drug_list,
+)
+
+DRUGS = 200
+
+
+def _interventions(size: int):
+    generator = random.Random(size)
+
+    return [
+        _intervention(
+            str(id_intervention),
+            id_drug=str(generator.randint(1, DRUGS)),
+            status=generator.choice(["s", "0"]),
+            id_prescription=str(generator.randint(1, 100)),
+        )
+        for id_intervention in range(size)
+    ]
+
+
+def _lookup_all(lookup):
+    for id_drug in range(1, DRUGS + 1):
+        lookup.getPrevIntervention(str(id_drug), 101)
+        lookup.getExistIntervention(str(id_drug), 101)
+        lookup.getIntervention(id_drug)
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="benchmark: set RUN_BENCHMARKS=1"
+)
+@pytest.mark.parametrize("size", [50, 500, 5000])
+def test_intervention_lookup_benchmark(size):
+    """Benchmark intervenções: lookups de 200 itens com 50/500/5000 intervenções"""
+    interventions = _interventions(size)
+
+    start = time.perf_counter()
+    _lookup_all(_make_drug_list(interventions=interventions))
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _lookup_all(LegacyInterventionLookup(interventions, admission_number=111))
+    legacy_elapsed = time.perf_counter() - start
+
+    print(
+        f"intervention lookups {size} interventions: {elapsed * 1000:.1f}ms "
+        f"(linear scan {legacy_elapsed * 1000:.1f}ms)"
+    )
+
+    assert elapsed < 1
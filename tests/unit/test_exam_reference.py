@@ -0,0 +1,122 @@
+"""Unit tests for the cached segment exams reference in services.exams_service."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from repository import exams_repository
+from services import exams_service
+
+
+def _segment_exam(type_exam: str, initials: str):
+    return SimpleNamespace(
+        typeExam=type_exam,
+        name=f"Exam {type_exam}",
+        initials=initials,
+        min=1.0,
+        max=5.0,
+        ref="ref",
+        tp_exam_ref=None,
+    )
+
+
+@pytest.fixture
+def exams_reference():
+    """Patch the reference query and the schema of the current request"""
+    creatinine = _segment_exam("CREAT", "Creatinina")
+    exams_service._exam_reference_cache.invalidate()
+
+    with (
+        patch.object(
+            exams_service.exams_repository,
+            "get_exams_reference",
+            return_value={
+                "creat": creatinine,
+                "cr": creatinine,
+                "tgo": _segment_exam("TGO", "TGO "),
+                "k": _segment_exam("K", "Potássio"),
+            },
+        ) as load,
+        patch.object(
+            exams_service.exams_repository,
+            "get_exams_reference_version",
+            return_value=(4, None),
+        ),
+        patch.object(
+            exams_service.sessionutils, "get_current_schema", return_value="demo"
+        ),
+    ):
+        yield load
+
+    exams_service._exam_reference_cache.invalidate()
+
+
+def test_reference_is_precomputed(exams_reference):
+    """Creatinine, extra exams and empty exams are resolved once"""
+    reference = exams_service.get_exam_reference(id_segment=1)
+
+    assert reference.creatinine_types == {"creat", "cr"}
+    assert reference.extra_keys == {"tgo": "tgo"}
+    assert list(reference.empty_exams) == ["cr", "tgo", "k"]
+    assert reference.empty_exams["k"]["name"] == "Exam K"
+
+
+def test_reference_is_cached_per_segment(exams_reference):
+    """The reference query runs once per segment"""
+    for _ in range(3):
+        exams_service.get_exam_reference(id_segment=1)
+        exams_service.get_exam_reference(id_segment=2)
+
+    assert exams_reference.call_count == 2
+
+
+def test_empty_exams_are_not_shared(exams_reference):
+    """Each exam card gets its own copy of the empty exams"""
+    patient = SimpleNamespace(
+        idPatient=1, birthdate=None, gender="F", skinColor=None, weight=70, height=170
+    )
+
+    with patch.object(exams_service, "_get_exams_current_results", return_value={}):
+        exams = exams_service.find_latest_exams.__wrapped__(
+            patient=patient, idSegment=1, schema="demo", is_complete=False
+        )
+
+    exams["k"]["value"] = 10
+
+    assert (
+        exams_service.get_exam_reference(id_segment=1).empty_exams["k"]["value"] is None
+    )
+
+
+def test_reorder_reloads_the_reference(exams_reference):
+    """Reordering exams changes the version stamp and reloads the reference"""
+    with (
+        patch.object(
+            exams_service.exams_repository,
+            "get_exams_reference_version",
+            side_effect=[(4, None, "order-1"), (4, None, "order-2")],
+        ),
+        patch.object(exams_service._exam_reference_cache, "check_interval", 0),
+    ):
+        exams_service.get_exam_reference(id_segment=1)
+        exams_service.get_exam_reference(id_segment=1)
+
+    assert exams_reference.call_count == 2
+
+
+def test_version_stamp_includes_the_exams_order():
+    """set_exams_order does not touch update_at: the stamp hashes the order"""
+    session = MagicMock()
+    session.query.return_value.filter.return_value.one.return_value = (4, None, "x")
+
+    with patch.object(exams_repository, "db", MagicMock(session=session)):
+        version = exams_repository.get_exams_reference_version(id_segment=1)
+
+    columns = session.query.call_args.args
+    sql = str(columns[2].compile(dialect=postgresql.dialect()))
+
+    assert version == (4, None, "x")
+    assert "segmentoexame.posicao" in sql
+    assert "ORDER BY segmentoexame.tpexame" in sql
@@ -0,0 +1,72 @@
+"""Unit tests for the latest/previous exam resolution in services.exams_service."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from services import exams_service
+
+
+def _row(type_exam: str, value: float, days_ago: int, rank: int):
+    return SimpleNamespace(
+        typeExam=type_exam,
+        value=value,
+        unit="mg/dL",
+        date=datetime.now().replace(microsecond=0) - timedelta(days=days_ago),
+        rank=rank,
+    )
+
+
+def _current_results(rows, add_previous_exams=True):
+    with patch.object(
+        exams_service.exams_repository,
+        "get_latest_exams_by_patient",
+        return_value=rows,
+    ) as query:
+        exams = exams_service._get_exams_current_results(
+            id_patient=1,
+            add_previous_exams=add_previous_exams,
+            cache=False,
+            schema="demo",
+        )
+
+    return exams, query
+
+
+def test_latest_and_previous_in_one_query():
+    """Current value and previous value of each type come from a single query"""
+    exams, query = _current_results(
+        [
+            _row("CR", 1.2, days_ago=1, rank=1),
+            _row("CR", 0.9, days_ago=10, rank=2),
+            _row("K", 4.1, days_ago=2, rank=1),
+        ]
+    )
+
+    query.assert_called_once_with(id_patient=1, days=90, with_previous=True)
+    assert {k: (v["value"], v["prev"]) for k, v in exams.items()} == {
+        "cr": (1.2, 0.9),
+        "k": (4.1, None),
+    }
+
+
+def test_latest_older_than_five_days_is_ignored():
+    """Types without exams in the last 5 days are not current results"""
+    exams, _ = _current_results(
+        [
+            _row("CR", 1.2, days_ago=30, rank=1),
+            _row("CR", 0.9, days_ago=40, rank=2),
+        ]
+    )
+
+    assert exams == {}
+
+
+def test_without_previous_exams():
+    """Only the latest rank of the 5 days window is queried"""
+    exams, query = _current_results(
+        [_row("CR", 1.2, days_ago=1, rank=1)], add_previous_exams=False
+    )
+
+    query.assert_called_once_with(id_patient=1, days=5, with_previous=False)
+    assert exams["cr"]["prev"] is None
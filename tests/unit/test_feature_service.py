@@ -12,8 +12,8 @@ from unittest.mock import MagicMock, patch
 from flask import g
 
 from mobile import app
-from models.enums import AppFeatureFlagEnum, FeatureEnum
-from services import feature_service
+from models.enums import AppFeatureFlagEnum, FeatureEnum, MemoryEnum
+from services import feature_service, memory_service
 
 
 def _query_returning(value):
@@ -27,6 +27,13 @@ def _query_returning(value):
     return mock_db
 
 
+def _memory_query(rows):
+    """Build a mock db whose Memory ``IN`` query (memory_service) returns ``rows``."""
+    mock_db = MagicMock()
+    mock_db.session.query.return_value.filter.return_value.all.return_value = rows
+    return mock_db
+
+
 class TestHasFeature:
     """Tests for feature_service.has_feature (tenant features)."""
 
@@ -44,9 +51,11 @@ class TestHasFeature:
 
     def test_loads_and_caches_from_memory_on_miss(self):
         """On a cache miss the feature list is loaded from Memory and cached on g."""
-        memory_row = MagicMock(value=[FeatureEnum.OAUTH.value])
+        memory_row = MagicMock(
+            kind=MemoryEnum.FEATURES.value, value=[FeatureEnum.OAUTH.value]
+        )
         with app.test_request_context():
-            with patch.object(feature_service, "db", _query_returning(memory_row)):
+            with patch.object(memory_service, "db", _memory_query([memory_row])):
                 assert feature_service.has_feature(FeatureEnum.OAUTH) is True
             # the loaded list is now cached on g for subsequent calls
             assert g.features == [FeatureEnum.OAUTH.value]
@@ -54,8 +63,12 @@ class TestHasFeature:
     def test_returns_false_when_memory_row_missing(self):
         """With no Memory row configured, every feature is disabled."""
         with app.test_request_context():
-            with patch.object(feature_service, "db", _query_returning(None)):
+            with patch.object(memory_service, "db", _memory_query([])) as mock_db:
                 assert feature_service.has_feature(FeatureEnum.OAUTH) is False
+                assert feature_service.has_feature(FeatureEnum.OAUTH) is False
+
+            # the missing row is cached too: a single query per request
+            assert mock_db.session.query.call_count == 1
 
 
 class TestHasUserFeature:
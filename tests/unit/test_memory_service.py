@@ -1,6 +1,11 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
 import pytest
 
+from mobile import app
 from models.enums import MemoryEnum
+from services import memory_service
 from services.memory_service import is_admin_memory, is_private
 
 
@@ -90,3 +95,81 @@ class TestIsPrivate:
     def test_non_private_keys_return_false(self, key):
         """Keys without any private token are not private"""
         assert is_private(key) is False
+
+
+def _memory_db(rows: dict):
+    """Mock db answering the Memory IN query with rows of the requested kinds"""
+    mock_db = MagicMock()
+
+    def _all():
+        return [SimpleNamespace(kind=k, value=v) for k, v in rows.items()]
+
+    mock_db.session.query.return_value.filter.return_value.all.side_effect = _all
+    return mock_db
+
+
+class TestGetMemoryValues:
+    """Teste memory_service - get_memory_values (request memo)."""
+
+    def test_first_lookup_preloads_hot_kinds(self):
+        """Preloaded kinds and the requested ones come from a single query"""
+        rows = {MemoryEnum.FEATURES.value: ["PRIMARYCARE"], "custom": 1}
+
+        with app.test_request_context():
+            with patch.object(memory_service, "db", _memory_db(rows)) as mock_db:
+                assert memory_service.get_memory_values(["custom"]) == {"custom": 1}
+                assert memory_service.has_feature_nouser("PRIMARYCARE") is True
+                assert memory_service.get_by_kind(
+                    [MemoryEnum.FEATURES.value, MemoryEnum.PRESMED_FORM.value]
+                ) == {MemoryEnum.FEATURES.value: ["PRIMARYCARE"]}
+
+            assert mock_db.session.query.call_count == 1
+
+    def test_unknown_kinds_are_queried_once(self):
+        """Kinds outside the preload are loaded on demand and memoized"""
+        with app.test_request_context():
+            with patch.object(memory_service, "db", _memory_db({})) as mock_db:
+                memory_service.get_memory_values([MemoryEnum.FEATURES.value])
+                memory_service.get_memory_values(["other"])
+                memory_service.get_memory_values(["other"])
+
+            assert mock_db.session.query.call_count == 2
+
+    def test_memo_is_per_request(self):
+        """A new request loads memory again"""
+        with patch.object(memory_service, "db", _memory_db({})) as mock_db:
+            for _ in range(2):
+                with app.test_request_context():
+                    memory_service.get_memory_values([MemoryEnum.FEATURES.value])
+
+        assert mock_db.session.query.call_count == 2
+
+    def test_invalidate_drops_the_kind(self):
+        """A saved kind is reloaded on the next lookup"""
+        with app.test_request_context():
+            with patch.object(memory_service, "db", _memory_db({})) as mock_db:
+                memory_service.get_memory_values([MemoryEnum.FEATURES.value])
+                memory_service.invalidate_memory(MemoryEnum.FEATURES.value)
+                memory_service.get_memory_values([MemoryEnum.FEATURES.value])
+
+            assert mock_db.session.query.call_count == 2
+
+    def test_tenant_cache_is_reused_across_requests(self):
+        """With MEMORY_CACHE_TTL set, preloaded kinds are shared by the schema"""
+        memory_service._tenant_memory.invalidate()
+
+        with (
+            patch.object(memory_service, "db", _memory_db({})) as mock_db,
+            patch.object(memory_service.Config, "MEMORY_CACHE_TTL", 60),
+            patch.object(memory_service._tenant_memory, "ttl", 60),
+            patch.object(
+                memory_service.sessionutils, "get_current_schema", return_value="demo"
+            ),
+        ):
+            for _ in range(2):
+                with app.test_request_context():
+                    memory_service.get_memory_values([MemoryEnum.FEATURES.value])
+
+        memory_service._tenant_memory.invalidate()
+
+        assert mock_db.session.query.call_count == 1
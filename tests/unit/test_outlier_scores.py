@@ -0,0 +1,113 @@
+"""Unit tests for the outlier score update in services.outlier_service."""
+
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from services import outlier_service
+
+
+def _outlier(id, id_drug, dose, frequency):
+    return SimpleNamespace(id=id, idDrug=id_drug, dose=dose, frequency=frequency)
+
+
+def test_score_index_matches_the_linear_scan():
+    """The score index finds the same score as the previous linear scan"""
+    generator = random.Random(3)
+    doses = [0.5, 1, 1.25, 2.333, 10]
+    frequencies = [1, 0.333333, 0.3333334, 2.005, 24]
+    scores = {
+        str(id_drug): [
+            {
+                "dose": dose,
+                "frequency": frequency,
+                "score": generator.randint(0, 3),
+                "count": float(generator.randint(1, 100)),
+            }
+            for dose in doses
+            for frequency in frequencies
+        ]
+        for id_drug in (1, 2)
+    }
+    outliers = [
+        _outlier(id, id_drug, dose, frequency)
+        for id, (id_drug, dose, frequency) in enumerate(
+            (id_drug, dose, frequency)
+            for id_drug in (1, 2)
+            for dose in doses
+            for frequency in frequencies
+        )
+    ]
+
+    def _linear_scan(o):
+        return next(
+            sc
+            for sc in scores[str(o.idDrug)]
+            if sc["dose"] == o.dose
+            and round(sc["frequency"], 2) == round(o.frequency, 2)
+        )
+
+    updates = list(
+        outlier_service._get_score_updates(
+            outliers=outliers, score_index=outlier_service._get_score_index(scores)
+        )
+    )
+
+    assert updates == [
+        (o.id, (_linear_scan(o)["score"], int(_linear_scan(o)["count"])))
+        for o in outliers
+    ]
+
+
+def test_outliers_without_score_are_skipped():
+    """Outliers missing from the score function result are not updated"""
+    score_index = outlier_service._get_score_index(
+        {"1": [{"dose": 1.0, "frequency": 2, "score": 3, "count": 4}]}
+    )
+
+    updates = outlier_service._get_score_updates(
+        outliers=[_outlier(10, 1, 1.0, 2.0), _outlier(11, 1, 5.0, 2.0)],
+        score_index=score_index,
+    )
+
+    assert list(updates) == [(10, (3, 4))]
+
+
+def _update_scores(updates):
+    session = MagicMock()
+    cursor = session.connection.return_value.connection.cursor.return_value
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.read())
+
+    with (
+        patch.object(outlier_service, "db", MagicMock(session=session)),
+        patch.object(outlier_service, "SCORE_COPY_CHUNK_SIZE", 2),
+    ):
+        updated = outlier_service._update_scores(
+            updates=iter(updates), schema="demo", user=SimpleNamespace(id=5)
+        )
+
+    return updated, copied, session
+
+
+def test_scores_are_copied_in_chunks():
+    """Scores go to the temp table in chunks, followed by a single update"""
+    updated, copied, session = _update_scores([(1, (3, 10)), (2, (0, 1)), (3, (1, 7))])
+
+    assert updated is True
+    assert copied == ["1,3,10\n2,0,1\n", "3,1,7\n"]
+    assert session.execute.call_count == 1
+
+    update = str(session.execute.call_args.args[0])
+    assert "update demo.outlier o" in update
+    assert "outlier_score s" in update
+    assert session.execute.call_args.args[1]["updateBy"] == 5
+
+
+def test_no_scores_no_update():
+    """Nothing is updated when no outlier got a score"""
+    updated, copied, session = _update_scores([])
+
+    assert updated is False
+    assert copied == []
+    session.execute.assert_not_called()
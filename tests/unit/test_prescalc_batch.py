@@ -0,0 +1,142 @@
+"""Unit tests for the prescalc batch entry point."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import static
+from exception.validation_error import ValidationError
+from services import prescription_agg_service
+from utils import status
+
+_create_batch = (
+    prescription_agg_service.create_agg_prescription_by_prescription_list.__wrapped__
+)
+
+
+def _run_batch(id_prescription_list, side_effect=None):
+    """Invoke the batch service with the schema check and db session patched."""
+    session = MagicMock()
+
+    with (
+        patch.object(prescription_agg_service, "_set_schema") as set_schema,
+        patch.object(
+            prescription_agg_service, "create_agg_prescription_by_prescription"
+        ) as create,
+        patch.object(prescription_agg_service, "db", MagicMock(session=session)),
+    ):
+        create.side_effect = side_effect
+        results = _create_batch(
+            schema="demo",
+            id_prescription_list=id_prescription_list,
+            user_context=MagicMock(),
+        )
+
+    return results, set_schema, create, session
+
+
+def test_schema_is_checked_once():
+    """The schema is validated once for the whole batch"""
+    results, set_schema, create, session = _run_batch([1, 2, 3])
+
+    set_schema.assert_called_once_with("demo")
+    assert [c.kwargs["check_schema"] for c in create.call_args_list] == [
+        False,
+        False,
+        False,
+    ]
+    assert [r["status"] for r in results] == ["success"] * 3
+
+
+def test_each_prescription_is_committed():
+    """Every prescription commits on its own, releasing the admission lock"""
+    _, _, _, session = _run_batch([1, 2])
+
+    assert session.commit.call_count == 2
+
+
+def test_duplicated_prescriptions_run_once():
+    """A prescription repeated in the batch is processed once"""
+    _, _, create, _ = _run_batch([1, 2, 1])
+
+    assert [c.kwargs["id_prescription"] for c in create.call_args_list] == [1, 2]
+
+
+def test_failure_does_not_stop_the_batch():
+    """Errors are rolled back and reported per prescription"""
+
+    def _create(id_prescription, **kwargs):
+        if id_prescription == 1:
+            raise ValidationError(
+                "Prescrição inexistente",
+                "errors.invalidPrescription",
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if id_prescription == 2:
+            raise RuntimeError("boom")
+
+    results, _, _, session = _run_batch([1, 2, 3], side_effect=_create)
+
+    assert results == [
+        {"id_prescription": 1, "status": "error", "message": "Prescrição inexistente"},
+        {"id_prescription": 2, "status": "error", "message": "Erro inesperado"},
+        {"id_prescription": 3, "status": "success"},
+    ]
+    assert session.rollback.call_count == 2
+    assert session.commit.call_count == 1
+
+
+def _static_response(schema, operation_func, params):
+    return json.dumps(
+        {
+            "status": "success",
+            "data": [
+                {
+                    "id_prescription": id_prescription,
+                    "status": "error" if id_prescription == 2 else "success",
+                }
+                for id_prescription in params["id_prescription_list"]
+            ],
+            "httpCode": status.HTTP_200_OK,
+        }
+    )
+
+
+def test_prescalc_batch_groups_by_schema():
+    """One static context per schema, with the schema prescriptions"""
+    event = {
+        "prescriptions": [
+            {"schema": "a", "id_prescription": 1},
+            {"schema": "b", "id_prescription": 2},
+            {"schema": "a", "id_prescription": 3},
+        ]
+    }
+
+    with patch.object(
+        static, "execute_with_static_context", side_effect=_static_response
+    ) as execute:
+        static.prescalc_batch(event, None)
+
+    assert [
+        (c.kwargs["schema"], c.kwargs["params"]["id_prescription_list"])
+        for c in execute.call_args_list
+    ] == [("a", [1, 3]), ("b", [2])]
+
+
+def test_prescalc_batch_sqs_reports_failed_messages():
+    """SQS batches return only the failed messages for retry"""
+    event = {
+        "Records": [
+            {
+                "messageId": f"m{id_prescription}",
+                "body": json.dumps({"schema": "a", "id_prescription": id_prescription}),
+            }
+            for id_prescription in [1, 2, 3]
+        ]
+    }
+
+    with patch.object(
+        static, "execute_with_static_context", side_effect=_static_response
+    ):
+        result = static.prescalc_batch(event, None)
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m2"}]}
@@ -0,0 +1,94 @@
+"""Unit tests for utils.prescription_item."""
+
+from datetime import datetime
+
+from models.enums import DrugTypeEnum
+from services import alert_interaction_service, alert_service
+from tests.utils.utils_test_prescription import get_prescription_drug_mock_row
+from utils import prescription_item
+from utils.alert_protocol import AlertProtocol
+
+
+def _row(id, source=DrugTypeEnum.DRUG.value, suspended=False, white_list=False, **kw):
+    row = get_prescription_drug_mock_row(id_prescription_drug=id, dose=10, **kw)
+    row.prescription_drug.source = source
+    row.prescription_drug.suspendedDate = datetime(2024, 1, 1) if suspended else None
+    row.drug_attributes.whiteList = white_list
+
+    return row
+
+
+def _rows():
+    rows = [
+        _row(1),
+        _row(2, source=DrugTypeEnum.SOLUTION.value, white_list=True),
+        _row(3, white_list=True),
+        _row(4, source=DrugTypeEnum.DIET.value),
+        _row(5, suspended=True),
+        _row(6, source=DrugTypeEnum.PROCEDURE.value),
+        _row(7, source="Outros"),
+    ]
+    rows[5].drug.sctid = None
+
+    return rows
+
+
+def _ids(items):
+    return [item.prescription_drug.id for item in items]
+
+
+def test_item_keeps_positional_access():
+    """Item mantém acesso posicional e por nome da linha da consulta"""
+    row = _row(1, expire_date=datetime(2024, 3, 15))
+    item = prescription_item.PrescriptionItem(row)
+
+    assert item[0] is row.prescription_drug
+    assert item[6] is row.drug_attributes
+    assert item[:2] == (row.prescription_drug, row.drug)
+    assert item.PrescriptionDrug is item.prescription_drug
+    assert item.prescription_expire == datetime(2024, 3, 15)
+    assert len(item) == len(list(item)) == len(prescription_item.FIELDS)
+    # columns missing from the row are empty
+    assert item.default_measure_unit_nh is None
+
+
+def test_item_derived_fields():
+    """Campos derivados são calculados na construção do item"""
+    item = prescription_item.PrescriptionItem(
+        _row(1, expire_date=datetime(2024, 3, 15))
+    )
+
+    assert item.sctid == item.drug.sctid
+    assert item.expire_day == 15
+    assert item.convert_factor == 1
+
+    without_expire = _row(2)._replace(expire=None, measure_unit_convert_factor=None)
+    item = prescription_item.PrescriptionItem(without_expire)
+    assert item.expire_day == 0
+    assert item.convert_factor == 1
+
+
+def test_items_filters():
+    """Cada consumidor recebe os itens filtrados uma única vez"""
+    items = prescription_item.to_items(_rows())
+
+    assert _ids(items.alert_items) == [1, 2, 3, 6]
+    assert _ids(items.protocol_items) == [1, 2, 3, 4, 6]
+    # whitelisted drugs only interact inside solutions, sctid is required
+    assert _ids(items.interaction_items) == [1, 2]
+    assert prescription_item.to_items(items) is items
+
+
+def test_consumers_share_the_items():
+    """Filtros dos serviços usam os itens já construídos"""
+    items = prescription_item.to_items(_rows())
+
+    assert alert_service._filter_drug_list(items) is items.alert_items
+    assert alert_interaction_service._filter_drug_list(items) is items.interaction_items
+    assert _ids(alert_service._filter_drug_list(_rows())) == [1, 2, 3, 6]
+
+    protocol = AlertProtocol(
+        drugs=items, exams={}, prescription=None, patient=None, cn_stats={}
+    )
+    assert protocol.drugs is items
+    assert protocol.filtered_drugs is items.protocol_items
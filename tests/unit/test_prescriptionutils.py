@@ -1,5 +1,8 @@
 """Unit tests for utils.prescriptionutils prescription helper functions."""
 
+import os
+import random
+import time
 from datetime import datetime, timedelta
 
 import pytest
@@ -398,3 +401,160 @@ class TestGetFeatures:
         assert features["alertLevel"] == "medium"
         assert features["protocolAlerts"] == [1, 2]
         assert features["alertStats"] == {"total": 7, "level": "medium"}
+
+
+def _synthetic_result(size: int, seed: int, agg: bool = False):
+    """Synthetic prescription with `size` items spread over the three sources"""
+    generator = random.Random(seed)
+    day = datetime(2024, 5, 10)
+    attributes = prescriptionutils.get_numeric_drug_attributes_list()
+
+    def _item(index):
+        prescription_day = day - timedelta(days=generator.randint(0, 1))
+        return _make_drug(
+            idDrug=generator.randint(1, size // 4 + 1),
+            idSubstance=generator.choice([None, generator.randint(1, 100)]),
+            idSubstanceClass=generator.choice([None, generator.randint(1, 20)]),
+            whiteList=generator.random() < 0.1,
+            suspended=generator.random() < 0.1,
+            allergy=generator.randint(0, 1),
+            alertsComplete=[
+                {"level": generator.choice(["low", "medium", "high"])}
+                for _ in range(generator.randint(0, 2))
+            ],
+            score=str(generator.randint(0, 4)),
+            am=generator.choice([None, 0, 1]),
+            av=generator.choice([None, 0, 1]),
+            np=generator.choice([None, 0, 1]),
+            c=generator.choice([None, 0, 1]),
+            checked=generator.random() < 0.5,
+            tubeAlert=generator.randint(0, 1),
+            frequency={"value": generator.choice(["", "6", "8", "12", "24"])},
+            idDepartment=generator.randint(1, 5),
+            interval=generator.choice(
+                [None, "", "08:00 20:00", "06 12 18 24", "10:00", f"{index % 24:02d}"]
+            ),
+            prescriptionDate=prescription_day.isoformat(),
+            drugAttributes={
+                attr: generator.choice([None, 0, 1])
+                for attr in generator.sample(attributes, 4)
+            },
+        )
+
+    items = [_item(index) for index in range(size)]
+    result = _make_result(
+        prescription=items[: size // 2],
+        solution=items[size // 2 : size * 3 // 4],
+        procedures=items[size * 3 // 4 :],
+        interventions=[{"status": generator.choice(["s", "0"])} for _ in range(20)],
+        alertExams=3,
+        complication=1,
+    )
+    if agg:
+        result["alertStats"] = {"total": 12, "level": "high"}
+
+    return result
+
+
+class TestGetFeaturesSinglePass:
+    """getFeatures aggregates every item in a single pass."""
+
+    def test_intervals_are_unique_and_sorted(self):
+        """Intervals of every source are merged, deduplicated and sorted once."""
+        features = prescriptionutils.getFeatures(
+            _make_result(
+                prescription=[
+                    _make_drug(interval="20:00 08:00"),
+                    _make_drug(interval="14 08"),
+                ],
+                solution=[_make_drug(interval="06")],
+                procedures=[
+                    _make_drug(interval="02", suspended=True),
+                    _make_drug(interval="04", whiteList=True),
+                    _make_drug(interval=""),
+                ],
+            )
+        )
+
+        assert features["intervals"] == ["06", "08", "14", "20"]
+        assert features["totalItens"] == 6
+
+    def test_intervals_for_agg_date(self):
+        """Only items prescribed on the agg date add intervals."""
+        result = _make_result(
+            prescription=[
+                _make_drug(interval="08", prescriptionDate="2024-05-10T07:00:00"),
+                _make_drug(interval="10", prescriptionDate="2024-05-09T23:00:00"),
+                _make_drug(interval="12", prescriptionDate=None),
+            ],
+            solution=[_make_drug(interval="06 22", prescriptionDate="2024-05-10")],
+        )
+
+        features = prescriptionutils.getFeatures(
+            result, agg_date=datetime(2024, 5, 10, 15), intervals_for_agg_date=True
+        )
+        assert features["intervals"] == ["06", "08", "22"]
+
+        features = prescriptionutils.getFeatures(
+            result, agg_date=None, intervals_for_agg_date=True
+        )
+        assert features["intervals"] == []
+
+        features = prescriptionutils.getFeatures(result, agg_date=None)
+        assert features["intervals"] == ["06", "08", "10", "12", "22"]
+
+    def test_sets_and_totals_across_sources(self):
+        """Ids, frequencies, departments and attributes are aggregated once."""
+        features = prescriptionutils.getFeatures(
+            _make_result(
+                prescription=[
+                    _make_drug(
+                        idDrug=1,
+                        idSubstance=10,
+                        frequency={"value": "8"},
+                        alertsComplete=[{"level": "low"}, {"level": "medium"}],
+                        drugAttributes={"antimicro": 1, "mav": None, "other": 5},
+                    ),
+                ],
+                solution=[
+                    _make_drug(
+                        idDrug=1,
+                        idSubstance=10,
+                        idSubstanceClass=3,
+                        frequency={"value": "8"},
+                        idDepartment=2,
+                        drugAttributes={"antimicro": 1, "mav": 1},
+                    ),
+                ],
+                procedures=[
+                    _make_drug(idDrug=2, idSubstanceClass=3, frequency={"value": "6"})
+                ],
+            )
+        )
+
+        assert sorted(features["drugIDs"]) == [1, 2]
+        assert features["substanceIDs"] == [10]
+        assert features["substanceClassIDs"] == [3]
+        assert sorted(features["frequencies"]) == ["6", "8"]
+        assert sorted(features["departmentList"]) == [2, 10]
+        assert features["alertLevel"] == "medium"
+        assert features["alerts"] == 2
+        assert features["drugAttributes"]["antimicro"] == 2
+        assert features["drugAttributes"]["mav"] == 1
+        assert "other" not in features["drugAttributes"]
+
+    @pytest.mark.skipif(
+        not os.getenv("RUN_BENCHMARKS"), reason="benchmark: set RUN_BENCHMARKS=1"
+    )
+    def test_benchmark_1k_items(self):
+        """Benchmark getFeatures on 1k-item prescriptions (prescalc hot path)."""
+        results = [_synthetic_result(size=1000, seed=seed) for seed in range(10)]
+
+        start = time.perf_counter()
+        for result in results:
+            prescriptionutils.getFeatures(result)
+        elapsed = time.perf_counter() - start
+
+        print(f"getFeatures 10 x 1000 items: {elapsed * 1000:.1f}ms")
+
+        assert elapsed < 1
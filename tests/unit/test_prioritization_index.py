@@ -0,0 +1,183 @@
+"""Unit tests for the prioritization index (prescricao_prioridade)."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from mobile import app
+from models.enums import AppFeatureFlagEnum
+from models.prescription import Prescription
+from models.requests.prioritization_request import PrioritizationRequest
+from repository import prioritization_repository
+from services import prescription_agg_service
+from utils import cursorutils
+
+
+def _sql(query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.fixture
+def app_context():
+    with app.app_context():
+        yield
+
+
+def _request(**kwargs):
+    return PrioritizationRequest(
+        idSegment=1, global_score_min=10, alert_level="high", **kwargs
+    )
+
+
+def test_base_query_reads_the_index(app_context):
+    """Prioritização: segmento, data e score vêm das colunas do índice"""
+    sql = _sql(
+        prioritization_repository._build_base_query(_request(), priority_index=True)
+    )
+
+    assert "JOIN prescricao_prioridade" in sql
+    assert "prescricao_prioridade.idsegmento =" in sql
+    assert "prescricao_prioridade.dtprescricao >=" in sql
+    assert "prescricao_prioridade.score_global >=" in sql
+    assert "prescricao_prioridade.nivel_alerta =" in sql
+    assert "globalScore" not in sql
+
+
+def test_base_query_without_index(app_context):
+    """Prioritização: sem o índice, a consulta segue nos indicadores"""
+    sql = _sql(prioritization_repository._build_base_query(_request()))
+
+    assert "prescricao_prioridade" not in sql
+    assert "prescricao.idsegmento =" in sql
+    assert "prescricao.indicadores ->>" in sql
+
+
+def test_upsert_prescription_priority(app_context):
+    """Prioritização: indicadores gravados nas colunas tipadas do índice"""
+    prescription = Prescription(
+        id=10,
+        idHospital=1,
+        idDepartment=2,
+        idSegment=3,
+        date=datetime(2024, 1, 1),
+        agg=True,
+        features={
+            "globalScore": 42,
+            "alertLevel": "medium",
+            "diff": 1,
+            "interventions": 0,
+        },
+    )
+    session = MagicMock()
+
+    with patch.object(prioritization_repository, "db", MagicMock(session=session)):
+        prioritization_repository.upsert_prescription_priority(prescription)
+
+    stmt = session.execute.call_args.args[0]
+    params = stmt.compile(dialect=postgresql.dialect()).params
+
+    assert "ON CONFLICT (fkprescricao) DO UPDATE" in str(
+        stmt.compile(dialect=postgresql.dialect())
+    )
+    assert params["fkprescricao"] == 10
+    assert params["score_global"] == 42
+    assert params["nivel_alerta"] == "medium"
+    assert params["idsegmento"] == 3
+
+
+@pytest.mark.parametrize(
+    "flags, enabled",
+    [
+        ({AppFeatureFlagEnum.PRIORITIZATION_INDEX_WRITE}, True),
+        ({AppFeatureFlagEnum.PRIORITIZATION_INDEX}, True),
+        (set(), False),
+    ],
+)
+def test_index_update_follows_feature_flag(flags, enabled):
+    """Prioritização: o prescalc grava o índice com a flag de escrita (ou leitura)"""
+    prescription = Prescription(id=10)
+
+    with (
+        patch.object(
+            prescription_agg_service.feature_service,
+            "has_feature_flag",
+            side_effect=lambda flag: flag in flags,
+        ),
+        patch.object(
+            prescription_agg_service.prioritization_repository,
+            "upsert_prescription_priority",
+        ) as upsert,
+    ):
+        prescription_agg_service._update_prioritization_index(prescription)
+
+    assert upsert.call_count == int(enabled)
+
+
+def test_estimate_prioritization_count(app_context):
+    """Prioritização: estimativa do planejador, sem executar a contagem"""
+    sql, _ = _explain(PrioritizationRequest(idSegmentList=[1, 2]))
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT prescricao.fkprescricao")
+    assert "POSTCOMPILE" not in sql
+    assert "count(" not in sql
+
+
+@pytest.mark.parametrize("priority_index", [True, False])
+def test_estimate_prioritization_count_tenant_schema(app_context, priority_index):
+    """Prioritização: EXPLAIN usa o schema do tenant (dbSession.setSchema)"""
+    sql, _ = _explain(
+        PrioritizationRequest(idSegmentList=[1, 2]),
+        priority_index=priority_index,
+        execution_options={"schema_translate_map": {None: "demo"}},
+    )
+
+    assert "FROM demo.prescricao" in sql
+    assert "SCHEMA" not in sql
+    if priority_index:
+        assert "JOIN demo.prescricao_prioridade" in sql
+
+
+def _explain(request, priority_index=False, execution_options=None):
+    session = prioritization_repository.db.session
+    connection = MagicMock(dialect=postgresql.dialect())
+    connection.get_execution_options.return_value = execution_options or {}
+    execute = connection.exec_driver_sql
+    execute.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 1234}}]
+
+    with patch.object(session, "connection", return_value=connection):
+        total = prioritization_repository.estimate_prioritization_count(
+            request, priority_index=priority_index
+        )
+
+    assert total == 1234
+
+    return execute.call_args.args
+
+
+@pytest.mark.parametrize("priority_index", [True, False])
+def test_prioritization_list_page(app_context, priority_index):
+    """Prioritização: página ordenada por score, data e id a partir do cursor"""
+    cursor = cursorutils.encode_cursor([10, datetime(2024, 1, 1), 100])
+    queries = []
+
+    def _all(query):
+        queries.append(query)
+        return []
+
+    with (
+        patch.object(prioritization_repository.db.session, "execute"),
+        patch("sqlalchemy.orm.Query.all", autospec=True, side_effect=_all),
+    ):
+        prioritization_repository.get_prioritization_list(
+            PrioritizationRequest(cursor=cursor),
+            run_count=False,
+            priority_index=priority_index,
+        )
+
+    sql = _sql(queries[0])
+    table = "prescricao_prioridade" if priority_index else "prescricao"
+
+    assert f"{table}.dtprescricao DESC, {table}.fkprescricao DESC" in sql
+    assert f"{table}.fkprescricao < " in sql
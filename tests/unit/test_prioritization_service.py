@@ -1,5 +1,9 @@
+from unittest.mock import patch
+
 import pytest
 
+from models.requests.prioritization_request import PrioritizationRequest
+from services import prioritization_service
 from services.prioritization_service import _get_first_administration_hour
 
 
@@ -68,3 +72,71 @@ class TestGetFirstAdministrationHour:
     def test_hour_out_of_range_returns_none(self, intervals):
         """A numeric first item outside the 0-23 range yields None"""
         assert _get_first_administration_hour(intervals) is None
+
+
+class TestGetTotalRecords:
+    """Teste prioritization_service - _get_total_records."""
+
+    @pytest.fixture(autouse=True)
+    def estimate(self):
+        prioritization_service._estimated_counts.invalidate()
+
+        with (
+            patch.object(
+                prioritization_service.prioritization_repository,
+                "estimate_prioritization_count",
+                return_value=3000,
+            ) as estimate,
+            patch.object(
+                prioritization_service.sessionutils,
+                "get_current_schema",
+                return_value="demo",
+            ),
+        ):
+            yield estimate
+
+        prioritization_service._estimated_counts.invalidate()
+
+    def test_list_below_limit_is_exact(self, estimate):
+        """A list below the limit is complete: its size is the exact count"""
+        total = prioritization_service._get_total_records(
+            request=PrioritizationRequest(), results=[1] * 10, priority_index=False
+        )
+
+        assert total == (10, True)
+        estimate.assert_not_called()
+
+    def test_capped_list_is_estimated_once(self, estimate):
+        """Capped lists use the cached planner estimate"""
+        results = [1] * 500
+
+        for id_dept in ([1, 2], [2, 1]):
+            total = prioritization_service._get_total_records(
+                request=PrioritizationRequest(idDept=id_dept),
+                results=results,
+                priority_index=False,
+            )
+            assert total == (3000, False)
+
+        assert estimate.call_count == 1
+
+    def test_estimate_is_never_below_the_list(self, estimate):
+        """The estimate is floored at the size of the list"""
+        estimate.return_value = 20
+
+        total = prioritization_service._get_total_records(
+            request=PrioritizationRequest(), results=[1] * 500, priority_index=False
+        )
+
+        assert total == (500, False)
+
+    def test_filters_have_their_own_estimate(self, estimate):
+        """Different filters do not share the cached estimate"""
+        for id_segment in (1, 2):
+            prioritization_service._get_total_records(
+                request=PrioritizationRequest(idSegment=id_segment),
+                results=[1] * 500,
+                priority_index=False,
+            )
+
+        assert estimate.call_count == 2
@@ -0,0 +1,88 @@
+"""Unit tests for utils.process_cache."""
+
+from unittest.mock import patch
+
+from utils.process_cache import TTLCache, VersionedCache
+
+
+def _loader(values: list):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+
+    return load, calls
+
+
+def test_loads_once_while_version_is_unchanged():
+    """Reads after the first load do not call the loader"""
+    cache = VersionedCache(check_interval=0)
+    load, calls = _loader(["a"])
+
+    for _ in range(3):
+        assert cache.get("key", load=load, version=lambda: 1) == "a"
+
+    assert len(calls) == 1
+
+
+def test_reloads_when_version_changes():
+    """A new version stamp triggers a reload"""
+    cache = VersionedCache(check_interval=0)
+    load, calls = _loader(["a", "b"])
+
+    assert cache.get("key", load=load, version=lambda: 1) == "a"
+    assert cache.get("key", load=load, version=lambda: 2) == "b"
+    assert len(calls) == 2
+
+
+def test_version_is_checked_only_after_the_interval():
+    """Within check_interval not even the version stamp is queried"""
+    cache = VersionedCache(check_interval=60)
+    load, _ = _loader(["a"])
+    version_calls = []
+
+    def version():
+        version_calls.append(1)
+        return 1
+
+    with patch("utils.process_cache.time.monotonic", side_effect=[0, 10, 59, 61]):
+        for _ in range(4):
+            cache.get("key", load=load, version=version)
+
+    assert len(version_calls) == 2
+
+
+def test_keys_are_independent():
+    """Each key (e.g. each tenant schema) has its own value and version"""
+    cache = VersionedCache(check_interval=0)
+
+    assert cache.get("demo", load=lambda: "demo", version=lambda: 1) == "demo"
+    assert cache.get("other", load=lambda: "other", version=lambda: 1) == "other"
+
+
+def test_invalidate():
+    """invalidate forces the next read to reload"""
+    cache = VersionedCache(check_interval=60)
+    load, calls = _loader(["a", "b", "c"])
+
+    cache.get("key", load=load, version=lambda: 1)
+    cache.invalidate("key")
+    assert cache.get("key", load=load, version=lambda: 1) == "b"
+
+    cache.invalidate()
+    assert cache.get("key", load=load, version=lambda: 1) == "c"
+    assert len(calls) == 3
+
+
+def test_ttl_cache_max_size():
+    """A full TTLCache drops expired entries, then the oldest ones"""
+    cache = TTLCache(ttl=60, max_size=2)
+
+    with patch("utils.process_cache.time.monotonic", side_effect=[0, 1, 100, 101]):
+        cache.get("a", load=lambda: "a")
+        cache.get("b", load=lambda: "b")
+        cache.get("c", load=lambda: "c")
+        cache.get("d", load=lambda: "d")
+
+    assert list(cache._entries) == ["c", "d"]
@@ -0,0 +1,53 @@
+"""Unit tests for the bulk cache refresh routes (integration bursts)."""
+
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError as PydanticValidationError
+
+from mobile import app
+from routes import exams as exams_routes
+from routes import notes as notes_routes
+
+
+def test_exams_refresh_cache_takes_a_patient_list():
+    """Exames: a lista de pacientes é atualizada em uma única chamada"""
+    with (
+        app.test_request_context(json={"idPatientList": [1, 2, 3]}),
+        patch.object(exams_routes.exams_service, "refresh_exams_cache_list") as refresh,
+    ):
+        result = exams_routes.refresh_exams_cache.__wrapped__()
+
+    assert result == 3
+    refresh.assert_called_once_with(id_patient_list=[1, 2, 3])
+
+
+def test_annotations_refresh_cache_takes_an_admission_list():
+    """Anotações: diálise e alergias de várias internações em uma chamada"""
+    with (
+        app.test_request_context(
+            json={"admissionNumberList": [10, 20], "allergies": False}
+        ),
+        patch.object(
+            notes_routes.clinical_notes_service, "refresh_annotations_cache_list"
+        ) as refresh,
+    ):
+        result = notes_routes.refresh_annotations_cache.__wrapped__()
+
+    assert result == 2
+    refresh.assert_called_once_with(
+        admission_number_list=[10, 20], dialysis=True, allergies=False
+    )
+
+
+@pytest.mark.parametrize("id_patient_list", [[], list(range(1001))])
+def test_exams_refresh_cache_list_size(id_patient_list):
+    """Exames: lista vazia ou grande demais é rejeitada"""
+    with (
+        app.test_request_context(json={"idPatientList": id_patient_list}),
+        patch.object(exams_routes.exams_service, "refresh_exams_cache_list") as refresh,
+    ):
+        with pytest.raises(PydanticValidationError):
+            exams_routes.refresh_exams_cache.__wrapped__()
+
+    refresh.assert_not_called()
@@ -0,0 +1,56 @@
+"""Unit tests for services.schema_service (tenant schema registry)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from services import schema_service
+
+
+@pytest.fixture
+def load_schemas():
+    schema_service._schemas.invalidate()
+
+    with patch.object(
+        schema_service, "_load_schemas", return_value=frozenset(["demo", "public"])
+    ) as mock:
+        yield mock
+
+    schema_service._schemas.invalidate()
+
+
+def test_existing_schema_is_answered_from_the_registry(load_schemas):
+    """Repeated checks reuse the schemas loaded by the first one"""
+    assert schema_service.schema_exists("demo")
+    assert schema_service.schema_exists("public")
+    assert schema_service.get_schemas() == frozenset(["demo", "public"])
+
+    assert load_schemas.call_count == 1
+
+
+def test_unknown_schema_reloads_the_registry(load_schemas):
+    """A miss reloads the registry once, so new tenants are found"""
+    assert schema_service.schema_exists("demo")
+
+    load_schemas.return_value = frozenset(["demo", "public", "new_tenant"])
+
+    assert schema_service.schema_exists("new_tenant")
+    assert not schema_service.schema_exists("invalid")
+    assert load_schemas.call_count == 3
+
+
+def test_empty_schema_does_not_exist(load_schemas):
+    """Empty schema names are rejected without a query"""
+    assert not schema_service.schema_exists(None)
+    assert not schema_service.schema_exists("")
+
+    assert load_schemas.call_count == 0
+
+
+def test_registry_expires_after_ttl(load_schemas):
+    """The registry is reloaded once the ttl is over"""
+    with patch("utils.process_cache.time.monotonic", side_effect=[0, 1000]):
+        schema_service.get_schemas()
+        schema_service.get_schemas()
+
+    assert load_schemas.call_count == 2
@@ -0,0 +1,102 @@
+"""Unit tests for the segment metadata cache in services.segment_service."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services import segment_service
+
+
+def _segment(id: int, cpoe: bool):
+    return SimpleNamespace(
+        id=id,
+        description=f"Segment {id}",
+        status=1,
+        type=1,
+        cpoe=cpoe,
+        cpoe_outpatient_clinic=False,
+    )
+
+
+def _metadata(*segments):
+    return {s.id: segment_service.SegmentMetadata(segment=s) for s in segments}
+
+
+@pytest.fixture
+def segments():
+    """Patch the loaders and the schema of the current request"""
+    segment_service._segment_cache.invalidate()
+
+    with (
+        patch.object(
+            segment_service,
+            "_load_segment_metadata",
+            return_value=_metadata(_segment(1, cpoe=True), _segment(2, cpoe=False)),
+        ) as load,
+        patch.object(segment_service, "_get_segment_version", return_value=1),
+        patch.object(
+            segment_service.sessionutils, "get_current_schema", return_value="demo"
+        ),
+    ):
+        yield load
+
+    segment_service._segment_cache.invalidate()
+
+
+def test_is_cpoe(segments):
+    """CPOE flag comes from the cached segment"""
+    assert segment_service.is_cpoe(1) is True
+    assert segment_service.is_cpoe(2) is False
+    assert segment_service.is_cpoe(3) is False
+    assert segment_service.is_cpoe(None) is False
+
+
+def test_segments_are_loaded_once(segments):
+    """Repeated lookups reuse the loaded segments"""
+    for _ in range(5):
+        segment_service.is_cpoe(1)
+        segment_service.get_segment_metadata(2)
+
+    assert segments.call_count == 1
+
+
+def test_version_change_reloads_segments(segments):
+    """A new version stamp reloads the segments"""
+    segment_service.is_cpoe(1)
+
+    segment_service._segment_cache.check_interval = 0
+    try:
+        with patch.object(segment_service, "_get_segment_version", return_value=2):
+            segment_service.is_cpoe(1)
+    finally:
+        segment_service._segment_cache.check_interval = 60
+
+    assert segments.call_count == 2
+
+
+def test_ignored_segments(segments):
+    """Non-CPOE segments are ignored when the feature is enabled"""
+    with patch.object(
+        segment_service.feature_service, "has_feature", return_value=True
+    ):
+        assert segment_service.get_ignored_segments(is_cpoe_flag=True) == [2]
+        assert segment_service.get_ignored_segments(is_cpoe_flag=False) is None
+
+
+def test_without_schema_reads_a_single_segment():
+    """Sem schema o segmento é lido pela chave primária"""
+    session = MagicMock()
+    session.get.return_value = _segment(3, cpoe=True)
+
+    with (
+        patch.object(segment_service, "db", MagicMock(session=session)),
+        patch.object(
+            segment_service.sessionutils, "get_current_schema", return_value=None
+        ),
+        patch.object(segment_service, "_load_segment_metadata") as load,
+    ):
+        assert segment_service.is_cpoe(3) is True
+
+    session.get.assert_called_once_with(segment_service.Segment, 3)
+    load.assert_not_called()
@@ -0,0 +1,149 @@
+"""Unit tests for utils.span_recorder."""
+
+import json
+import logging
+from unittest.mock import patch
+
+import sqlalchemy
+from flask import Flask, g
+
+from app.handlers import register_handlers
+from mobile import app
+from utils import span_recorder
+
+
+def test_records_one_span_per_stage():
+    """Each stage becomes a span with its own duration, in execution order"""
+    with app.test_request_context():
+        with span_recorder.record("view", id_prescription=1) as recorder:
+            with recorder.span("exams"):
+                pass
+            with recorder.span("alerts"):
+                pass
+
+    data = recorder.to_dict()
+    assert [s["name"] for s in data["spans"]] == ["exams", "alerts"]
+    assert data["id_prescription"] == 1
+    assert data["duration_ms"] >= 0
+
+
+def test_counts_redis_in_the_active_span_only():
+    """Redis round-trips are assigned to the stage that issued them"""
+    span_recorder.count_redis()  # no active span: ignored
+
+    with app.test_request_context():
+        with span_recorder.record("view") as recorder:
+            with recorder.span("exams"):
+                span_recorder.count_redis()
+                span_recorder.count_redis()
+            with recorder.span("alerts"):
+                pass
+
+    data = recorder.to_dict()
+    assert [s["redis"] for s in data["spans"]] == [2, 0]
+    assert data["redis"] == 2
+
+
+def test_counts_sql_statements():
+    """Statements executed inside a span are counted by the engine listener"""
+    engine = sqlalchemy.create_engine("sqlite://")
+
+    with app.test_request_context():
+        with span_recorder.record("view") as recorder:
+            with recorder.span("drug_list"):
+                with engine.connect() as conn:
+                    conn.execute(sqlalchemy.text("select 1"))
+                    conn.execute(sqlalchemy.text("select 2"))
+
+    assert recorder.spans[0].sql == 2
+
+
+def test_logs_a_single_json_line():
+    """The whole breakdown is sent as one structured log line"""
+    with patch.object(span_recorder.logger.backend_logger, "log") as log:
+        with app.test_request_context():
+            with span_recorder.record("view", schema="demo") as recorder:
+                with recorder.span("exams"):
+                    pass
+
+    log.assert_called_once()
+    assert log.call_args[0][0] == logging.INFO
+    line = json.loads(log.call_args[0][1])
+    assert line["event"] == "span_recorder"
+    assert line["schema"] == "demo"
+    assert line["spans"][0]["name"] == "exams"
+
+
+def test_slow_records_are_logged_as_warnings():
+    """Only records above SLOW_RECORD_MS reach the warning level"""
+    with (
+        patch.object(span_recorder.logger.backend_logger, "log") as log,
+        patch.object(span_recorder, "SLOW_RECORD_MS", 0),
+    ):
+        with app.test_request_context():
+            with span_recorder.record("view"):
+                pass
+
+    assert log.call_args[0][0] == logging.WARNING
+
+
+def test_logs_even_when_a_stage_fails():
+    """A failing stage still produces the log line and keeps its span"""
+    with patch.object(span_recorder.logger.backend_logger, "log") as log:
+        with app.test_request_context():
+            try:
+                with span_recorder.record("view") as recorder:
+                    with recorder.span("alerts"):
+                        raise ValueError("boom")
+            except ValueError:
+                pass
+
+    log.assert_called_once()
+    assert recorder.spans[0].name == "alerts"
+
+
+def test_recorder_is_kept_on_g():
+    """The finished recorder is available to the response handlers"""
+    with app.test_request_context():
+        with span_recorder.record("view") as recorder:
+            pass
+
+        assert g.span_recorder is recorder
+        assert span_recorder.get_recorder() is recorder
+
+
+def test_server_timing_header():
+    """Server-Timing lists every stage plus the total"""
+    recorder = span_recorder.SpanRecorder("view")
+    with recorder.span("exams") as span:
+        span.sql = 3
+        span.redis = 1
+    recorder.duration_ms = 10
+
+    header = recorder.server_timing()
+
+    assert header.startswith("exams;dur=")
+    assert 'desc="sql=3 redis=1"' in header
+    assert header.endswith("total;dur=10")
+
+
+def test_server_timing_header_is_opt_in():
+    """The response only carries Server-Timing when the debug header is sent"""
+    test_app = Flask(__name__)
+    register_handlers(test_app)
+
+    @test_app.route("/__span_recorder_test")
+    def _span_route():
+        with span_recorder.record("view") as recorder:
+            with recorder.span("exams"):
+                pass
+        return "ok"
+
+    with test_app.test_client() as test_client:
+        plain = test_client.get("/__span_recorder_test")
+        debug = test_client.get(
+            "/__span_recorder_test", headers={span_recorder.DEBUG_HEADER: "1"}
+        )
+
+    assert "Server-Timing" not in plain.headers
+    assert debug.headers["Server-Timing"].startswith("exams;dur=")
@@ -0,0 +1,77 @@
+"""Unit tests for the discharge summary annotations in services.summary_service."""
+
+from datetime import date
+
+from services import summary_service
+
+
+def _row(note_day, first_day, last_day, **fields):
+    return (
+        note_day,
+        first_day,
+        last_day,
+        *[fields.get(key) for key in summary_service._ANNOTATION_FIELDS],
+    )
+
+
+def _annotations(rows):
+    return summary_service._get_annotations_result(
+        summary_service._collect_annotations(rows)
+    )
+
+
+def test_no_notes_returns_empty_annotations():
+    """Sem evoluções todas as anotações ficam vazias"""
+    annotations = _annotations([])
+
+    assert annotations["clinicalSummary"] == {"list": [], "value": ""}
+    assert annotations["reason"] == {"list": [], "value": ""}
+    assert len(annotations) == 8
+
+
+def test_annotations_respect_the_date_windows():
+    """Cada campo considera apenas as evoluções da sua janela de datas"""
+    first, last = date(2024, 1, 1), date(2024, 1, 20)
+    rows = [
+        _row(first, first, last, reason=["dor"], previousDrugs=["AAS"]),
+        _row(date(2024, 1, 2), first, last, previousDrugs=["omeprazol"]),
+        _row(date(2024, 1, 5), first, last, reason=["febre"], diagnosis=["IAM"]),
+        _row(date(2024, 1, 6), first, last, reason=["fora"], summary=["antigo"]),
+        _row(date(2024, 1, 18), first, last, dischargePlan=["fora"]),
+        _row(date(2024, 1, 19), first, last, summary=["estável"], exams=["ECG"]),
+        _row(last, first, last, dischargeCondition=["alta"], diagnosis=["IAM"]),
+    ]
+
+    annotations = _annotations(rows)
+
+    # 4 days after the first note
+    assert annotations["reason"]["list"] == ["dor", "febre"]
+    # 1 day after the first note
+    assert annotations["previousDrugs"]["list"] == ["AAS", "omeprazol"]
+    # whole admission, unique values
+    assert annotations["diagnosis"] == {"list": ["IAM"], "value": "IAM"}
+    assert annotations["exams"]["list"] == ["ECG"]
+    # 1 day before the last note
+    assert annotations["dischargePlan"]["list"] == []
+    assert annotations["dischargeCondition"]["list"] == ["alta"]
+    assert annotations["clinicalSummary"] == {
+        "list": ["dor", "febre", "estável"],
+        "value": "dor. febre. . estável",
+    }
+    assert "summary" not in annotations
+
+
+def test_annotation_values_are_escaped_and_truncated():
+    """Valores são escapados e limitados como antes"""
+    day = date(2024, 1, 1)
+    rows = [
+        _row(day, day, day, exams=['Hb "baixa"', "C:\\temp", "x" * 3000, None, 1]),
+        _row(day, day, day, exams="not a list"),
+    ]
+
+    exams = _annotations(rows)["exams"]
+
+    assert exams["list"][:2] == ['Hb "baixa"', "C:\\temp"]
+    assert exams["list"][3] == "1"
+    assert exams["value"].startswith('Hb \\"baixa\\". C:temp. xxx')
+    assert len(exams["value"]) <= 2002
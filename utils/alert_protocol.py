@@ -1,25 +1,22 @@
 """AlertProtocol class: test protocol rules against prescription data"""
 
-import re
 from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Optional, Union
 
 from models.appendix import MeasureUnit
-from models.enums import DrugTypeEnum
 from models.main import DrugAttributes, Substance
 from models.prescription import Patient, Prescription, PrescriptionDrug
-from utils import prescriptionutils
+from utils import prescription_item, prescriptionutils
+from utils.alert_protocol_compiler import compile_protocol, is_safe_logical_expression
 from utils.alert_protocol_trace import (
     CombinationCriterionTrace,
     CombinationDrugTrace,
     TraceReasonEnum,
     VariableTrace,
 )
+from utils.prescription_item import PrescriptionItem
 
-# Simpler regex that avoids ReDoS by using alternation without nested quantifiers
-# Matches any combination of: keywords (True, False, and, or, not) OR structural chars (whitespace, parens)
-SAFE_LOGICAL_EXPR_REGEX = r"^(?:True|False|and|or|not|[()\s])+$"
 
 
 @dataclass
@@ -59,7 +56,7 @@ class AlertProtocol:
     ):
         self.prescription = prescription
         self.patient = patient
-        self.drugs = drugs
+        self.drugs = prescription_item.to_items(drugs)
         self.filtered_drugs = self._filter_drug_list()
         self.exams = exams
         self.exams_by_ref = {}
@@ -98,8 +95,8 @@ class AlertProtocol:
 
         # fill lists
         for d in self.filtered_drugs:
-            prescription_drug: PrescriptionDrug = d[0]
-            substance: Substance = d[11]
+            prescription_drug: PrescriptionDrug = d.prescription_drug
+            substance: Substance = d.substance
 
             if prescription_drug.idDrug:
                 self.id_drug_list.append(str(prescription_drug.idDrug))
@@ -113,8 +110,64 @@ class AlertProtocol:
             if substance and substance.idclass:
                 self.class_list.append(substance.idclass)
 
-    def get_protocol_alerts(self, protocol: dict):
-        """get configured protocol alerts"""
+    def get_protocol_alerts(self, protocol: dict, cache_key=None):
+        """get configured protocol alerts
+
+        The trigger is compiled once (per cache_key) and evaluated with
+        short-circuit: variables that cannot change the outcome are only
+        evaluated when the protocol is active.
+        """
+
+        if self._trace_enabled:
+            return self._get_protocol_alerts_eager(protocol=protocol)
+
+        compiled = compile_protocol(protocol=protocol, cache_key=cache_key)
+        if compiled.needs_length_check():
+            # the substituted trigger may exceed the length limit: keep the text check
+            return self._get_protocol_alerts_eager(protocol=protocol)
+
+        results = {}
+        related_items = {}
+
+        def _evaluate(slot: int):
+            if slot not in results:
+                self.related_items = []
+                results[slot] = self._fill_variable(variable=compiled.variables[slot])
+                related_items[slot] = self.related_items
+
+            return results[slot]
+
+        active = compiled.trigger(_evaluate)
+
+        if active:
+            for slot in range(len(compiled.variables)):
+                _evaluate(slot)
+
+        self.protocol_variables = {}
+        self.protocol_msgs = []
+        self.related_items = []
+
+        if not active:
+            return None
+
+        for slot, v in enumerate(compiled.variables):
+            value = results[slot]
+            self.protocol_variables[v.get("name")] = value
+            self.related_items.extend(related_items[slot])
+
+            fail_msg = v.get("message", {})
+            if fail_msg.get("if", None) == value:
+                self.protocol_msgs.append(fail_msg.get("then"))
+
+        self._last_substituted_trigger = compiled.substitute(self.protocol_variables)
+
+        result = compiled.result.copy()
+        result["variableMessages"] = self.protocol_msgs
+        result["related_items"] = self.related_items
+        return result
+
+    def _get_protocol_alerts_eager(self, protocol: dict):
+        """evaluates every variable and the substituted trigger (used for tracing)"""
 
         self.protocol_variables = {}
         self.protocol_msgs = []
@@ -577,10 +630,10 @@ class AlertProtocol:
 
             found = False
             for d in self.filtered_drugs:
-                prescription_drug: PrescriptionDrug = d[0]
-                substance: Substance = d[11]
-                measure_unit: MeasureUnit = d[2]
-                drug_attributes: DrugAttributes = d[6]
+                prescription_drug: PrescriptionDrug = d.prescription_drug
+                substance: Substance = d.substance
+                measure_unit: MeasureUnit = d.measure_unit
+                drug_attributes: DrugAttributes = d.drug_attributes
                 period_cpoe = d.period_cpoe
                 drug_attr_keys = self._get_drug_attribute_keys(drug_attributes)
                 drug_alert_limit_keys = self._get_drug_alert_limit_keys(drug_attributes)
@@ -590,7 +643,7 @@ class AlertProtocol:
                     drug_trace = CombinationDrugTrace(
                         id_prescription_drug=prescription_drug.id,
                         id_drug=prescription_drug.idDrug,
-                        drug_name=d[1].name if d[1] is not None else None,
+                        drug_name=d.drug.name if d.drug is not None else None,
                     )
                     self._current_trace.drugs.append(drug_trace)
 
@@ -818,44 +871,14 @@ class AlertProtocol:
 
         raise NotImplementedError(f"operator not supported: {op}")
 
-    def _filter_drug_list(self):
-        filtered_list = []
-        valid_sources = [
-            DrugTypeEnum.DRUG.value,
-            DrugTypeEnum.SOLUTION.value,
-            DrugTypeEnum.PROCEDURE.value,
-            DrugTypeEnum.DIET.value,
-        ]
-
-        for item in self.drugs:
-            prescription_drug: PrescriptionDrug = item[0]
-
-            if prescription_drug.source not in valid_sources:
-                continue
-
-            if prescription_drug.suspendedDate is not None:
-                continue
-
-            filtered_list.append(item)
-
-        return filtered_list
+    def _filter_drug_list(self) -> list[PrescriptionItem]:
+        """Active drugs, solutions, procedures and diets"""
+        return self.drugs.protocol_items
 
     def _is_safe_logical_expression(self, expr: str) -> bool:
         """Validates if the expression contains only safe logical operators and values"""
 
-        # Additional checks: non-empty, length limit, and regex validation
-        if not expr or len(expr) >= 500:
-            return False
-
-        # Verify expression contains only safe tokens
-        if not re.fullmatch(SAFE_LOGICAL_EXPR_REGEX, expr):
-            return False
-
-        # Ensure at least one keyword is present (not just whitespace/parens)
-        if not re.search(r"\b(?:True|False|and|or|not)\b", expr):
-            return False
-
-        return True
+        return is_safe_logical_expression(expr)
 
     def _get_drug_attribute_keys(self, drug_attributes: DrugAttributes) -> list[str]:
         drug_attr_keys = []
@@ -0,0 +1,260 @@
+"""Compiled protocol triggers for AlertProtocol
+
+A protocol trigger is a logical expression over its variables, e.g.
+"{{v1}} and ({{v2}} or not {{v3}})". Instead of substituting the variable
+results into the string and calling eval on every evaluation, the trigger is
+parsed once into a tree of closures that asks for variable results on demand,
+so variables that cannot change the outcome are never evaluated.
+
+Compiled protocols are cached per process by (protocol id, updated_at).
+"""
+
+import ast
+import re
+from typing import Callable, Optional
+
+# Simpler regex that avoids ReDoS by using alternation without nested quantifiers
+# Matches any combination of: keywords (True, False, and, or, not) OR structural chars (whitespace, parens)
+SAFE_LOGICAL_EXPR_REGEX = r"^(?:True|False|and|or|not|[()\s])+$"
+
+MAX_TRIGGER_LENGTH = 500
+
+SUPPORTED_FIELDS = {
+    "substance",
+    "class",
+    "idDrug",
+    "route",
+    "cn_stats",
+    "exam",
+    "exam_ref",
+    "admissionTime",
+    "stConcilia",
+    "age",
+    "weight",
+    "imc",
+    "segmentType",
+    "idDepartment",
+    "idIcd",
+    "dischargeReason",
+    "insurance",
+    "idSegment",
+    "combination",
+}
+
+# fields whose IN operator can only be true when the prescription has one of the values
+INDEXED_FIELDS = {"substance", "class", "idDrug"}
+
+# compiled protocols kept per process; edits change updated_at (and the key)
+MAX_CACHED_PROTOCOLS = 5000
+_compiled_protocols: dict = {}
+
+_PLACEHOLDER_REGEX = re.compile(r"\{\{(.*?)\}\}")
+
+
+class CompiledProtocol:
+    """Protocol ready to be evaluated"""
+
+    __slots__ = (
+        "variables",
+        "names",
+        "slot_by_name",
+        "trigger",
+        "template",
+        "max_length",
+        "result",
+        "required_keys",
+    )
+
+    def __init__(self, protocol: dict):
+        self.variables = tuple(protocol.get("variables", []))
+        self.names = tuple(v.get("name") for v in self.variables)
+        # a repeated name keeps the result of its last definition (dict semantics)
+        self.slot_by_name = {name: slot for slot, name in enumerate(self.names)}
+        self.template = protocol.get("trigger")
+        self.result = protocol.get("result", {})
+
+        for v in self.variables:
+            if v.get("field", None) not in SUPPORTED_FIELDS:
+                raise NotImplementedError("field not supported")
+
+        self.trigger, self.max_length, tree = _compile_trigger(
+            template=self.template, slot_by_name=self.slot_by_name
+        )
+        self.required_keys = _get_required_keys(tree=tree, variables=self.variables)
+
+    def needs_length_check(self) -> bool:
+        """The substituted trigger might reach the length limit (rare)"""
+        return self.max_length >= MAX_TRIGGER_LENGTH
+
+    def substitute(self, results: dict) -> str:
+        """Trigger with the variable results in place (as the original eval input)"""
+        trigger = self.template
+        for name, value in results.items():
+            trigger = trigger.replace("{{" + name + "}}", str(value))
+
+        return trigger
+
+
+def compile_protocol(protocol: dict, cache_key=None) -> CompiledProtocol:
+    """Compile a protocol config, reusing the process cache when a key is given"""
+    if cache_key is None:
+        return CompiledProtocol(protocol)
+
+    compiled = _compiled_protocols.get(cache_key)
+    if compiled is None:
+        compiled = CompiledProtocol(protocol)
+
+        if len(_compiled_protocols) >= MAX_CACHED_PROTOCOLS:
+            _compiled_protocols.clear()
+        _compiled_protocols[cache_key] = compiled
+
+    return compiled
+
+
+def is_safe_logical_expression(expr: str) -> bool:
+    """Validates if the expression contains only safe logical operators and values"""
+
+    # Additional checks: non-empty, length limit, and regex validation
+    if not expr or len(expr) >= MAX_TRIGGER_LENGTH:
+        return False
+
+    return _has_only_safe_tokens(expr)
+
+
+def _has_only_safe_tokens(expr: str) -> bool:
+    # Verify expression contains only safe tokens
+    if not re.fullmatch(SAFE_LOGICAL_EXPR_REGEX, expr):
+        return False
+
+    # Ensure at least one keyword is present (not just whitespace/parens)
+    if not re.search(r"\b(?:True|False|and|or|not)\b", expr):
+        return False
+
+    return True
+
+
+def _compile_trigger(
+    template: str, slot_by_name: dict
+) -> tuple[Callable, int, ast.AST]:
+    """Parse the trigger template into a closure: fn(get_variable) -> bool
+
+    Placeholders of known variables become names (_v0, _v1, ...), so the text
+    validation is the same one applied to the substituted trigger before.
+    """
+    if not template:
+        raise ValueError("unsafe expression")
+
+    placeholders = []
+
+    def _to_name(match: re.Match) -> str:
+        name = match.group(1)
+        if name not in slot_by_name:
+            # unknown variables are never substituted: the original check rejects them
+            raise ValueError("unsafe expression")
+
+        placeholders.append(name)
+        return f"_v{slot_by_name[name]}"
+
+    expression = _PLACEHOLDER_REGEX.sub(_to_name, template)
+
+    # "False" is the longest value a placeholder can become
+    fixed_length = len(_PLACEHOLDER_REGEX.sub("", template))
+    max_length = fixed_length + len("False") * len(placeholders)
+    min_length = fixed_length + len("True") * len(placeholders)
+
+    if min_length >= MAX_TRIGGER_LENGTH:
+        raise ValueError("unsafe expression")
+
+    # every value is a keyword, so "True" stands for any of them in the text check
+    sample = _PLACEHOLDER_REGEX.sub("True", template)
+    if not _has_only_safe_tokens(sample):
+        raise ValueError("unsafe expression")
+
+    tree = ast.parse(expression.strip(), mode="eval")
+
+    return _compile_node(tree.body), max_length, tree.body
+
+
+def _compile_node(node: ast.AST) -> Callable:
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(v) for v in node.values]
+
+        if isinstance(node.op, ast.And):
+            return lambda get: all(operand(get) for operand in operands)
+
+        return lambda get: any(operand(get) for operand in operands)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile_node(node.operand)
+        return lambda get: not operand(get)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+        value = node.value
+        return lambda get: value
+
+    if isinstance(node, ast.Name) and re.fullmatch(r"_v\d+", node.id):
+        slot = int(node.id[2:])
+        return lambda get: get(slot)
+
+    raise ValueError("unsafe expression")
+
+
+def get_index_key(field: str, value) -> tuple:
+    """Key used to match prescription data against required_keys"""
+    if field == "class":
+        return (field, value)
+
+    return (field, str(value))
+
+
+def _get_required_keys(tree: ast.AST, variables: tuple) -> Optional[frozenset]:
+    """Keys of which the prescription must have at least one for the trigger to fire
+
+    Every indexed variable (substance/class/idDrug IN ...) is assumed False and the
+    others unknown: when the trigger is still False, the protocol needs a positive
+    match and is indexed by the values of those variables. Otherwise returns None.
+    """
+    referenced = {
+        int(node.id[2:]) for node in ast.walk(tree) if isinstance(node, ast.Name)
+    }
+
+    known = {}
+    keys = set()
+    for slot in sorted(referenced):
+        v = variables[slot]
+        values = v.get("value")
+        if (
+            v.get("field") in INDEXED_FIELDS
+            and v.get("operator") == "IN"
+            and isinstance(values, list)
+        ):
+            known[slot] = False
+            keys.update(get_index_key(v.get("field"), value) for value in values)
+
+    if not known or _evaluate_partial(tree, known) is not False:
+        return None
+
+    return frozenset(keys)
+
+
+def _evaluate_partial(node: ast.AST, known: dict) -> Optional[bool]:
+    """Three-valued evaluation of the trigger tree (None is unknown)"""
+    if isinstance(node, ast.BoolOp):
+        values = [_evaluate_partial(v, known) for v in node.values]
+        absorbing = isinstance(node.op, ast.Or)
+
+        if absorbing in values:
+            return absorbing
+        if None in values:
+            return None
+
+        return not absorbing
+
+    if isinstance(node, ast.UnaryOp):
+        value = _evaluate_partial(node.operand, known)
+        return None if value is None else not value
+
+    if isinstance(node, ast.Constant):
+        return node.value
+
+    return known.get(int(node.id[2:]))
@@ -0,0 +1,165 @@
+"""Drug alert texts, by alert type
+
+Texts are written as readable multi-line templates and normalized once, at import,
+the same way alert texts have always been cleaned up: runs of two or more spaces
+and line breaks are removed (not collapsed). Rendering is a str.format over the
+normalized template.
+"""
+
+import re
+
+from models.enums import DrugAlertTypeEnum
+
+_SPACES_REGEX = re.compile(" {2,}")
+
+_DIALYSIS_TEXT = (
+    "Medicamento é contraindicado ou deve sofrer ajuste de posologia, já que o "
+    "paciente está em {dialysis}."
+)
+
+_KIDNEY_FUNCTION_TEXT = """
+    Avaliar se o medicamento já está com o ajuste adequado conforme a função renal ou suspenso no caso de contraindicação, já que a função renal do paciente"""
+
+_MISSING_WEIGHT_TEXT = "A dose máxima registrada é por kg, mas o peso do paciente não está disponível. Favor preencher manualmente o peso."
+
+ALERT_TEXTS = {
+    DrugAlertTypeEnum.KIDNEY: {
+        "dialysis_continuous": _DIALYSIS_TEXT.format(dialysis="diálise contínua"),
+        "dialysis_extended": _DIALYSIS_TEXT.format(
+            dialysis="diálise estendida, também conhecida como SLED"
+        ),
+        "dialysis_intermittent": _DIALYSIS_TEXT.format(dialysis="diálise intermitente"),
+        "dialysis_peritoneal": _DIALYSIS_TEXT.format(dialysis="diálise peritoneal"),
+        "ckd": _KIDNEY_FUNCTION_TEXT
+        + """ (
+            {ckd} mL/min) está abaixo de {kidney} mL/min.
+        """,
+        "schwartz2": _KIDNEY_FUNCTION_TEXT
+        + """
+            ({value} mL/min/1.73m²) está abaixo de
+            {kidney} mL/min. (Schwartz 2)
+        """,
+        "schwartz1": _KIDNEY_FUNCTION_TEXT
+        + """
+            ({value} mL/min/1.73m²) está abaixo de {kidney}
+            mL/min. (Schwartz 1)
+        """,
+    },
+    DrugAlertTypeEnum.LIVER: {
+        "transaminase": """
+            Avaliar se o medicamento já está com o ajuste adequado conforme a função hepática ou suspenso no caso de contraindicação, já que o paciente apresenta transaminase alterada. <br/>
+            ({exam_name} {exam_value} U/L).
+        """,
+    },
+    DrugAlertTypeEnum.PLATELETS: {
+        "platelets": """
+            Medicamento contraindicado para paciente com plaquetas ({value} plaquetas/µL)
+            abaixo de {platelets} plaquetas/µL.
+        """,
+    },
+    DrugAlertTypeEnum.ELDERLY: {
+        "elderly": """
+            Medicamento potencialmente inapropriado para idosos, independente das comorbidades do paciente.
+        """,
+    },
+    DrugAlertTypeEnum.TUBE: {
+        "tube": "Medicamento contraindicado via sonda ({route})",
+    },
+    DrugAlertTypeEnum.ALLERGY: {
+        "allergy": "Paciente alérgico a este medicamento.",
+    },
+    DrugAlertTypeEnum.MAX_TIME: {
+        "max_time": """
+          Tempo de tratamento atual ({period} dias) maior que o tempo máximo de tratamento (
+          {max_time} dias) usualmente recomendado.
+        """,
+    },
+    DrugAlertTypeEnum.MAX_DOSE: {
+        "missing_weight": _MISSING_WEIGHT_TEXT,
+        "dose_weight": """
+            Dose diária prescrita ({dose} {unit}/Kg)
+             maior que a dose de alerta
+            ({max_dose} {unit}/Kg)
+             usualmente recomendada (considerada a dose diária independente da indicação).
+        """,
+        "dose": """
+            Dose diária prescrita ({dose} {unit})
+             maior que a dose de alerta ({max_dose} {unit})
+             usualmente recomendada (considerada a dose diária independente da indicação).
+        """,
+    },
+    DrugAlertTypeEnum.MAX_DOSE_PLUS: {
+        "missing_weight": _MISSING_WEIGHT_TEXT,
+        "dose_weight": """
+            Dose diária prescrita SOMADA (
+            {dose} {unit}/Kg) maior
+            que a dose de alerta (
+            {max_dose} {unit}/Kg)
+            usualmente recomendada (Frequência "AGORA" não é considerada no cálculo)."
+        """,
+        "dose": """
+            Dose diária prescrita SOMADA (
+            {dose} {unit}) maior que a
+            dose de alerta ({max_dose} {unit})
+            usualmente recomendada (Frequência "AGORA" não é considerada no cálculo).
+        """,
+    },
+    DrugAlertTypeEnum.IRA: {
+        "vancomycin": """
+            Risco de desenvolvimento de Insuficiência Renal Aguda (IRA), já que o resultado do cálculo
+            [dose diária de VANCOMICINA/TFG/peso] é superior a 0,6219. Caso o paciente esteja em diálise,
+            desconsiderar. <a href="https://revista.ghc.com.br/index.php/cadernosdeensinoepesquisa/issue/view/3" target="_blank">Referência: CaEPS</a>
+        """,
+    },
+    DrugAlertTypeEnum.PREGNANT: {
+        "pregnant": "Paciente gestante com medicamento classificado como {classification} prescrito. Avaliar manutenção deste medicamento com a equipe médica.",
+    },
+    DrugAlertTypeEnum.LACTATING: {
+        "high_risk": """Paciente amamentando com medicamento classificado como Alto risco prescrito.
+            Avaliar manutenção deste medicamento com a equipe médica ou cessação da amamentação.""",
+        "medium_risk": """Paciente amamentando com medicamento classificado como Médio Risco prescrito.
+            Avaliar manutenção deste medicamento com a equipe médica ou cessação da amamentação.""",
+    },
+    DrugAlertTypeEnum.FASTING: {
+        "fasting": """
+            O medicamento deve ser administrado em jejum, verificar horários de administração.
+        """,
+    },
+    DrugAlertTypeEnum.PROTOCOL: {
+        "message": "{message}",
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Remove runs of two or more spaces and line breaks"""
+    return _SPACES_REGEX.sub("", text).replace("\n", "")
+
+
+_TEMPLATES = {
+    (alert_type, name): normalize(text)
+    for alert_type, texts in ALERT_TEXTS.items()
+    for name, text in texts.items()
+}
+
+
+def render(alert_type: DrugAlertTypeEnum, name: str, **params) -> str:
+    """Alert text of the type, with the params in place"""
+    values = {key: str(value) for key, value in params.items()}
+
+    if any(_needs_normalization(v) for v in values.values()):
+        # whitespace inside a param is cleaned up along with the text around it
+        return normalize(ALERT_TEXTS[alert_type][name].format(**values))
+
+    return _TEMPLATES[(alert_type, name)].format(**values)
+
+
+def _needs_normalization(value: str) -> bool:
+    # an empty value (or one with edge spaces) can join the spaces around it
+    return (
+        not value
+        or "\n" in value
+        or "  " in value
+        or value[0] == " "
+        or value[-1] == " "
+    )
@@ -0,0 +1,45 @@
+"""Concurrent execution of independent loaders inside a request
+
+Each task runs on a shared, bounded thread pool with its own Flask context and,
+therefore, its own scoped db session (flask-sqlalchemy scopes sessions by app
+context). The tenant schema is applied to every worker session and the request
+globals (g) are copied so feature caches, permissions and jwt claims behave the
+same way they do in the calling thread.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, g, has_request_context
+
+from models.main import dbSession
+
+MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="noharm")
+
+
+def run_concurrently(tasks: dict, schema: str) -> dict:
+    """Run every callable in tasks concurrently and return their results by key
+
+    Exceptions raised by a task are re-raised in the calling thread.
+    """
+    if not has_request_context():
+        raise RuntimeError("run_concurrently requires an active request context")
+
+    request_globals = dict(g.__dict__)
+
+    def _bind(fn):
+        @copy_current_request_context
+        def _worker():
+            for key, value in request_globals.items():
+                setattr(g, key, value)
+
+            dbSession.setSchema(schema)
+
+            return fn()
+
+        return _worker
+
+    futures = {key: _executor.submit(_bind(fn)) for key, fn in tasks.items()}
+
+    return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,80 @@
+"""Keyset pagination: opaque cursors and the filter for the next page
+
+A cursor holds the sort values of the last row of a page. Lists are sorted by every
+cursor column descending (nulls first, the postgres default), the last column being
+unique, so the next page starts right after that row no matter how many rows came
+before it.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, false, or_
+
+from exception.validation_error import ValidationError
+from utils import status
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque token for the sort values of a row"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Sort values of a cursor token (ValidationError when it is invalid)"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("invalid cursor size")
+
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise ValidationError(
+            "Cursor inválido",
+            "errors.invalidParams",
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+
+def after_cursor(columns: list, values: list):
+    """Filter for the rows after the cursor, for columns sorted descending"""
+    condition = false()
+
+    for column, value in reversed(list(zip(columns, values))):
+        if value is None:
+            condition = or_(column != None, and_(column == None, condition))
+        else:
+            condition = or_(column < value, and_(column == value, condition))
+
+    return condition
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+
+        raise ValueError("invalid cursor value")
+
+    if value is not None and not isinstance(value, (int, float, str)):
+        raise ValueError("invalid cursor value")
+
+    return value
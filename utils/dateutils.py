@@ -29,6 +29,13 @@ def data2age(birthdate):
     return age
 
 
+def date2age(birthdate: date):
+    """Same as data2age, from a date (or datetime) instead of an iso string"""
+    days_in_year = 365.2425
+    birthdate = datetime(birthdate.year, birthdate.month, birthdate.day)
+    return int((datetime.today() - birthdate).days / days_in_year)
+
+
 def date_overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime):
     """
     Checks if two datetime ranges overlap.
@@ -2,7 +2,9 @@
 
 import math
 import re
+from bisect import bisect_left
 from difflib import SequenceMatcher
+from typing import NamedTuple
 
 from models.appendix import MeasureUnit
 from models.enums import DefaultMeasureUnitEnum, DrugTypeEnum, FeatureEnum
@@ -10,7 +12,13 @@ from models.main import Drug, DrugAttributes
 from models.prescription import PrescriptionDrug
 from services import drug_service, feature_service
 from services.admin import admin_ai_service
-from utils import dateutils, numberutils, prescriptionutils, stringutils
+from utils import (
+    dateutils,
+    numberutils,
+    prescription_item,
+    prescriptionutils,
+    stringutils,
+)
 
 CARBOPLATIN_SCTID = 386905002
 
@@ -28,6 +36,16 @@ def _get_legacy_alert(kind):
     return config[kind]
 
 
+class _InterventionIndex(NamedTuple):
+    # int(id) -> intervention (the last one, for repeated ids)
+    by_id: dict
+    # (idDrug, admissionNumber) -> lowest int(idPrescription)
+    first_prescription: dict
+    # (idDrug, admissionNumber) -> (sorted int(idPrescription) of the accepted
+    # interventions, best accepted intervention up to each position)
+    accepted: dict
+
+
 class DrugList:
     def __init__(
         self,
@@ -41,7 +59,7 @@ class DrugList:
         admission_number,
         is_cpoe=False,
     ):
-        self.drugList = drugList
+        self.drugList = prescription_item.to_items(drugList)
         self.interventions = interventions
         self.relations = relations
         self.alerts = alerts
@@ -132,36 +150,73 @@ class DrugList:
         return stringutils.remove_accents(d["drug"]).lower()
 
     def getPrevIntervention(self, idDrug, idPrescription):
-        result = {}
-        for i in self.interventions:
-            if (
-                i["idDrug"] == idDrug
-                and i["status"] == "s"
-                and int(i["idPrescription"]) < idPrescription
-                and i["admissionNumber"] == self.admission_number
-            ):
-                if "id" in result.keys() and int(result["id"]) > int(i["id"]):
-                    continue
-                result = i
-        return result
+        """Accepted intervention (highest id) of the drug in a previous prescription"""
+        prescriptions, accepted = self._get_intervention_index().accepted.get(
+            (idDrug, self.admission_number), ((), ())
+        )
+        position = bisect_left(prescriptions, idPrescription)
+
+        return accepted[position - 1] if position > 0 else {}
 
     def getExistIntervention(self, idDrug, idPrescription):
-        for i in self.interventions:
-            if (
-                i["idDrug"] == idDrug
-                and int(i["idPrescription"]) < idPrescription
-                and i["admissionNumber"] == self.admission_number
-            ):
-                return True
+        """Any intervention of the drug in a previous prescription"""
+        first_prescription = self._get_intervention_index().first_prescription.get(
+            (idDrug, self.admission_number)
+        )
 
-        return False
+        return first_prescription is not None and first_prescription < idPrescription
 
     def getIntervention(self, idPrescriptionDrug):
-        result = {}
-        for i in self.interventions:
-            if int(i["id"]) == idPrescriptionDrug:
-                result = i
-        return result
+        return self._get_intervention_index().by_id.get(idPrescriptionDrug, {})
+
+    def _get_intervention_index(self) -> "_InterventionIndex":
+        """Interventions indexed once per list (replacing self.interventions reindexes)"""
+        if getattr(self, "_indexed_interventions", None) is not self.interventions:
+            self._indexed_interventions = self.interventions
+            self._intervention_index = self._build_intervention_index(
+                self.interventions
+            )
+
+        return self._intervention_index
+
+    @staticmethod
+    def _build_intervention_index(interventions) -> "_InterventionIndex":
+        by_id = {}
+        first_prescription = {}
+        accepted_by_key = {}
+
+        for position, i in enumerate(interventions):
+            id_intervention = int(i["id"])
+            id_prescription = int(i["idPrescription"])
+            key = (i["idDrug"], i["admissionNumber"])
+
+            by_id[id_intervention] = i
+
+            if id_prescription < first_prescription.get(key, id_prescription + 1):
+                first_prescription[key] = id_prescription
+
+            if i["status"] == "s":
+                accepted_by_key.setdefault(key, []).append(
+                    (id_prescription, id_intervention, position, i)
+                )
+
+        accepted = {}
+        for key, items in accepted_by_key.items():
+            items.sort(key=lambda item: item[0])
+
+            best = None
+            best_items = []
+            for item in items:
+                # highest id wins, the last one in the list for repeated ids
+                if best is None or item[1:3] > best[1:3]:
+                    best = item
+                best_items.append(best[3])
+
+            accepted[key] = ([item[0] for item in items], best_items)
+
+        return _InterventionIndex(
+            by_id=by_id, first_prescription=first_prescription, accepted=accepted
+        )
 
     def get_drugs_by_source(self, source_list: list[str]):
         items = []
@@ -175,11 +230,11 @@ class DrugList:
         """Process drugList and add source information. Save result in drug_results"""
 
         for pd in self.drugList:
-            pd_drug_attributes: DrugAttributes = pd[6]
+            pd_drug_attributes: DrugAttributes = pd.drug_attributes
 
-            if pd[0].source is None:
-                pd[0].source = "Medicamentos"
-            if pd[0].source not in [
+            if pd.prescription_drug.source is None:
+                pd.prescription_drug.source = "Medicamentos"
+            if pd.prescription_drug.source not in [
                 DrugTypeEnum.DRUG.value,
                 DrugTypeEnum.SOLUTION.value,
                 DrugTypeEnum.PROCEDURE.value,
@@ -187,8 +242,12 @@ class DrugList:
             ]:
                 continue
 
-            pdUnit = stringutils.strNone(pd[2].id) if pd[2] else ""
-            pdWhiteList = bool(pd[6].whiteList) if pd[6] is not None else False
+            pdUnit = stringutils.strNone(pd.measure_unit.id) if pd.measure_unit else ""
+            pdWhiteList = (
+                bool(pd.drug_attributes.whiteList)
+                if pd.drug_attributes is not None
+                else False
+            )
             doseWeightValue = None
             doseWeightDayValue = None
             doseWeightStr = None
@@ -199,45 +258,55 @@ class DrugList:
             alerts = []
             alerts_complete = []
 
-            if self.relations["alerts"] and str(pd[0].id) in self.relations["alerts"]:
-                for a in self.relations["alerts"][str(pd[0].id)]:
+            if (
+                self.relations["alerts"]
+                and str(pd.prescription_drug.id) in self.relations["alerts"]
+            ):
+                for a in self.relations["alerts"][str(pd.prescription_drug.id)]:
                     alerts.append(a["text"])
                     alerts_complete.append(a)
 
-            if self.alerts["alerts"] and str(pd[0].id) in self.alerts["alerts"]:
-                for a in self.alerts["alerts"][str(pd[0].id)]:
+            if (
+                self.alerts["alerts"]
+                and str(pd.prescription_drug.id) in self.alerts["alerts"]
+            ):
+                for a in self.alerts["alerts"][str(pd.prescription_drug.id)]:
                     alerts.append(a["text"])
                     alerts_complete.append(a)
 
-            if self.exams and pd[6]:
-                if pd[6].chemo and pd[0].dose:
+            if self.exams and pd.drug_attributes:
+                if pd.drug_attributes.chemo and pd.prescription_drug.dose:
                     bs_weight = numberutils.none2zero(self.exams["weight"])
                     bs_height = numberutils.none2zero(self.exams["height"])
 
                     if bs_weight > 0 and bs_height > 0:
                         body_surface = math.sqrt((bs_weight * bs_height) / 3600)
-                        doseBodySurfaceStr = f"""{stringutils.strFormatBR(round(pd[0].dose / body_surface, 2))} {pdUnit}/m²"""
+                        doseBodySurfaceStr = f"""{stringutils.strFormatBR(round(pd.prescription_drug.dose / body_surface, 2))} {pdUnit}/m²"""
 
-                if pd[0].dose:
+                if pd.prescription_drug.dose:
                     weight = numberutils.none2zero(self.exams["weight"])
 
                     if weight > 0:
                         weight = weight if weight > 0 else 1
 
-                        dose_per_kg = pd[0].dose / float(weight)
-                        frequency = numberutils.none2zero(pd[0].frequency)
+                        dose_per_kg = pd.prescription_drug.dose / float(weight)
+                        frequency = numberutils.none2zero(
+                            pd.prescription_drug.frequency
+                        )
 
                         has_conv = (
-                            pd[6].idMeasureUnit is not None
-                            and pd[6].idMeasureUnit != pdUnit
-                            and pd[0].doseconv is not None
+                            pd.drug_attributes.idMeasureUnit is not None
+                            and pd.drug_attributes.idMeasureUnit != pdUnit
+                            and pd.prescription_drug.doseconv is not None
                         )
                         conv_per_kg = None
                         if has_conv:
                             conv_per_kg = (
-                                pd[0].doseconv
-                                if pd[6].useWeight
-                                else round(pd[0].doseconv / float(weight), 2)
+                                pd.prescription_drug.doseconv
+                                if pd.drug_attributes.useWeight
+                                else round(
+                                    pd.prescription_drug.doseconv / float(weight), 2
+                                )
                             )
 
                         for multiplier, suffix in [
@@ -263,15 +332,17 @@ class DrugList:
                             if has_conv:
                                 conv_value = stringutils.strFormatBR(
                                     round(conv_per_kg * multiplier, 2)
-                                    if not pd[6].useWeight
+                                    if not pd.drug_attributes.useWeight
                                     else conv_per_kg * multiplier
                                 )
                                 conv_suffix = (
-                                    " (faixa arredondada)" if pd[6].useWeight else ""
+                                    " (faixa arredondada)"
+                                    if pd.drug_attributes.useWeight
+                                    else ""
                                 )
                                 result += (
                                     f" ou {conv_value} "
-                                    f"{pd[6].idMeasureUnit}{suffix}"
+                                    f"{pd.drug_attributes.idMeasureUnit}{suffix}"
                                     f"{conv_suffix}"
                                 )
 
@@ -281,27 +352,31 @@ class DrugList:
                                 doseWeightDayStr = result
 
                 if (
-                    not bool(pd[0].suspendedDate)
-                    and pd[6]
-                    and pd[6].tube
-                    and pd[0].tube
+                    not bool(pd.prescription_drug.suspendedDate)
+                    and pd.drug_attributes
+                    and pd.drug_attributes.tube
+                    and pd.prescription_drug.tube
                 ):
                     tubeAlert = True
 
             period, total_period = prescriptionutils.get_prescription_item_period(
-                is_cpoe=self.is_cpoe, item_period=pd[0].period, cpoe_period=pd[12]
+                is_cpoe=self.is_cpoe,
+                item_period=pd.prescription_drug.period,
+                cpoe_period=pd.period_cpoe,
             )
 
             prevNotes = None
             prevNotesUser = None
-            if pd[8]:
-                prevNotesUser = str(pd[8]).replace("##@", "(").replace("@##", ")")
-                prevNotes = re.sub(r"##@(.*)@##", "", str(pd[8]))
+            if pd.prevNotes:
+                prevNotesUser = (
+                    str(pd.prevNotes).replace("##@", "(").replace("@##", ")")
+                )
+                prevNotes = re.sub(r"##@(.*)@##", "", str(pd.prevNotes))
 
             dialyzable = False
             if (
-                pd[6] != None
-                and pd[6].dialyzable
+                pd.drug_attributes != None
+                and pd.drug_attributes.dialyzable
                 and self.dialysis != None
                 and self.dialysis != "0"
             ):
@@ -312,37 +387,54 @@ class DrugList:
 
             self.drug_results.append(
                 {
-                    "idPrescription": str(pd[0].idPrescription),
-                    "idPrescriptionDrug": str(pd[0].id),
-                    "idDrug": str(pd[0].idDrug),
+                    "idPrescription": str(pd.prescription_drug.idPrescription),
+                    "idPrescriptionDrug": str(pd.prescription_drug.id),
+                    "idDrug": str(pd.prescription_drug.idDrug),
                     "idDepartment": pd.idDepartment,
-                    "idSegment": pd[0].idSegment,
+                    "idSegment": pd.prescription_drug.idSegment,
                     "drug": (
-                        pd[1].name
-                        if pd[1] is not None
-                        else "Medicamento " + str(pd[0].idDrug)
+                        pd.drug.name
+                        if pd.drug is not None
+                        else "Medicamento " + str(pd.prescription_drug.idDrug)
                     ),
-                    "np": pd[6].notdefault if pd[6] is not None else False,
-                    "am": pd[6].antimicro if pd[6] is not None else False,
-                    "av": pd[6].mav if pd[6] is not None else False,
-                    "c": pd[6].controlled if pd[6] is not None else False,
-                    "q": pd[6].chemo if pd[6] is not None else False,
+                    "np": pd.drug_attributes.notdefault
+                    if pd.drug_attributes is not None
+                    else False,
+                    "am": pd.drug_attributes.antimicro
+                    if pd.drug_attributes is not None
+                    else False,
+                    "av": pd.drug_attributes.mav
+                    if pd.drug_attributes is not None
+                    else False,
+                    "c": pd.drug_attributes.controlled
+                    if pd.drug_attributes is not None
+                    else False,
+                    "q": pd.drug_attributes.chemo
+                    if pd.drug_attributes is not None
+                    else False,
                     "dialyzable": dialyzable,
-                    "alergy": bool(pd[0].allergy == "S"),
-                    "allergy": bool(pd[0].allergy == "S"),
+                    "alergy": bool(pd.prescription_drug.allergy == "S"),
+                    "allergy": bool(pd.prescription_drug.allergy == "S"),
                     "whiteList": pdWhiteList,
                     "doseWeight": doseWeightStr,
                     "doseWeightDay": doseWeightDayStr,
                     "doseWeightValue": doseWeightValue,
                     "doseWeightDayValue": doseWeightDayValue,
                     "doseBodySurface": doseBodySurfaceStr,
-                    "dose": pd[0].dose,
+                    "dose": pd.prescription_drug.dose,
                     "measureUnit": (
-                        {"value": pd[2].id, "label": pd[2].description}
-                        if pd[2]
+                        {
+                            "value": pd.measure_unit.id,
+                            "label": pd.measure_unit.description,
+                        }
+                        if pd.measure_unit
                         else {
-                            "value": stringutils.strNone(pd[0].idMeasureUnit),
-                            "label": stringutils.strNone(pd[0].idMeasureUnit),
+                            "value": stringutils.strNone(
+                                pd.prescription_drug.idMeasureUnit
+                            ),
+                            "label": stringutils.strNone(
+                                pd.prescription_drug.idMeasureUnit
+                            ),
                         }
                     ),
                     "idMeasureUnitDefault": pd_drug_attributes.idMeasureUnit
@@ -355,83 +447,103 @@ class DrugList:
                     if pd_drug_attributes
                     else None,
                     "frequency": (
-                        {"value": pd[3].id, "label": pd[3].description}
-                        if pd[3]
+                        {"value": pd.frequency.id, "label": pd.frequency.description}
+                        if pd.frequency
                         else {
-                            "value": stringutils.strNone(pd[0].idFrequency),
-                            "label": stringutils.strNone(pd[0].idFrequency),
+                            "value": stringutils.strNone(
+                                pd.prescription_drug.idFrequency
+                            ),
+                            "label": stringutils.strNone(
+                                pd.prescription_drug.idFrequency
+                            ),
                         }
                     ),
-                    "dayFrequency": pd[0].frequency,
-                    "doseconv": pd[0].doseconv,
-                    "time": prescriptionutils.timeValue(pd[0].interval),
-                    "interval": pd[0].interval,
+                    "dayFrequency": pd.prescription_drug.frequency,
+                    "doseconv": pd.prescription_drug.doseconv,
+                    "time": prescriptionutils.timeValue(pd.prescription_drug.interval),
+                    "interval": pd.prescription_drug.interval,
                     "recommendation": (
-                        pd[0].notes
-                        if pd[0].notes and len(pd[0].notes.strip()) > 0
+                        pd.prescription_drug.notes
+                        if pd.prescription_drug.notes
+                        and len(pd.prescription_drug.notes.strip()) > 0
                         else None
                     ),
                     "period": period,
-                    "periodFixed": pd[0].period,
+                    "periodFixed": pd.prescription_drug.period,
                     "totalPeriod": total_period,
-                    "periodType": pd[0].tp_period,
-                    "periodDayInterval": pd[12],
-                    "periodMax": pd[0].period_total,  # max period in days
+                    "periodType": pd.prescription_drug.tp_period,
+                    "periodDayInterval": pd.period_cpoe,
+                    "periodMax": pd.prescription_drug.period_total,  # max period in days
                     "periodDates": [],
-                    "route": pd[0].route,
+                    "route": pd.prescription_drug.route,
                     "grp_solution": (
-                        pd[0].cpoe_group if self.is_cpoe else pd[0].solutionGroup
+                        pd.prescription_drug.cpoe_group
+                        if self.is_cpoe
+                        else pd.prescription_drug.solutionGroup
                     ),
                     "stage": (
                         "ACM"
-                        if pd[0].solutionACM == "S"
-                        else stringutils.strNone(pd[0].solutionPhase)
+                        if pd.prescription_drug.solutionACM == "S"
+                        else stringutils.strNone(pd.prescription_drug.solutionPhase)
                         + " x "
-                        + stringutils.strNone(pd[0].solutionTime)
+                        + stringutils.strNone(pd.prescription_drug.solutionTime)
                         + " ("
-                        + stringutils.strNone(pd[0].solutionTotalTime)
+                        + stringutils.strNone(pd.prescription_drug.solutionTotalTime)
                         + ")"
                     ),
-                    "infusion": stringutils.strNone(pd[0].solutionDose)
+                    "infusion": stringutils.strNone(pd.prescription_drug.solutionDose)
                     + " "
-                    + stringutils.strNone(pd[0].solutionUnit),
+                    + stringutils.strNone(pd.prescription_drug.solutionUnit),
                     "score": (
-                        str(pd[5])
-                        if not pdWhiteList and pd[0].source != DrugTypeEnum.DIET.value
+                        str(pd.score)
+                        if not pdWhiteList
+                        and pd.prescription_drug.source != DrugTypeEnum.DIET.value
                         else "0"
                     ),
-                    "source": pd[0].source,
-                    "originalSource": pd[0].source,
-                    "checked": bool(pd[0].checked or pd[9] == "s"),
-                    "suspended": bool(pd[0].suspendedDate),
-                    "suspensionDate": dateutils.to_iso(pd[0].suspendedDate),
-                    "status": pd[0].status,
-                    "near": pd[0].near,
+                    "source": pd.prescription_drug.source,
+                    "originalSource": pd.prescription_drug.source,
+                    "checked": bool(pd.prescription_drug.checked or pd.status == "s"),
+                    "suspended": bool(pd.prescription_drug.suspendedDate),
+                    "suspensionDate": dateutils.to_iso(
+                        pd.prescription_drug.suspendedDate
+                    ),
+                    "status": pd.prescription_drug.status,
+                    "near": pd.prescription_drug.near,
                     "prevIntervention": self.getPrevIntervention(
-                        str(pd[0].idDrug), pd[0].idPrescription
+                        str(pd.prescription_drug.idDrug),
+                        pd.prescription_drug.idPrescription,
                     ),
                     "existIntervention": self.getExistIntervention(
-                        str(pd[0].idDrug), pd[0].idPrescription
+                        str(pd.prescription_drug.idDrug),
+                        pd.prescription_drug.idPrescription,
                     ),
                     "alertsComplete": alerts_complete,
                     "tubeAlert": tubeAlert,
-                    "notes": pd[7],
+                    "notes": pd.notes,
                     "prevNotes": prevNotes,
                     "prevNotesUser": "***" if self.hide_names else prevNotesUser,
-                    "drugInfoLink": pd[11].link if pd[11] is not None else None,
-                    "idSubstance": pd[11].id if pd[11] is not None else None,
-                    "substanceName": pd[11].name if pd[11] is not None else None,
-                    "idSubstanceClass": pd[11].idclass if pd[11] is not None else None,
-                    "cpoe_group": pd[0].cpoe_group,
+                    "drugInfoLink": pd.substance.link
+                    if pd.substance is not None
+                    else None,
+                    "idSubstance": pd.substance.id
+                    if pd.substance is not None
+                    else None,
+                    "substanceName": pd.substance.name
+                    if pd.substance is not None
+                    else None,
+                    "idSubstanceClass": pd.substance.idclass
+                    if pd.substance is not None
+                    else None,
+                    "cpoe_group": pd.prescription_drug.cpoe_group,
                     "infusionKey": self.getInfusionKey(pd),
-                    "formValues": pd[0].form,
-                    "drugAttributes": drug_service.to_dict(pd[6]),
+                    "formValues": pd.prescription_drug.form,
+                    "drugAttributes": drug_service.to_dict(pd.drug_attributes),
                     "prescriptionDate": dateutils.to_iso(pd.prescription_date),
                     "prescriptionExpire": dateutils.to_iso(pd.prescription_expire),
-                    "schedule": self.schedule_to_array(pd[0].schedule),
-                    "orderNumber": pd[0].order_number,
-                    "intravenous": pd[0].intravenous,
-                    "feedingTube": pd[0].tube,
+                    "schedule": self.schedule_to_array(pd.prescription_drug.schedule),
+                    "orderNumber": pd.prescription_drug.order_number,
+                    "intravenous": pd.prescription_drug.intravenous,
+                    "feedingTube": pd.prescription_drug.tube,
                     "auc": auc_value,
                 }
             )
@@ -618,7 +730,7 @@ class DrugList:
         priority_set = {}  # True once a "000"-suffix id item has set vol/amount for this key
 
         for pd in self.drugList:
-            if pd[0].solutionGroup or pd[0].cpoe_group:
+            if pd.prescription_drug.solutionGroup or pd.prescription_drug.cpoe_group:
                 key = self.getInfusionKey(pd)
 
                 if key not in result:
@@ -639,41 +751,54 @@ class DrugList:
                     # unable to calculate total volume due to dose unit conversion
                     result[key]["disableTotal"] = True
 
-                if not bool(pd[0].suspendedDate):
+                if not bool(pd.prescription_drug.suspendedDate):
                     # ids ending in "000" are the main component of the solution
-                    is_priority = str(pd[0].id).endswith("000")
+                    is_priority = str(pd.prescription_drug.id).endswith("000")
                     should_update = is_priority or not priority_set[key]
 
-                    if pd[6] and pd[6].amount and pd[6].amountUnit:
+                    if (
+                        pd.drug_attributes
+                        and pd.drug_attributes.amount
+                        and pd.drug_attributes.amountUnit
+                    ):
                         if should_update:
                             result[key]["vol"] = pd_dose
-                            result[key]["amount"] = pd[6].amount
-                            result[key]["unit"] = pd[6].amountUnit
+                            result[key]["amount"] = pd.drug_attributes.amount
+                            result[key]["unit"] = pd.drug_attributes.amountUnit
                             if is_priority:
                                 priority_set[key] = True
 
                         if (
-                            pd[2]
-                            and pd[2].id.lower() != "ml"
-                            and pd[2].id.lower() == pd[6].amountUnit.lower()
+                            pd.measure_unit
+                            and pd.measure_unit.id.lower() != "ml"
+                            and pd.measure_unit.id.lower()
+                            == pd.drug_attributes.amountUnit.lower()
                         ):
-                            recalc = round(pd[0].dose / pd[6].amount, 5)
+                            recalc = round(
+                                pd.prescription_drug.dose / pd.drug_attributes.amount, 5
+                            )
                             if should_update:
                                 result[key]["vol"] = recalc
                             pd_dose = recalc  # always update for totalVol
 
-                    if pd[6] and pd[6].amount and pd[6].amountUnit is None:
+                    if (
+                        pd.drug_attributes
+                        and pd.drug_attributes.amount
+                        and pd.drug_attributes.amountUnit is None
+                    ):
                         if should_update:
-                            result[key]["vol"] = pd[6].amount
+                            result[key]["vol"] = pd.drug_attributes.amount
                             if is_priority:
                                 priority_set[key] = True
-                        pd_dose = pd[6].amount  # always update for totalVol
+                        pd_dose = (
+                            pd.drug_attributes.amount
+                        )  # always update for totalVol
 
-                    if pd[0].solutionDose and should_update:
-                        result[key]["speed"] = pd[0].solutionDose
+                    if pd.prescription_drug.solutionDose and should_update:
+                        result[key]["speed"] = pd.prescription_drug.solutionDose
 
-                    if pd[0].solutionUnit and should_update:
-                        result[key]["speedUnit"] = pd[0].solutionUnit
+                    if pd.prescription_drug.solutionUnit and should_update:
+                        result[key]["speedUnit"] = pd.prescription_drug.solutionUnit
 
                     result[key]["totalVol"] += pd_dose if pd_dose else 0
                     result[key]["totalVol"] = round(result[key]["totalVol"], 3)
@@ -787,16 +912,16 @@ class DrugList:
 
     @staticmethod
     def conciliaList(pDrugs, result=[]):
-        for pd in pDrugs:
+        for pd in prescription_item.to_items(pDrugs):
             existsDrug = next(
                 (
                     d
                     for d in result
-                    if d["idDrug"] == str(pd[0].idDrug)
-                    and d["recommendation"] == pd[0].notes
-                    and d["dose"] == pd[0].dose
-                    and d["frequencyday"] == pd[0].frequency
-                    and d["timeRaw"] == pd[0].interval
+                    if d["idDrug"] == str(pd.prescription_drug.idDrug)
+                    and d["recommendation"] == pd.prescription_drug.notes
+                    and d["dose"] == pd.prescription_drug.dose
+                    and d["frequencyday"] == pd.prescription_drug.frequency
+                    and d["timeRaw"] == pd.prescription_drug.interval
                 ),
                 False,
             )
@@ -807,37 +932,53 @@ class DrugList:
             ]
             if (
                 not existsDrug
-                and not bool(pd[0].suspendedDate)
-                and pd[0].source in valid_sources
+                and not bool(pd.prescription_drug.suspendedDate)
+                and pd.prescription_drug.source in valid_sources
             ):
-                idmeasureunit = pd[0].idMeasureUnit if pd[0].idMeasureUnit else ""
-                idfrequency = pd[0].idFrequency if pd[0].idFrequency else ""
+                idmeasureunit = (
+                    pd.prescription_drug.idMeasureUnit
+                    if pd.prescription_drug.idMeasureUnit
+                    else ""
+                )
+                idfrequency = (
+                    pd.prescription_drug.idFrequency
+                    if pd.prescription_drug.idFrequency
+                    else ""
+                )
 
                 result.append(
                     {
-                        "idPrescription": str(pd[0].idPrescription),
-                        "idPrescriptionDrug": str(pd[0].id),
-                        "idDrug": str(pd[0].idDrug),
+                        "idPrescription": str(pd.prescription_drug.idPrescription),
+                        "idPrescriptionDrug": str(pd.prescription_drug.id),
+                        "idDrug": str(pd.prescription_drug.idDrug),
                         "drug": (
-                            pd[1].name
-                            if pd[1] is not None
-                            else "Medicamento " + str(pd[0].idDrug)
+                            pd.drug.name
+                            if pd.drug is not None
+                            else "Medicamento " + str(pd.prescription_drug.idDrug)
                         ),
-                        "dose": pd[0].dose,
+                        "dose": pd.prescription_drug.dose,
                         "measureUnit": (
-                            {"value": pd[2].id, "label": pd[2].description}
-                            if pd[2]
+                            {
+                                "value": pd.measure_unit.id,
+                                "label": pd.measure_unit.description,
+                            }
+                            if pd.measure_unit
                             else {"value": idmeasureunit, "label": idmeasureunit}
                         ),
                         "frequency": (
-                            {"value": pd[3].id, "label": pd[3].description}
-                            if pd[3]
+                            {
+                                "value": pd.frequency.id,
+                                "label": pd.frequency.description,
+                            }
+                            if pd.frequency
                             else {"value": idfrequency, "label": idfrequency}
                         ),
-                        "frequencyday": pd[0].frequency,
-                        "time": prescriptionutils.timeValue(pd[0].interval),
-                        "timeRaw": pd[0].interval,
-                        "recommendation": pd[0].notes,
+                        "frequencyday": pd.prescription_drug.frequency,
+                        "time": prescriptionutils.timeValue(
+                            pd.prescription_drug.interval
+                        ),
+                        "timeRaw": pd.prescription_drug.interval,
+                        "recommendation": pd.prescription_drug.notes,
                         "sctid": str(pd.Substance.id) if pd.Substance else None,
                         "substance": pd.Substance.name if pd.Substance else None,
                         "idSubstanceClass": pd.Substance.idclass
@@ -0,0 +1,146 @@
+"""Prescription items: the rows of prescription_view_repository.find_drugs_by_prescription
+
+An item keeps the positional access of the query row (item[0] is the
+PrescriptionDrug, item[6] the DrugAttributes...) and adds named fields plus the
+values every consumer used to derive from the row on its own (source filters,
+sctid, convert factor, expire day). They are computed once, when the item is built.
+"""
+
+from models.enums import DrugTypeEnum
+
+# query row columns, in order
+FIELDS = (
+    "prescription_drug",
+    "drug",
+    "measure_unit",
+    "frequency",
+    "not_used",
+    "score",
+    "drug_attributes",
+    "notes",
+    "prevNotes",
+    "status",
+    "prescription_expire",
+    "substance",
+    "period_cpoe",
+    "prescription_date",
+    "measure_unit_convert_factor",
+    "substance_handling_types",
+    "idDepartment",
+    "measure_unit_solution_convert_factor",
+    "default_measure_unit_nh",
+)
+
+ALERT_SOURCES = frozenset(
+    [
+        DrugTypeEnum.DRUG.value,
+        DrugTypeEnum.SOLUTION.value,
+        DrugTypeEnum.PROCEDURE.value,
+    ]
+)
+
+PROTOCOL_SOURCES = ALERT_SOURCES | {DrugTypeEnum.DIET.value}
+
+
+class PrescriptionItem:
+    """One prescription drug row, with derived values computed once"""
+
+    __slots__ = FIELDS + (
+        "sctid",
+        "convert_factor",
+        "expire_day",
+        "is_alert_item",
+        "is_protocol_item",
+        "is_interaction_item",
+    )
+
+    def __init__(self, row):
+        values = tuple(row)
+        for index, name in enumerate(FIELDS):
+            setattr(self, name, values[index] if index < len(values) else None)
+
+        prescription_drug = self.prescription_drug
+        drug_attributes = self.drug_attributes
+        source = prescription_drug.source
+        active = prescription_drug.suspendedDate is None
+
+        self.sctid = self.drug.sctid if self.drug is not None else None
+        self.convert_factor = (
+            self.measure_unit_convert_factor
+            if self.measure_unit_convert_factor is not None
+            else 1
+        )
+        self.expire_day = (
+            self.prescription_expire.day if self.prescription_expire else 0
+        )
+        self.is_alert_item = active and source in ALERT_SOURCES
+        self.is_protocol_item = active and source in PROTOCOL_SOURCES
+        # whitelisted drugs do not interact, unless they are part of a solution
+        self.is_interaction_item = (
+            self.is_alert_item
+            and self.sctid is not None
+            and not (
+                drug_attributes is not None
+                and drug_attributes.whiteList
+                and source != DrugTypeEnum.SOLUTION.value
+            )
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, name) for name in FIELDS[index])
+
+        return getattr(self, FIELDS[index])
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in FIELDS)
+
+    # entity names of the query row
+    @property
+    def PrescriptionDrug(self):
+        return self.prescription_drug
+
+    @property
+    def Drug(self):
+        return self.drug
+
+    @property
+    def MeasureUnit(self):
+        return self.measure_unit
+
+    @property
+    def DrugAttributes(self):
+        return self.drug_attributes
+
+    @property
+    def Substance(self):
+        return self.substance
+
+
+class PrescriptionItems(list):
+    """Items of a prescription, with the items each consumer works on"""
+
+    __slots__ = ("alert_items", "protocol_items", "interaction_items")
+
+    def __init__(self, items=()):
+        super().__init__(items)
+
+        self.alert_items = [item for item in self if item.is_alert_item]
+        self.protocol_items = [item for item in self if item.is_protocol_item]
+        self.interaction_items = [
+            item for item in self.alert_items if item.is_interaction_item
+        ]
+
+
+def to_items(rows) -> PrescriptionItems:
+    """Prescription items of the query rows (items already built are kept)"""
+    if isinstance(rows, PrescriptionItems):
+        return rows
+
+    return PrescriptionItems(
+        row if isinstance(row, PrescriptionItem) else PrescriptionItem(row)
+        for row in rows
+    )
@@ -1,6 +1,7 @@
 """Prescription utils functions."""
 
 from datetime import datetime
+from itertools import chain
 from typing import Union
 
 from utils import dateutils, numberutils, stringutils
@@ -92,46 +93,49 @@ def get_internal_prescription_ids(result: dict):
 
 
 def getFeatures(result, agg_date: datetime = None, intervals_for_agg_date=False):
-    drugList = result["prescription"] + result["solution"] + result["procedures"]
-
+    """Prescription features, aggregated in a single pass over the items"""
     allergy = alerts = alerts_prescription = pScore = score1 = score2 = score3 = 0
     am = av = control = np = tube = diff = 0
-    drugIDs = []
-    substanceIDs = []
-    substanceClassIDs = []
-    frequencies = []
-    intervals = []
-    drug_attributes = {}
-    alert_levels = []
+    total_items = 0
+    drugIDs = set()
+    substanceIDs = set()
+    substanceClassIDs = set()
+    frequencies = set()
+    intervals = set()
+    drug_attributes = dict.fromkeys(get_numeric_drug_attributes_list(), 0)
+    alert_levels = set()
     alert_level = "low"
     department_list = set()
 
-    for attr in get_numeric_drug_attributes_list():
-        drug_attributes[attr] = 0
+    # intervals_for_agg_date: only items of the same prescription date (individual and agg)
+    agg_day = None
+    if intervals_for_agg_date and agg_date != None:
+        agg_day = dateutils.to_iso(agg_date).split("T")[0]
 
-    for d in drugList:
-        drugIDs.append(d["idDrug"])
+    for d in chain(result["prescription"], result["solution"], result["procedures"]):
+        total_items += 1
+        drugIDs.add(d["idDrug"])
         if d["idSubstance"] != None:
-            substanceIDs.append(d["idSubstance"])
+            substanceIDs.add(d["idSubstance"])
         if d["idSubstanceClass"] != None:
-            substanceClassIDs.append(d["idSubstanceClass"])
+            substanceClassIDs.add(d["idSubstanceClass"])
 
-        if "drugAttributes" in d and d["drugAttributes"] != None:
-            for attr in d["drugAttributes"]:
+        item_attributes = d.get("drugAttributes", None)
+        if item_attributes != None:
+            for attr, value in item_attributes.items():
                 if attr in drug_attributes:
-                    drug_attributes[attr] += int(
-                        numberutils.none2zero(d["drugAttributes"][attr])
-                    )
+                    drug_attributes[attr] += int(numberutils.none2zero(value))
 
         if d["whiteList"] or d["suspended"]:
             continue
 
+        score = d["score"]
         allergy += int(d["allergy"])
         alerts_prescription += len(d["alertsComplete"])
-        pScore += int(d["score"])
-        score1 += int(d["score"] == "1")
-        score2 += int(d["score"] == "2")
-        score3 += int(int(d["score"]) > 2)
+        pScore += int(score)
+        score1 += int(score == "1")
+        score2 += int(score == "2")
+        score3 += int(int(score) > 2)
         am += int(d["am"]) if d["am"] is not None else 0
         av += int(d["av"]) if d["av"] is not None else 0
         np += int(d["np"]) if d["np"] is not None else 0
@@ -139,35 +143,22 @@ def getFeatures(result, agg_date: datetime = None, intervals_for_agg_date=False)
         diff += int(not d["checked"])
         tube += int(d["tubeAlert"])
 
-        if intervals_for_agg_date:
-            # add interval for agg_date
-            if (
-                agg_date != None
+        interval = d.get("interval", None)
+        if interval != None and (
+            not intervals_for_agg_date
+            or (
+                agg_day != None
                 and d["prescriptionDate"] != None
-                and dateutils.to_iso(agg_date).split("T")[0]
-                == d["prescriptionDate"].split("T")[0]
-            ):
-                # must be the same prescription date (individual and agg)
-                if d.get("interval", None) != None:
-                    times = split_interval(d.get("interval"))
-                    for t in times:
-                        if t not in intervals:
-                            intervals.append(t)
-        else:
-            # add all intervals
-            if d.get("interval", None) != None:
-                times = split_interval(d.get("interval"))
-                for t in times:
-                    if t not in intervals:
-                        intervals.append(t)
-
-        intervals.sort()
+                and agg_day == d["prescriptionDate"].split("T")[0]
+            )
+        ):
+            intervals.update(split_interval(interval))
 
         if d["frequency"]["value"] != "":
-            frequencies.append(d["frequency"]["value"])
+            frequencies.add(d["frequency"]["value"])
 
         for a in d["alertsComplete"]:
-            alert_levels.append(a["level"])
+            alert_levels.add(a["level"])
 
         department_list.add(d["idDepartment"])
 
@@ -215,17 +206,17 @@ def getFeatures(result, agg_date: datetime = None, intervals_for_agg_date=False)
         "alertExams": exams,
         "interventions": interventions,
         "complication": complicationCount,
-        "drugIDs": list(set(drugIDs)),
-        "substanceIDs": list(set(substanceIDs)),
-        "substanceClassIDs": list(set(substanceClassIDs)),
+        "drugIDs": list(drugIDs),
+        "substanceIDs": list(substanceIDs),
+        "substanceClassIDs": list(substanceClassIDs),
         "alertStats": (result["alertStats"] if "alertStats" in result else None),
         "clinicalNotesStats": result.get("clinicalNotesStats", None),
         "clinicalNotes": result.get("clinicalNotes", None),
-        "frequencies": list(set(frequencies)),
+        "frequencies": list(frequencies),
         "processedDate": datetime.today().isoformat(),
-        "totalItens": len(drugList),
+        "totalItens": total_items,
         "drugAttributes": drug_attributes,
-        "intervals": intervals,
+        "intervals": sorted(intervals),
         "departmentList": list(department_list),
         "globalScore": global_score,
         "protocolAlerts": protocol_alerts,
@@ -0,0 +1,110 @@
+"""Per-process caches for catalog data shared by every request of a worker
+
+Values live as long as the process (a lambda container or a gunicorn worker), so
+they must be treated as read-only by the callers.
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class _Entry:
+    __slots__ = ("value", "version", "checked_at")
+
+    def __init__(self, value, version, checked_at: float):
+        self.value = value
+        self.version = version
+        self.checked_at = checked_at
+
+
+class VersionedCache:
+    """Cache reloaded only when a version stamp changes
+
+    The version stamp (a cheap query such as max(update_at)) is checked at most
+    once every check_interval seconds per key; in between, reads cost nothing.
+    """
+
+    def __init__(self, check_interval: float = 60):
+        self.check_interval = check_interval
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, load: Callable, version: Callable):
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry.value
+
+        with self._lock:
+            current_version = version()
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.version == current_version:
+                entry.checked_at = now
+                return entry.value
+
+            value = load()
+            self._entries[key] = _Entry(
+                value=value, version=current_version, checked_at=now
+            )
+
+            return value
+
+    def invalidate(self, key=None):
+        """Drop one key (or everything) so the next read reloads it"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class TTLCache:
+    """Cache reloaded when older than ttl seconds (or on demand, with refresh)
+
+    With max_size, expired entries are dropped when the cache is full, then the
+    oldest ones (for caches keyed by open-ended values, such as request filters).
+    """
+
+    def __init__(self, ttl: float = 300, max_size: int = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, load: Callable, refresh: bool = False):
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if not refresh and entry is not None and now - entry.checked_at < self.ttl:
+            return entry.value
+
+        with self._lock:
+            value = load()
+            self._entries.pop(key, None)
+            self._evict(now)
+            self._entries[key] = _Entry(value=value, version=None, checked_at=now)
+
+            return value
+
+    def _evict(self, now: float):
+        if self.max_size is None or len(self._entries) < self.max_size:
+            return
+
+        for key in [
+            k for k, e in self._entries.items() if now - e.checked_at >= self.ttl
+        ]:
+            del self._entries[key]
+
+        while len(self._entries) >= self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key=None):
+        """Drop one key (or everything) so the next read reloads it"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -1,4 +1,7 @@
 import logging
+
+from flask_jwt_extended import get_jwt
+
 from utils import status
 
 from exception.authorization_error import AuthorizationError
@@ -55,3 +58,11 @@ def tryCommit(db, recId, allow=True):
             "status": "error",
             "message": "Ocorreu um erro inesperado.",
         }, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+def get_current_schema():
+    """Schema of the authenticated request (None outside a verified request)"""
+    try:
+        return get_jwt().get("schema", None)
+    except Exception:
+        return None
@@ -0,0 +1,147 @@
+"""Request-scoped span recorder: per-stage latency, SQL and Redis counters
+
+Usage:
+    with span_recorder.record("prescription_view", id_prescription=1) as recorder:
+        with recorder.span("exams"):
+            ...
+
+When the outer block ends a single structured line is sent to the backend
+logger: at INFO, or at WARNING when the block is slower than SLOW_RECORD_MS. The recorder is also kept on ``g`` so handlers can expose it as a
+``Server-Timing`` header when the client asks for it (see app/handlers.py).
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils import logger
+
+# request header that enables the Server-Timing response header
+DEBUG_HEADER = "X-Debug-Timing"
+
+# records slower than this are logged as warnings, the others as info
+SLOW_RECORD_MS = 5000
+
+# contextvars (not g) so worker threads running a stage can still be counted
+_current_recorder: ContextVar = ContextVar("span_recorder", default=None)
+_current_span: ContextVar = ContextVar("span", default=None)
+
+
+class Span:
+    """One timed stage"""
+
+    __slots__ = ("name", "duration_ms", "sql", "redis")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.duration_ms = 0
+        self.sql = 0
+        self.redis = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "duration_ms": self.duration_ms,
+            "sql": self.sql,
+            "redis": self.redis,
+        }
+
+
+class SpanRecorder:
+    """Collects the spans of a single request"""
+
+    def __init__(self, name: str, **tags):
+        self.name = name
+        self.tags = tags
+        self.spans: list[Span] = []
+        self.duration_ms = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a stage and count the statements it issues"""
+        span = Span(name)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        return {
+            "event": "span_recorder",
+            "name": self.name,
+            "duration_ms": self.duration_ms,
+            **self.tags,
+            "sql": sum(s.sql for s in self.spans),
+            "redis": sum(s.redis for s in self.spans),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (https://w3c.github.io/server-timing/)"""
+        metrics = [
+            f'{s.name};dur={s.duration_ms};desc="sql={s.sql} redis={s.redis}"'
+            for s in self.spans
+        ]
+        metrics.append(f"total;dur={self.duration_ms}")
+
+        return ", ".join(metrics)
+
+
+@contextmanager
+def record(name: str, **tags):
+    """Start a recorder for the current request and log it when the block ends"""
+    recorder = SpanRecorder(name, **tags)
+    token = _current_recorder.set(recorder)
+    start = time.perf_counter()
+    try:
+        yield recorder
+    finally:
+        recorder.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        _current_recorder.reset(token)
+
+        logger.backend_logger.log(
+            (
+                logging.WARNING
+                if recorder.duration_ms >= SLOW_RECORD_MS
+                else logging.INFO
+            ),
+            json.dumps(recorder.to_dict()),
+        )
+
+        if has_app_context():
+            g.span_recorder = recorder
+
+
+def get_recorder() -> SpanRecorder | None:
+    """Recorder that last finished in this request (None if nothing was recorded)"""
+    if not has_app_context():
+        return None
+
+    return g.get("span_recorder", None)
+
+
+def count_redis():
+    """Register one redis round-trip in the active span"""
+    span = _current_span.get()
+    if span is not None:
+        span.redis += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_sql(conn, cursor, statement, parameters, context, executemany):
+    span = _current_span.get()
+    if span is not None:
+        span.sql += 1